@@ -1,106 +1,207 @@
 class AST:
-    pass
+    # _fields - поля узла в порядке конструктора, _children - те из них, где лежат узлы
+    # или списки узлов. Семантические пометки (symbol, address, node_type, eval_type, var_type)
+    # и span объявлены слотами в тех классах, где их ставят парсер и анализатор.
+    __slots__ = ()
+    _fields = ()
+    _children = ()
+    span = None
 
 class Program(AST):
+    __slots__ = ('name', 'block', 'symbol')
+    _fields = ('name', 'block')
+    _children = ('block',)
+
     def __init__(self, name, block):
         self.name = name
         self.block = block
+        self.symbol = None
 
 class Block(AST):
+    __slots__ = ('declarations', 'compound_statement')
+    _fields = ('declarations', 'compound_statement')
+    _children = ('declarations', 'compound_statement')
+
     def __init__(self, declarations, compound_statement):
         self.declarations = declarations
         self.compound_statement = compound_statement
 
 class VarDecl(AST):
+    __slots__ = ('var_node', 'type_node')
+    _fields = ('var_node', 'type_node')
+    _children = ('var_node', 'type_node')
+
     def __init__(self, var_node, type_node):
         self.var_node = var_node
         self.type_node = type_node
 
 class ConstDecl(AST):
+    __slots__ = ('const_node', 'value_node')
+    _fields = ('const_node', 'value_node')
+    _children = ('const_node', 'value_node')
+
     def __init__(self, const_node, value_node):
         self.const_node = const_node
         self.value_node = value_node
 
 class ProcedureDecl(AST):
+    __slots__ = ('proc_name', 'params', 'block_node', 'symbol', 'span')
+    _fields = ('proc_name', 'params', 'block_node')
+    _children = ('params', 'block_node')
+
     def __init__(self, proc_name, params, block_node):
         self.proc_name = proc_name
         self.params = params
         self.block_node = block_node
+        self.symbol = None
+        self.span = None
 
 class Param(AST):
+    __slots__ = ('var_node', 'type_node', 'is_var')
+    _fields = ('var_node', 'type_node', 'is_var')
+    _children = ('var_node', 'type_node')
+
     def __init__(self, var_node, type_node, is_var=False):
         self.var_node = var_node
         self.type_node = type_node
         self.is_var = is_var
 
 class Type(AST):
+    __slots__ = ('token', 'value')
+    _fields = ('token',)
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
 
 class Num(AST):
+    __slots__ = ('token', 'value', 'node_type')
+    _fields = ('token',)
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
+        self.node_type = None
 
 class StringLiteral(AST):
+    __slots__ = ('token', 'value', 'node_type')
+    _fields = ('token',)
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
+        self.node_type = None
 
 class BinOp(AST):
+    __slots__ = ('left', 'op', 'right', 'eval_type', 'node_type')
+    _fields = ('left', 'op', 'right')
+    _children = ('left', 'right')
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
         self.eval_type = None
+        self.node_type = None
 
 class UnaryOp(AST):
+    __slots__ = ('op', 'expr', 'eval_type', 'node_type')
+    _fields = ('op', 'expr')
+    _children = ('expr',)
+
     def __init__(self, op, expr):
         self.op = op
         self.expr = expr
         self.eval_type = None
+        self.node_type = None
 
 class Assign(AST):
+    __slots__ = ('left', 'op', 'right', 'node_type', 'span')
+    _fields = ('left', 'op', 'right')
+    _children = ('left', 'right')
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
+        self.node_type = None
+        self.span = None
 
 class Variable(AST):
+    __slots__ = ('token', 'value', 'eval_type', 'symbol', 'address', 'var_type', 'node_type')
+    _fields = ('token',)
+
     def __init__(self, token):
         self.token = token
         self.value = token.value
         self.eval_type = None
+        self.symbol = None
+        self.address = None
+        self.var_type = None
+        self.node_type = None
 
 class CompoundStatement(AST):
+    __slots__ = ('children', 'span')
+    _fields = ('children',)
+    _children = ('children',)
+
     def __init__(self):
         self.children = []
+        self.span = None
 
 class If(AST):
+    __slots__ = ('condition', 'then_statement', 'else_statement', 'span')
+    _fields = ('condition', 'then_statement', 'else_statement')
+    _children = ('condition', 'then_statement', 'else_statement')
+
     def __init__(self, condition, then_statement, else_statement=None):
         self.condition = condition
         self.then_statement = then_statement
         self.else_statement = else_statement
+        self.span = None
 
 class While(AST):
+    __slots__ = ('condition', 'body_statement', 'span')
+    _fields = ('condition', 'body_statement')
+    _children = ('condition', 'body_statement')
+
     def __init__(self, condition, body_statement):
         self.condition = condition
         self.body_statement = body_statement
+        self.span = None
 
 class ProcedureCall(AST):
+    __slots__ = ('proc_name', 'actual_params', 'token', 'node_type', 'span')
+    _fields = ('proc_name', 'actual_params', 'token')
+    _children = ('actual_params',)
+
     def __init__(self, proc_name, actual_params, token):
         self.proc_name = proc_name
         self.actual_params = actual_params
         self.token = token
+        self.node_type = None
+        self.span = None
 
 class Read(AST):
+    __slots__ = ('variables', 'span')
+    _fields = ('variables',)
+    _children = ('variables',)
+
     def __init__(self, variables):
         self.variables = variables
+        self.span = None
 
 class Write(AST):
+    __slots__ = ('expressions', 'span')
+    _fields = ('expressions',)
+    _children = ('expressions',)
+
     def __init__(self, expressions):
         self.expressions = expressions
+        self.span = None
 
 class NoOp(AST):
-    pass
\ No newline at end of file
+    __slots__ = ('span',)
+
+    def __init__(self):
+        self.span = None
@@ -1,8 +1,12 @@
 # ast_printer.py
 from ast_nodes import *
+from ast_walker import NodeVisitor
 import io
 
-class ASTPrinter:
+class ASTPrinter(NodeVisitor):
+    visitor_prefix = '_visit_'
+    generic_visitor = '_generic_visit'
+
     def __init__(self):
         self.output_buffer = io.StringIO()
 
@@ -18,21 +22,21 @@ class ASTPrinter:
         if node is None:
             self._p(indent, "NoneNode")
             return
-        method_name = '_visit_' + type(node).__name__
-        visitor = getattr(self, method_name, self._generic_visit)
-        visitor(node, indent)
+        visitor = self._visitors.get(type(node))
+        if visitor is None:
+            visitor = self.find_visitor(type(node))
+        visitor(self, node, indent)
 
     def _generic_visit(self, node, indent=0):
         self._p(indent, f"{type(node).__name__} (Generic - Add specific visitor)")
-        for attr_name in dir(node):
-            if not attr_name.startswith('_'):
-                attr_value = getattr(node, attr_name)
-                if isinstance(attr_value, AST):
-                    self._visit(attr_value, indent + 1)
-                elif isinstance(attr_value, list) and attr_value and isinstance(attr_value[0], AST):
-                    self._p(indent + 1, f"{attr_name}: [List]")
-                    for item in attr_value:
-                        self._visit(item, indent + 2)
+        for attr_name in node._children:
+            attr_value = getattr(node, attr_name)
+            if isinstance(attr_value, AST):
+                self._visit(attr_value, indent + 1)
+            elif isinstance(attr_value, list) and attr_value and isinstance(attr_value[0], AST):
+                self._p(indent + 1, f"{attr_name}: [List]")
+                for item in attr_value:
+                    self._visit(item, indent + 2)
 
     def _visit_Program(self, node, indent=0):
         self._p(indent, f"Program(name='{node.name}')")
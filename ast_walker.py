@@ -0,0 +1,135 @@
+# ast_walker.py
+from ast_nodes import AST
+
+# Обход по схеме _children вместо dir()/getattr по всем атрибутам.
+# Все обходы итеративные: глубина дерева ограничена только памятью.
+
+_REMOVED = object()
+_MISSING = object()
+
+def iter_child_nodes(node):
+    for name in node._children:
+        value = getattr(node, name)
+        if isinstance(value, AST):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, AST):
+                    yield item
+
+def _child_list(node):
+    children = []
+    for name in node._children:
+        value = getattr(node, name)
+        if isinstance(value, AST):
+            children.append(value)
+        elif isinstance(value, list):
+            children.extend(item for item in value if isinstance(item, AST))
+    return children
+
+def preorder(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = _child_list(node)
+        children.reverse()
+        stack.extend(children)
+
+def postorder(node):
+    # Кадр: (узел, дети уже в стеке).
+    stack = [(node, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        stack.append((node, True))
+        children = _child_list(node)
+        for child in reversed(children):
+            stack.append((child, False))
+
+def count_nodes(node):
+    count = 0
+    for _ in preorder(node):
+        count += 1
+    return count
+
+class NodeVisitor:
+    # Метод <visitor_prefix><Класс> ищется один раз на пару (класс обходчика, класс узла) и
+    # хранится в таблице _visitors класса обходчика; дальше visit - один поиск в словаре.
+    # Если метода для класса узла нет, берётся метод ближайшего базового класса узла,
+    # затем generic_visitor. У каждого подкласса своя таблица, так что переопределённые
+    # в наследнике методы находятся как обычно.
+    visitor_prefix = 'visit_'
+    generic_visitor = 'generic_visit'
+    _visitors = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visitors = {}
+
+    @classmethod
+    def find_visitor(cls, node_class):
+        visitor = cls._visitors.get(node_class, _MISSING)
+        if visitor is _MISSING:
+            for klass in node_class.__mro__:
+                visitor = getattr(cls, cls.visitor_prefix + klass.__name__, None)
+                if visitor is not None:
+                    break
+            else:
+                visitor = getattr(cls, cls.generic_visitor) if cls.generic_visitor else None
+            cls._visitors[node_class] = visitor
+        return visitor
+
+    def visit(self, node):
+        visitor = self._visitors.get(type(node))
+        if visitor is None:
+            visitor = self.find_visitor(type(node))
+        return visitor(self, node)
+
+    def generic_visit(self, node):
+        for child in iter_child_nodes(node):
+            self.visit(child)
+
+class NodeTransformer(NodeVisitor):
+    # Узлы обрабатываются снизу вверх: transform_<Класс> получает узел с уже
+    # преобразованными детьми и возвращает замену (тот же узел, новый или None -
+    # удалить из списка / обнулить поле).
+    visitor_prefix = 'transform_'
+    generic_visitor = None
+
+    def transform(self, node):
+        result = [node]
+        # Кадр: (узел, владелец, имя поля, индекс в списке или None, дети уже в стеке).
+        stack = [(node, result, None, 0, False)]
+        while stack:
+            node, owner, name, index, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, owner, name, index, True))
+                for field in reversed(node._children):
+                    value = getattr(node, field)
+                    if isinstance(value, AST):
+                        stack.append((value, node, field, None, False))
+                    elif isinstance(value, list):
+                        for item_index in range(len(value) - 1, -1, -1):
+                            if isinstance(value[item_index], AST):
+                                stack.append((value[item_index], node, field, item_index, False))
+                continue
+            for field in node._children:
+                value = getattr(node, field)
+                if isinstance(value, list) and _REMOVED in value:
+                    setattr(node, field, [item for item in value if item is not _REMOVED])
+            transformer = self._visitors.get(type(node), _MISSING)
+            if transformer is _MISSING:
+                transformer = self.find_visitor(type(node))
+            new_node = node if transformer is None else transformer(self, node)
+            if new_node is node:
+                continue
+            if name is None:
+                owner[index] = new_node
+            elif index is None:
+                setattr(owner, name, new_node)
+            else:
+                getattr(owner, name)[index] = _REMOVED if new_node is None else new_node
+        return result[0]
@@ -0,0 +1,796 @@
+# benchmark.py
+import contextlib
+import gc
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import (LEXER_ENGINES, LexerError, LineIndex, T_EOF, T_AND, T_OR, T_NOT, T_PLUS, T_MINUS, T_MUL, T_DIV, T_REAL_DIV,
+                   T_EQUAL, T_NOT_EQUAL, T_LESS_THAN, T_LESS_EQUAL, T_GREATER_THAN, T_GREATER_EQUAL)
+from incremental_lexer import IncrementalLexer
+from incremental_parser import IncrementalParser
+from ast_nodes import AST
+from ast_printer import ASTPrinter
+from ast_walker import NodeVisitor, preorder, count_nodes
+from ast_cache import ParseCache, dump_ast, load_ast
+from parallel_lexer import ParallelLexer
+from parallel_compiler import ParallelCompiler
+from parser import Parser, ParserError, IterativeParser, BinOp, UnaryOp
+from semantic_analyzer import SemanticAnalyzer
+from ir_generator import IRGenerator
+from constant_folder import ConstantFolder
+from optimizer import Optimizer
+from nasm_generator import NASMGenerator
+from intermediate_rep import Call
+from ir_bytecode import IRBytecode, OP_CALL, OPCODE_MASK
+from ir_file import write_ir_file, load_ir_file
+from single_pass import SinglePassFrontEnd
+from table_parser import TableParser, compile_parse_table
+from stream_lexer import StreamingLexer, open_source_stream
+from token_buffer import TokenBuffer
+
+
+def generate_program(procedures=200, statements=40):
+    lines = ["PROGRAM Generated;", "CONST", "  LIMIT = 100;", "  SCALE = 2.5;", "  TITLE = 'gen\\n';",
+             "VAR", "  g_count, g_total : INTEGER;", "  g_ratio : REAL;"]
+    for p in range(procedures):
+        lines.append(f"PROCEDURE Proc{p}(a : INTEGER; b : REAL);")
+        lines.append("VAR i, acc : INTEGER; r : REAL;")
+        lines.append("BEGIN")
+        lines.append("  { generated body }")
+        lines.append("  i := 0; acc := a;")
+        for s in range(statements):
+            kind = s % 4
+            if kind == 0:
+                lines.append(f"  acc := acc + (i * {s + 1}) DIV 3 - {s}; // step {s}")
+            elif kind == 1:
+                lines.append(f"  IF (acc >= {s * 7}) AND NOT (i = {s}) THEN r := b * {s}.5 / SCALE ELSE r := acc + 1.25;")
+            elif kind == 2:
+                lines.append(f"  WHILE i < LIMIT DO i := i + {s % 5 + 1};")
+            else:
+                lines.append(f"  WRITE('proc {p} step {s}: ', acc, ' ', r, '\\n');")
+        lines.append("  g_total := g_total + acc")
+        lines.append("END;")
+    lines.append("BEGIN")
+    lines.append("  g_count := 0; g_total := 0; g_ratio := 0.0;")
+    for p in range(procedures):
+        lines.append(f"  Proc{p}(g_count + {p}, g_ratio);")
+    lines.append("  WRITE(TITLE, g_total)")
+    lines.append("END.")
+    return "\n".join(lines) + "\n"
+
+
+def generate_checked_program(procedures=200, statements=40):
+    # Как generate_program, но проходит семантический анализ. Таблица символов - цепочка областей
+    # (глобальная и по одной на процедуру), так что одинаковые локальные имена в разных процедурах
+    # допустимы; суффикс номера процедуры у параметров и локальных оставлен, чтобы программа
+    # и замеры на ней не менялись.
+    lines = ["PROGRAM Checked;", "CONST", "  LIMIT = 100;", "  SCALE = 2.5;",
+             "VAR", "  g_count, g_total : INTEGER;", "  g_ratio : REAL;"]
+    for p in range(procedures):
+        lines.append(f"PROCEDURE Proc{p}(a{p} : INTEGER; b{p} : REAL);")
+        lines.append(f"VAR i{p}, acc{p} : INTEGER; r{p} : REAL;")
+        lines.append("BEGIN")
+        lines.append(f"  i{p} := 0; acc{p} := a{p};")
+        for s in range(statements):
+            kind = s % 4
+            if kind == 0:
+                lines.append(f"  acc{p} := acc{p} + (i{p} * {s + 1}) DIV 3 - {s};")
+            elif kind == 1:
+                lines.append(f"  IF (acc{p} >= {s * 7}) AND NOT (i{p} = {s}) THEN r{p} := b{p} * {s}.5 / SCALE ELSE r{p} := acc{p} + 1.25;")
+            elif kind == 2:
+                lines.append(f"  WHILE i{p} < LIMIT DO BEGIN i{p} := i{p} + {s % 5 + 1}; g_count := g_count + 1 END;")
+            else:
+                lines.append(f"  WRITE('proc {p} step {s}: ', acc{p}, ' ', r{p}, '\\n');")
+        lines.append(f"  g_total := g_total + acc{p}")
+        lines.append("END;")
+    lines.append("BEGIN")
+    lines.append("  g_count := 0; g_total := 0; g_ratio := 0.0;")
+    for p in range(procedures):
+        lines.append(f"  Proc{p}(g_count + {p}, g_ratio);")
+    lines.append("  WRITE(g_total)")
+    lines.append("END.")
+    return "\n".join(lines) + "\n"
+
+
+def generate_expression_program(statements=3000, terms=12, seed=1):
+    rng = random.Random(seed)
+    arithmetic = ['+', '-', '*', '/', 'DIV']
+    relations = ['=', '<>', '<', '<=', '>', '>=']
+
+    def operand():
+        choice = rng.random()
+        if choice < 0.4:
+            return rng.choice(['a', 'b', 'c', 'x'])
+        if choice < 0.7:
+            return str(rng.randint(0, 99))
+        if choice < 0.8:
+            return f"{rng.randint(0, 9)}.{rng.randint(0, 9)}"
+        if choice < 0.9:
+            return '-' + rng.choice(['a', 'b', '1'])
+        return f"({rng.choice(['a', 'b'])} {rng.choice(arithmetic)} {rng.randint(1, 9)})"
+
+    def arithmetic_expr():
+        parts = [operand()]
+        for _ in range(rng.randint(0, terms)):
+            parts.append(rng.choice(arithmetic))
+            parts.append(operand())
+        return ' '.join(parts)
+
+    lines = ["PROGRAM Expressions;", "VAR a, b, c : INTEGER; x : REAL;", "BEGIN"]
+    for _ in range(statements):
+        if rng.random() < 0.5:
+            lines.append(f"  x := {arithmetic_expr()};")
+        else:
+            condition = (f"({arithmetic_expr()} {rng.choice(relations)} {arithmetic_expr()}) "
+                         f"{rng.choice(['AND', 'OR'])} NOT (a {rng.choice(relations)} {operand()})")
+            lines.append(f"  IF {condition} THEN a := {arithmetic_expr()};")
+    lines.append("  x := 0")
+    lines.append("END.")
+    return "\n".join(lines) + "\n"
+
+
+def generate_constant_program(statements=3000, seed=1):
+    # Константные подвыражения вперемешку с переменными: то, что сворачивает ConstantFolder.
+    rng = random.Random(seed)
+    lines = ["PROGRAM Constants;", "CONST", "  KB = 1024;", "  MB = KB * KB;", "  HALF = MB DIV 2 + 1;",
+             "  RATE = 2.5 * 4 / 3;", "VAR a, b : INTEGER; x : REAL;", "BEGIN", "  a := 1; b := 2; x := 0.5;"]
+    for s in range(statements):
+        kind = s % 3
+        if kind == 0:
+            lines.append(f"  a := (KB * {rng.randint(1, 9)} + {rng.randint(0, 99)}) DIV 4 - HALF + b;")
+        elif kind == 1:
+            lines.append(f"  x := x * RATE + ({rng.randint(1, 9)}.5 - 1) / 2 + -{rng.randint(1, 9)};")
+        else:
+            lines.append(f"  IF (a > MB DIV {rng.randint(2, 9)}) AND NOT (b = {rng.randint(0, 9)} * 2) THEN b := b + 1;")
+    lines.append("  WRITE(a, b, x)")
+    lines.append("END.")
+    return "\n".join(lines) + "\n"
+
+
+def generate_nested_program(depth):
+    # Вложенные IF/WHILE/BEGIN и скобки в выражении, как у сгенерированных машиной программ.
+    openers = ["IF a < b THEN ", "WHILE a > 0 DO ", "BEGIN "]
+    lines = ["PROGRAM Nested;", "VAR a, b : INTEGER;", "BEGIN"]
+    prefix = []
+    closers = []
+    for level in range(depth):
+        opener = openers[level % len(openers)]
+        prefix.append(opener)
+        if opener == "BEGIN ":
+            closers.append(" END")
+    lines.append("  " + "".join(prefix) + "a := " + "(" * depth + "b" + " + 1)" * depth + "".join(reversed(closers)))
+    lines.append("END.")
+    return "\n".join(lines) + "\n"
+
+
+class _ChainParser(Parser):
+    # Прежняя цепочка expr -> condition -> ... -> primary, оставлена для сравнения с разбором Пратта.
+    def expr(self):
+        return self.condition()
+
+    def condition(self):
+        node = self.and_expr()
+        while self.current_token.type == T_OR:
+            token = self.current_token
+            self.eat(T_OR)
+            node = BinOp(left=node, op=token, right=self.and_expr())
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.current_token.type == T_AND:
+            token = self.current_token
+            self.eat(T_AND)
+            node = BinOp(left=node, op=token, right=self.not_expr())
+        return node
+
+    def not_expr(self):
+        if self.current_token.type == T_NOT:
+            token = self.current_token
+            self.eat(T_NOT)
+            node = UnaryOp(op=token, expr=self.not_expr())
+            return node
+        else:
+            return self.comparison_expr()
+
+    def comparison_expr(self):
+        node = self.additive_expr()
+
+        rel_ops = (T_EQUAL, T_NOT_EQUAL, T_LESS_THAN, T_LESS_EQUAL, T_GREATER_THAN, T_GREATER_EQUAL)
+        if self.current_token.type in rel_ops:
+            op_token = self.current_token
+            self.eat(op_token.type)
+            right_node = self.additive_expr()
+            node = BinOp(left=node, op=op_token, right=right_node)
+        return node
+
+    def additive_expr(self):
+        node = self.multiplicative_expr()
+        while self.current_token.type in (T_PLUS, T_MINUS):
+            token = self.current_token
+            self.eat(token.type)
+            node = BinOp(left=node, op=token, right=self.multiplicative_expr())
+        return node
+
+    def multiplicative_expr(self):
+        node = self.primary()
+        while self.current_token.type in (T_MUL, T_REAL_DIV, T_DIV):
+            token = self.current_token
+            self.eat(token.type)
+            node = BinOp(left=node, op=token, right=self.primary())
+        return node
+
+
+def _timed(func, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def _count_tokens(lexer):
+    count = 0
+    while True:
+        token = lexer.get_next_token()
+        count += 1
+        if token.type == T_EOF:
+            return count
+
+
+def _token_values(lexer):
+    values = []
+    while True:
+        token = lexer.get_next_token()
+        values.append((token.type, token.value, token.line, token.column))
+        if token.type == T_EOF:
+            return values
+
+
+def bench_lexer(source):
+    print(f"Лексер: {len(source)} символов, {source.count(chr(10))} строк")
+    baseline_rate = None
+    for engine_name, lexer_class in LEXER_ENGINES.items():
+        elapsed, token_count = _timed(lambda: _count_tokens(lexer_class(source)))
+        rate = token_count / elapsed
+        if baseline_rate is None:
+            baseline_rate = rate
+        print(f"  {engine_name:>8}: {token_count} токенов за {elapsed:.3f} с, "
+              f"{rate:,.0f} токенов/с (x{rate / baseline_rate:.1f})")
+    # Длинный ряд пробелов перед ошибкой: мастер-шаблон не должен перебирать разбиения ряда
+    # (вложенный квантификатор давал экспоненциальное время уже на двух десятках пробелов).
+    error_source = "PROGRAM P;\nBEGIN\n  IF 1 = 1 THEN\n" + " " * 100000 + "@ := 1"
+    print("  ошибка после 100000 пробелов:")
+    for engine_name, lexer_class in LEXER_ENGINES.items():
+        def lex_to_error():
+            try:
+                _count_tokens(lexer_class(error_source))
+            except LexerError as e:
+                return str(e)
+            return None
+        elapsed, message = _timed(lex_to_error, repeat=1)
+        print(f"  {engine_name:>8}: {elapsed:.3f} с, {message}")
+
+
+def bench_parser(source):
+    token_count = _count_tokens(LEXER_ENGINES['regex'](source))
+    print(f"Парсер: {token_count} токенов")
+    for engine_name, lexer_class in LEXER_ENGINES.items():
+        elapsed, _ = _timed(lambda: Parser(lexer_class(source)).parse())
+        print(f"  {engine_name:>8}: {elapsed:.3f} с, {token_count / elapsed:,.0f} токенов/с")
+    elapsed, _ = _timed(lambda: Parser(TokenBuffer(source).stream()).parse())
+    print(f"  {'buffer':>8}: {elapsed:.3f} с, {token_count / elapsed:,.0f} токенов/с")
+    elapsed, _ = _timed(lambda: IterativeParser(LEXER_ENGINES['regex'](source)).parse())
+    print(f"  {'iterative':>8}: {elapsed:.3f} с, {token_count / elapsed:,.0f} токенов/с")
+
+
+class _DictToken:
+    def __init__(self, type, value, line=None, column=None):
+        self.type = type
+        self.value = value
+        self.line = line
+        self.column = column
+
+
+def _collect_tokens(source, token_class=None):
+    lexer = LEXER_ENGINES['regex'](source)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        if token_class is not None:
+            token = token_class(token.type, token.value, token.line, token.column)
+        tokens.append(token)
+        if token.type == T_EOF:
+            return tokens
+
+
+def _retained_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return retained, result
+
+
+def bench_token_memory(source):
+    token_count = _count_tokens(LEXER_ENGINES['regex'](source))
+    print(f"Память токенов: {token_count} токенов")
+    variants = [
+        ('dict', lambda: _collect_tokens(source, _DictToken)),
+        ('slots', lambda: _collect_tokens(source)),
+        ('buffer', lambda: TokenBuffer(source)),
+    ]
+    for name, build in variants:
+        retained, _ = _retained_bytes(build)
+        print(f"  {name:>8}: {retained / token_count:.1f} байт/токен")
+
+
+def _peak_bytes(run):
+    tracemalloc.start()
+    result = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, result
+
+
+def bench_stream(source):
+    fd, path = tempfile.mkstemp(suffix='.pas')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(source)
+    try:
+        def read_whole():
+            with open(path, 'r', encoding='utf-8') as f:
+                return _count_tokens(LEXER_ENGINES['regex'](f.read()))
+
+        def read_stream():
+            source_stream = open_source_stream(path)
+            try:
+                return _count_tokens(StreamingLexer(source_stream))
+            finally:
+                source_stream.close()
+
+        print(f"Потоковое чтение: {os.path.getsize(path)} байт")
+        for name, run in [('whole', read_whole), ('stream', read_stream)]:
+            elapsed, token_count = _timed(run, repeat=1)
+            peak, _ = _peak_bytes(run)
+            print(f"  {name:>8}: {token_count} токенов за {elapsed:.3f} с, пик памяти {peak / 1024:,.0f} КБ")
+    finally:
+        os.remove(path)
+    # Глубокий отступ перед строкой и комментарием, блоки режут их посередине: токены те же, что у Lexer,
+    # а время не растёт с длиной отступа (шаблоны не перебирают разбиения ряда пробелов).
+    print("  отступ перед строкой и комментарием, блоки по 16 байт:")
+    for indent in (24, 1000, 100000):
+        text = ("BEGIN\n" + " " * indent + "WRITE(1, 'hello world string');\n"
+                + " " * indent + "{ comment across chunks }\n" + " " * indent + "x := 1\nEND.")
+        expected = _token_values(LEXER_ENGINES['char'](text))
+        elapsed, streamed = _timed(lambda: _token_values(StreamingLexer(io.BytesIO(text.encode()), chunk_size=16)),
+                                   repeat=1)
+        print(f"  {indent:>8} пробелов: {elapsed:.3f} с, токены {'совпадают' if streamed == expected else 'РАЗЛИЧАЮТСЯ'}")
+
+
+def bench_parallel(source):
+    text = source * 8
+    max_workers = os.cpu_count() or 1
+    elapsed, token_count = _timed(lambda: _count_tokens(LEXER_ENGINES['regex'](text)), repeat=1)
+    print(f"Параллельный лексер: {len(text)} символов, {token_count} токенов, ядер: {max_workers}")
+    print(f"  {'seq':>8}: {elapsed:.3f} с")
+    for workers in range(1, max_workers + 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Пул запускается заранее, чтобы не учитывать старт процессов.
+            ParallelLexer(text[:1024], workers=workers, min_chunk_size=1, executor=executor).tokenize()
+            parallel_elapsed, _ = _timed(
+                lambda: ParallelLexer(text, workers=workers, min_chunk_size=1, executor=executor).tokenize(), repeat=1)
+        print(f"  {workers:>8}: {parallel_elapsed:.3f} с (x{elapsed / parallel_elapsed:.2f})")
+
+
+def bench_incremental(source):
+    elapsed, incremental_lexer = _timed(lambda: IncrementalLexer(source), repeat=1)
+    print(f"Инкрементальный лексер: {len(incremental_lexer)} токенов, полный разбор {elapsed:.3f} с")
+    offset = source.index(' := ', len(source) // 2) + 4
+    for inserted in ['7', ' { comment } ', '']:
+        edit_elapsed, (_, changed) = _timed(lambda: incremental_lexer.edit(offset, 0, inserted), repeat=1)
+        print(f"  вставка {inserted!r:>16}: {edit_elapsed * 1000:.2f} мс, изменённый диапазон {changed}")
+        incremental_lexer.edit(offset, len(inserted), '')
+
+
+def bench_reparse(source):
+    incremental_parser = IncrementalParser(source)
+    elapsed, _ = _timed(incremental_parser.parse, repeat=1)
+    print(f"Инкрементальный парсер: полный разбор {elapsed:.3f} с")
+    offset = source.index(' := ', len(source) // 2) + 4
+    main_offset = source.index(' := ', source.rindex('BEGIN')) + 4
+    for name, edit_offset in [('процедура', offset), ('главный блок', main_offset)]:
+        for inserted in ['1 + ', ' { comment } ']:
+            edit_elapsed, _ = _timed(lambda: incremental_parser.edit(edit_offset, 0, inserted), repeat=1)
+            reparsed = incremental_parser.reparsed
+            print(f"  {name}, вставка {inserted!r:>16}: {edit_elapsed * 1000:.2f} мс, переразобран {type(reparsed).__name__}")
+            incremental_parser.edit(edit_offset, len(inserted), '')
+
+
+class _DictAST:
+    pass
+
+
+# Прежние узлы с __dict__: те же имена классов и атрибутов, но без __slots__.
+_DICT_NODE_CLASSES = {cls: type(cls.__name__, (_DictAST,), {}) for cls in AST.__subclasses__()}
+
+
+def _copy_tree(node, dict_nodes):
+    # Копия дерева со слотами или с __dict__ для сравнения памяти и обхода.
+    node_class = type(node)
+    copy_class = _DICT_NODE_CLASSES[node_class] if dict_nodes else node_class
+    copy = copy_class.__new__(copy_class)
+    for name in node_class.__slots__:
+        if not hasattr(node, name):
+            continue
+        value = getattr(node, name)
+        if isinstance(value, AST):
+            value = _copy_tree(value, dict_nodes)
+        elif isinstance(value, list):
+            value = [_copy_tree(item, dict_nodes) if isinstance(item, AST) else item for item in value]
+        setattr(copy, name, value)
+    return copy
+
+
+def _reflective_walk(node):
+    # Прежний обход generic_visit: dir() и getattr по каждому открытому атрибуту.
+    count = 1
+    for attr_name in dir(node):
+        if not attr_name.startswith('_'):
+            attr_value = getattr(node, attr_name)
+            if isinstance(attr_value, _DictAST):
+                count += _reflective_walk(attr_value)
+            elif isinstance(attr_value, list):
+                for item in attr_value:
+                    if isinstance(item, _DictAST):
+                        count += _reflective_walk(item)
+    return count
+
+
+def bench_ast(source):
+    tree = Parser(LEXER_ENGINES['regex'](source)).parse()
+    node_count = count_nodes(tree)
+    print(f"AST: {node_count} узлов")
+    for name, dict_nodes in [('dict', True), ('slots', False)]:
+        retained, _ = _retained_bytes(lambda: _copy_tree(tree, dict_nodes))
+        print(f"  {name:>8}: {retained / node_count:.1f} байт/узел")
+    dict_tree = _copy_tree(tree, True)
+    elapsed, _ = _timed(lambda: _reflective_walk(dict_tree))
+    print(f"  {'dir()':>8}: обход {elapsed:.3f} с")
+    elapsed, _ = _timed(lambda: sum(1 for _ in preorder(tree)))
+    print(f"  {'schema':>8}: обход {elapsed:.3f} с")
+
+
+def bench_cache(source):
+    parse_elapsed, tree = _timed(lambda: Parser(LEXER_ENGINES['regex'](source)).parse())
+    dump_elapsed, data = _timed(lambda: dump_ast(tree))
+    load_elapsed, _ = _timed(lambda: load_ast(data, LineIndex(source)))
+    print(f"Кэш AST: {len(data)} байт для {len(source)} символов исходника")
+    print(f"  {'parse':>8}: {parse_elapsed:.3f} с")
+    print(f"  {'dump':>8}: {dump_elapsed:.3f} с")
+    print(f"  {'load':>8}: {load_elapsed:.3f} с ({parse_elapsed / load_elapsed:.1f}x быстрее разбора)")
+    with tempfile.TemporaryDirectory() as directory:
+        parse_cache = ParseCache(directory)
+        parse_cache.store(source, tree)
+        cached_elapsed, _ = _timed(lambda: parse_cache.load(source))
+        print(f"  {'cache':>8}: {cached_elapsed:.3f} с (хеш, чтение файла и загрузка)")
+
+
+def _three_pass(source):
+    tree = Parser(LEXER_ENGINES['regex'](source)).parse()
+    SemanticAnalyzer().analyze(tree)
+    return IRGenerator().generate(ConstantFolder().fold(tree))
+
+
+def bench_single_pass(source):
+    source = generate_checked_program()
+    token_count = _count_tokens(LEXER_ENGINES['regex'](source))
+    print(f"Однопроходный фронтенд: {token_count} токенов")
+    # IRGenerator печатает отладочные строки на каждую инструкцию: вывод уходит в devnull.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results = []
+        for name, run in [('3-pass', lambda: _three_pass(source)),
+                          ('1-pass', lambda: SinglePassFrontEnd(LEXER_ENGINES['regex'](source)).parse())]:
+            elapsed, code = _timed(run)
+            peak, _ = _peak_bytes(run)
+            results.append((name, elapsed, peak, len(code)))
+    for name, elapsed, peak, instruction_count in results:
+        print(f"  {name:>8}: {elapsed:.3f} с, пик памяти {peak / 1024:,.0f} КБ, {instruction_count} инструкций IR")
+
+
+def bench_folding(source):
+    source = generate_constant_program()
+    print(f"Свёртка констант: {source.count(chr(10))} строк")
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results = []
+        for name, fold in [('ir', False), ('ast', True)]:
+            tree = Parser(LEXER_ENGINES['regex'](source)).parse()
+            SemanticAnalyzer().analyze(tree)
+            fold_elapsed = 0.0
+            if fold:
+                start = time.perf_counter()
+                tree = ConstantFolder().fold(tree)
+                fold_elapsed = time.perf_counter() - start
+            generate_elapsed, code = _timed(lambda: IRGenerator().generate(tree), repeat=1)
+            optimize_elapsed, optimized = _timed(lambda: Optimizer(list(code)).optimize(), repeat=1)
+            results.append((name, fold_elapsed, generate_elapsed, len(code), optimize_elapsed, len(optimized)))
+    for name, fold_elapsed, generate_elapsed, code_size, optimize_elapsed, optimized_size in results:
+        print(f"  {name:>8}: свёртка {fold_elapsed:.3f} с, IR {code_size} инструкций за {generate_elapsed:.3f} с, "
+              f"оптимизатор {optimize_elapsed:.3f} с -> {optimized_size} инструкций")
+
+
+def bench_expressions(source):
+    source = generate_expression_program()
+    token_count = _count_tokens(LEXER_ENGINES['regex'](source))
+    print(f"Выражения: {token_count} токенов")
+    tokens = _collect_tokens(source)
+    for name, parser_class in [('chain', _ChainParser), ('pratt', Parser)]:
+        # Сборщик мусора отключается на время замера: иначе он срабатывает в случайном из двух парсеров.
+        gc.collect()
+        gc.disable()
+        try:
+            elapsed, _ = _timed(lambda: parser_class(iter(tokens)).parse(), repeat=5)
+        finally:
+            gc.enable()
+        print(f"  {name:>8}: {elapsed:.3f} с, {token_count / elapsed:,.0f} токенов/с")
+
+
+def bench_table(source):
+    expression_source = generate_expression_program()
+    elapsed, _ = _timed(compile_parse_table, repeat=1)
+    print(f"Табличный парсер (таблица из gramma.txt готова за {elapsed:.3f} с):")
+    for label, text in [('программа', source), ('выражения', expression_source)]:
+        tokens = _collect_tokens(text)
+        printer = ASTPrinter()
+        trees = []
+        for name, parser_class in [('pratt', Parser), ('table', TableParser)]:
+            gc.collect()
+            gc.disable()
+            try:
+                elapsed, tree = _timed(lambda: parser_class(iter(tokens)).parse(), repeat=5)
+            finally:
+                gc.enable()
+            trees.append(printer.get_representation(tree))
+            print(f"  {label:>10} {name:>6}: {elapsed:.3f} с, {len(tokens) / elapsed:,.0f} токенов/с")
+        print(f"  {label:>10}: AST {'совпадает' if trees[0] == trees[1] else 'РАЗЛИЧАЕТСЯ'}")
+    # Сверка диагностики: в программе удаляется, вставляется или заменяется один токен,
+    # сообщение TableParser (текст и позиция) должно совпасть с сообщением Parser.
+    tokens = _collect_tokens(source)
+    rng = random.Random(1)
+    errors = mismatched = 0
+    for _ in range(300):
+        mutated = list(tokens)
+        index = rng.randrange(len(mutated) - 1)
+        choice = rng.random()
+        if choice < 0.4:
+            del mutated[index]
+        elif choice < 0.7:
+            mutated.insert(index, tokens[rng.randrange(len(tokens) - 1)])
+        else:
+            mutated[index] = tokens[rng.randrange(len(tokens) - 1)]
+        messages = []
+        for parser_class in (Parser, TableParser):
+            try:
+                parser_class(iter(mutated)).parse()
+                messages.append(None)
+            except ParserError as e:
+                messages.append(str(e))
+        if messages[0] is not None or messages[1] is not None:
+            errors += 1
+            mismatched += messages[0] != messages[1]
+    print(f"  ошибки: {errors} программ с синтаксической ошибкой, сообщение отличается от Parser в {mismatched}")
+
+
+def _noop_visit(self, node):
+    return None
+
+
+_NOOP_VISITORS = {'visit_' + cls.__name__: _noop_visit for cls in AST.__subclasses__()}
+
+
+class _GetattrVisitor:
+    # Прежняя диспетчеризация: строка 'visit_' + имя класса и getattr на каждом узле.
+    def visit(self, node):
+        method_name = 'visit_' + type(node).__name__
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        return None
+
+
+for _name, _method in _NOOP_VISITORS.items():
+    setattr(_GetattrVisitor, _name, _method)
+
+
+class _TableVisitor(NodeVisitor):
+    def generic_visit(self, node):
+        return None
+
+
+for _name, _method in _NOOP_VISITORS.items():
+    setattr(_TableVisitor, _name, _method)
+
+
+def bench_dispatch(source):
+    tree = Parser(LEXER_ENGINES['regex'](source)).parse()
+    nodes = list(preorder(tree))
+    print(f"Диспетчеризация visit: {len(nodes)} узлов")
+
+    def direct(visitor):
+        for node in nodes:
+            _noop_visit(visitor, node)
+
+    def dispatched(visitor):
+        visit = visitor.visit
+        for node in nodes:
+            visit(node)
+
+    base_elapsed, _ = _timed(lambda: direct(None), repeat=5)
+    print(f"  {'call':>8}: {base_elapsed / len(nodes) * 1e9:.0f} нс/узел (прямой вызов метода, без поиска)")
+    for name, visitor in [('getattr', _GetattrVisitor()), ('table', _TableVisitor())]:
+        elapsed, _ = _timed(lambda: dispatched(visitor), repeat=5)
+        overhead = (elapsed - base_elapsed) / len(nodes) * 1e9
+        print(f"  {name:>8}: {elapsed / len(nodes) * 1e9:.0f} нс/узел, из них диспетчеризация {overhead:.0f} нс")
+    checked_tree = Parser(LEXER_ENGINES['regex'](generate_checked_program())).parse()
+    for name, walk in [('semantic', lambda: SemanticAnalyzer().analyze(checked_tree)),
+                       ('ir', lambda: IRGenerator().generate(checked_tree)),
+                       ('printer', lambda: ASTPrinter().get_representation(checked_tree))]:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            elapsed, _ = _timed(walk)
+        print(f"  {name:>8}: {elapsed:.3f} с на всё дерево")
+
+
+def bench_nasm(source):
+    # Время генерации NASM должно расти линейно с размером IR.
+    print("Генерация NASM:")
+    for procedures in (25, 50, 100, 200):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            ir_code = _three_pass(generate_checked_program(procedures=procedures))
+        elapsed, _ = _timed(lambda: NASMGenerator(ir_code).generate())
+        print(f"  {procedures:>8} процедур: {len(ir_code)} инструкций IR, {elapsed:.3f} с, "
+              f"{elapsed / len(ir_code) * 1e6:.1f} мкс/инструкция")
+
+
+def _sequential_back_end(tree):
+    SemanticAnalyzer().analyze(tree)
+    tree = ConstantFolder().fold(tree)
+    optimized_ir_code = Optimizer(IRGenerator().generate(tree)).optimize()
+    return NASMGenerator(optimized_ir_code).generate()
+
+
+def bench_units(source):
+    # Проверка, IR, оптимизация и NASM по процедурам; результат должен совпасть с последовательным.
+    max_workers = os.cpu_count() or 1
+    checked_source = generate_checked_program(procedures=400)
+    tree_data = dump_ast(Parser(LEXER_ENGINES['regex'](checked_source)).parse())
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        elapsed, nasm_code = _timed(lambda: _sequential_back_end(load_ast(tree_data)), repeat=1)
+    print(f"Компиляция по единицам (процедурам): 400 процедур, ядер: {max_workers}")
+    print(f"  {'seq':>8}: {elapsed:.3f} с")
+    for workers in sorted({1, 2, 4, max_workers}):
+        with ProcessPoolExecutor(max_workers=workers) as executor, \
+                open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            # Пул запускается заранее, чтобы не учитывать старт процессов.
+            list(executor.map(abs, range(workers)))
+
+            def compile_units():
+                unit_compiler = ParallelCompiler(load_ast(tree_data), workers=workers, executor=executor)
+                unit_compiler.compile()
+                return unit_compiler
+            parallel_elapsed, unit_compiler = _timed(compile_units, repeat=1)
+        same = "совпадает" if unit_compiler.nasm_code == nasm_code else "ОТЛИЧАЕТСЯ"
+        print(f"  {workers:>8}: {parallel_elapsed:.3f} с (x{elapsed / parallel_elapsed:.2f}), NASM {same}")
+
+
+def bench_bytecode(source):
+    # Память IR в объектах и в массивах IRBytecode, преобразование туда и обратно, проход по коду.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        ir_code = _three_pass(generate_checked_program(procedures=100))
+    bytecode = IRBytecode.from_ir(ir_code)
+    object_bytes, decoded = _retained_bytes(bytecode.to_ir)
+    bytecode_bytes, _ = _retained_bytes(lambda: IRBytecode.from_ir(decoded))
+    count = len(ir_code)
+    print(f"Байт-код IR: {count} инструкций")
+    print(f"  {'objects':>8}: {object_bytes / count:.1f} байт/инструкция")
+    print(f"  {'bytecode':>8}: {bytecode_bytes / count:.1f} байт/инструкция (массивы: {bytecode.nbytes() / count:.1f})")
+    encode_elapsed, _ = _timed(lambda: IRBytecode.from_ir(ir_code))
+    decode_elapsed, _ = _timed(bytecode.to_ir)
+    print(f"  кодирование {encode_elapsed:.3f} с, декодирование {decode_elapsed:.3f} с")
+    objects_elapsed, object_calls = _timed(lambda: sum(1 for instr in ir_code if isinstance(instr, Call)))
+    ops = bytecode.ops
+    bytecode_elapsed, bytecode_calls = _timed(lambda: sum(1 for head in ops if head & OPCODE_MASK == OP_CALL))
+    print(f"  подсчёт CALL: объекты {objects_elapsed * 1000:.2f} мс, байт-код {bytecode_elapsed * 1000:.2f} мс "
+          f"({object_calls == bytecode_calls and 'совпадает' or 'ОТЛИЧАЕТСЯ'})")
+
+
+def bench_pir(source):
+    # Повторный запуск неизменной программы: полная компиляция до оптимизированного IR против загрузки .pir.
+    checked_source = generate_checked_program(procedures=100)
+
+    def compile_source():
+        return Optimizer(_three_pass(checked_source)).optimize()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        compile_elapsed, optimized_ir_code = _timed(compile_source, repeat=1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'program.pir')
+        write_elapsed, _ = _timed(lambda: write_ir_file(path, optimized_ir_code))
+
+        def load_only():
+            with load_ir_file(path) as ir_file:
+                return len(ir_file)
+
+        def load_decoded():
+            with load_ir_file(path) as ir_file:
+                return ir_file.to_ir()
+
+        map_elapsed, _ = _timed(load_only)
+        decode_elapsed, decoded = _timed(load_decoded)
+        size = os.path.getsize(path)
+    same = [str(instr) for instr in decoded] == [str(instr) for instr in optimized_ir_code]
+    print(f"Файл IR (.pir): {len(optimized_ir_code)} инструкций, {size} байт")
+    print(f"  {'compile':>8}: {compile_elapsed:.3f} с")
+    print(f"  {'write':>8}: {write_elapsed:.3f} с")
+    print(f"  {'mmap':>8}: {map_elapsed * 1000:.2f} мс")
+    print(f"  {'to_ir':>8}: {decode_elapsed:.3f} с ({'совпадает' if same else 'ОТЛИЧАЕТСЯ'})")
+
+
+def bench_nesting(source):
+    print("Глубокая вложенность:")
+    for depth in (100, 1000, 10000, 100000):
+        nested_source = generate_nested_program(depth)
+        results = []
+        for name, parser_class in [('recursive', Parser), ('iterative', IterativeParser)]:
+            try:
+                elapsed, _ = _timed(lambda: parser_class(LEXER_ENGINES['regex'](nested_source)).parse(), repeat=1)
+                results.append(f"{name} {elapsed:.3f} с")
+            except RecursionError:
+                results.append(f"{name} RecursionError")
+        print(f"  {depth:>8}: " + ", ".join(results))
+
+
+BENCHMARKS = {
+    'lexer': bench_lexer,
+    'parser': bench_parser,
+    'tokens': bench_token_memory,
+    'stream': bench_stream,
+    'parallel': bench_parallel,
+    'incremental': bench_incremental,
+    'reparse': bench_reparse,
+    'ast': bench_ast,
+    'cache': bench_cache,
+    'singlepass': bench_single_pass,
+    'folding': bench_folding,
+    'expressions': bench_expressions,
+    'table': bench_table,
+    'nesting': bench_nesting,
+    'dispatch': bench_dispatch,
+    'nasm': bench_nasm,
+    'units': bench_units,
+    'bytecode': bench_bytecode,
+    'pir': bench_pir,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Неизвестные бенчмарки: {', '.join(unknown)}. Доступны: {', '.join(BENCHMARKS)}", file=sys.stderr)
+        sys.exit(1)
+    source_text = generate_program()
+    for name in names:
+        BENCHMARKS[name](source_text)
@@ -0,0 +1,148 @@
+# call_graph.py
+from intermediate_rep import *
+
+# Граф вызовов по инструкциям CALL и сводки побочных эффектов процедур (MOD/REF).
+# Сводка учитывает все процедуры, вызываемые транзитивно, в том числе рекурсивно.
+# Переменные различаются по адресу (уровень, ячейка): вызов процедуры уровня L подменяет
+# кадр уровня L (и кадры её вложенных вызовов), поэтому вызывающему видны только обращения
+# к переменным уровней меньше L - глобальным (уровень 0) и переменным охватывающих процедур.
+
+class ProcedureSummary:
+    def __init__(self, name, level):
+        self.name = name
+        self.level = level
+        # Адрес -> имя переменной вне собственного кадра процедуры.
+        self.reads = {}
+        self.writes = {}
+        self.does_read = False
+        self.does_write = False
+        self.calls = set()
+        # Переменная без адреса (IR без семантического анализа), вызов неизвестной процедуры
+        # или одноимённые процедуры: эффект вызова неизвестен, считается, что он меняет всё.
+        self.unknown = False
+
+    @property
+    def global_reads(self):
+        return {name for (level, _), name in self.reads.items() if level == 0}
+
+    @property
+    def global_writes(self):
+        return {name for (level, _), name in self.writes.items() if level == 0}
+
+    @property
+    def is_pure(self):
+        return not self.unknown and not self.writes and not self.does_read and not self.does_write
+
+    def may_read(self, address):
+        return self.unknown or address is None or address in self.reads
+
+    def may_write(self, address):
+        return self.unknown or address is None or address in self.writes
+
+    def _visible_to(self, level, addresses):
+        if level is None:
+            return dict(addresses)
+        return {address: name for address, name in addresses.items() if address[0] < level}
+
+    def _merge_callee(self, callee):
+        changed = False
+        if callee.unknown and not self.unknown:
+            self.unknown = changed = True
+        if callee.does_read and not self.does_read:
+            self.does_read = changed = True
+        if callee.does_write and not self.does_write:
+            self.does_write = changed = True
+        for own, callee_addresses in ((self.reads, callee.reads), (self.writes, callee.writes)):
+            for address, name in self._visible_to(self.level, callee_addresses).items():
+                if address not in own:
+                    own[address] = name
+                    changed = True
+        return changed
+
+    def __str__(self):
+        if self.unknown:
+            return f"{self.name}: unknown"
+        io = ''.join(('R' if self.does_read else '-', 'W' if self.does_write else '-'))
+        reads = ', '.join(sorted(self.reads.values()))
+        writes = ', '.join(sorted(self.writes.values()))
+        return f"{self.name}: REF [{reads}] MOD [{writes}] IO {io} CALLS [{', '.join(sorted(self.calls))}]"
+
+    __repr__ = __str__
+
+class CallGraph:
+    def __init__(self, ir_code):
+        self.procedures = {}
+        self.callers = {}
+        self._build(ir_code)
+        self._propagate()
+
+    def summary(self, proc_name):
+        # None - процедура не найдена в IR: вызов считается меняющим всё.
+        return self.procedures.get(proc_name)
+
+    def call_may_read(self, call_instr, address):
+        summary = self.procedures.get(call_instr.proc_name)
+        return summary is None or summary.may_read(address)
+
+    def call_may_write(self, call_instr, address):
+        summary = self.procedures.get(call_instr.proc_name)
+        return summary is None or summary.may_write(address)
+
+    def _build(self, ir_code):
+        current = None
+        for instr in ir_code:
+            if isinstance(instr, EnterProc):
+                current = self.procedures.get(instr.proc_name)
+                if current is not None:
+                    current.unknown = True
+                else:
+                    current = self.procedures[instr.proc_name] = ProcedureSummary(instr.proc_name, instr.level)
+                continue
+            if current is None:
+                continue
+            if isinstance(instr, ExitProc):
+                current = None
+                continue
+            for operand in read_operands(instr):
+                if isinstance(operand, Var):
+                    self._access(current, current.reads, operand.address, operand.name)
+            if isinstance(instr, LoadVar):
+                self._access(current, current.reads, instr.address, instr.source)
+            elif isinstance(instr, StoreVar):
+                self._access(current, current.writes, instr.address, instr.target)
+            elif isinstance(instr, ReadIR):
+                self._access(current, current.writes, instr.address, instr.target_var)
+                current.does_read = True
+            elif isinstance(instr, WriteIR):
+                current.does_write = True
+            elif isinstance(instr, Call):
+                current.calls.add(instr.proc_name)
+                self.callers.setdefault(instr.proc_name, set()).add(current.name)
+
+    def _access(self, summary, accesses, address, name):
+        if address is None or summary.level is None:
+            summary.unknown = True
+        elif address[0] < summary.level:
+            accesses[address] = name
+
+    def _propagate(self):
+        # Сводка вызывающей процедуры пересчитывается, пока меняются сводки вызываемых.
+        worklist = list(self.procedures)
+        queued = set(worklist)
+        while worklist:
+            name = worklist.pop()
+            queued.discard(name)
+            summary = self.procedures[name]
+            changed = False
+            for callee_name in summary.calls:
+                callee = self.procedures.get(callee_name)
+                if callee is None:
+                    if not summary.unknown:
+                        summary.unknown = changed = True
+                elif callee is not summary and summary._merge_callee(callee):
+                    changed = True
+            if changed:
+                for caller in self.callers.get(name, ()):
+                    if caller in self.procedures and caller not in queued:
+                        queued.add(caller)
+                        worklist.append(caller)
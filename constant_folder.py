@@ -0,0 +1,106 @@
+# constant_folder.py
+from ast_nodes import *
+from ast_walker import NodeTransformer, postorder
+from symbol_table import ConstSymbol
+from lexer import *
+
+# Свёртка выполняется после семантического анализа: типы узлов уже проверены,
+# значения вычисляются так же, как их вычислил бы интерпретатор (сравнения, AND, OR
+# и NOT дают bool). Выражение, которое упало бы во время выполнения (деление на ноль),
+# не сворачивается - ошибку по-прежнему выдаст интерпретатор.
+
+NOT_CONSTANT = object()
+
+_NUMBERS = (int, float)
+
+def _binary_value(op_type, left, right):
+    if left is NOT_CONSTANT or right is NOT_CONSTANT:
+        return NOT_CONSTANT
+    numeric = isinstance(left, _NUMBERS) and isinstance(right, _NUMBERS)
+    if op_type == T_PLUS:
+        if numeric or (isinstance(left, str) and isinstance(right, str)):
+            return left + right
+    elif op_type == T_MINUS:
+        if numeric:
+            return left - right
+    elif op_type == T_MUL:
+        if numeric:
+            return left * right
+    elif op_type == T_REAL_DIV:
+        if numeric and right != 0:
+            return float(left) / float(right)
+    elif op_type == T_DIV:
+        if isinstance(left, int) and isinstance(right, int) and right != 0:
+            return left // right
+    elif op_type == T_EQUAL: return left == right
+    elif op_type == T_NOT_EQUAL: return left != right
+    elif op_type in (T_LESS_THAN, T_LESS_EQUAL, T_GREATER_THAN, T_GREATER_EQUAL):
+        if numeric or (isinstance(left, str) and isinstance(right, str)):
+            if op_type == T_LESS_THAN: return left < right
+            if op_type == T_LESS_EQUAL: return left <= right
+            if op_type == T_GREATER_THAN: return left > right
+            return left >= right
+    elif op_type == T_AND: return bool(left) and bool(right)
+    elif op_type == T_OR: return bool(left) or bool(right)
+    return NOT_CONSTANT
+
+def _unary_value(op_type, operand):
+    if operand is NOT_CONSTANT:
+        return NOT_CONSTANT
+    if op_type == T_MINUS:
+        if isinstance(operand, _NUMBERS): return -operand
+    elif op_type == T_PLUS:
+        if isinstance(operand, _NUMBERS): return +operand
+    elif op_type == T_NOT:
+        return not bool(operand)
+    return NOT_CONSTANT
+
+def literal_value(node):
+    # Значение литерала или ссылки на константу, иначе NOT_CONSTANT.
+    if isinstance(node, (Num, StringLiteral)):
+        return node.value
+    if isinstance(node, Variable) and isinstance(node.symbol, ConstSymbol):
+        return node.symbol.value
+    return NOT_CONSTANT
+
+def constant_value(node):
+    # Значение всего выражения без изменения дерева (для CONST N = 10*1024).
+    values = {}
+    for item in postorder(node):
+        if isinstance(item, BinOp):
+            value = _binary_value(item.op.type, values[id(item.left)], values[id(item.right)])
+        elif isinstance(item, UnaryOp):
+            value = _unary_value(item.op.type, values[id(item.expr)])
+        else:
+            value = literal_value(item)
+        values[id(item)] = value
+    return values[id(node)]
+
+def make_literal(value, token, node_type=None):
+    if isinstance(value, str):
+        node = StringLiteral(Token(T_STRING_LITERAL, value, token.offset, token.lines))
+    else:
+        node = Num(Token(T_REAL_CONST if isinstance(value, float) else T_INTEGER_CONST, value, token.offset, token.lines))
+    node.node_type = node_type
+    return node
+
+class ConstantFolder(NodeTransformer):
+    # Заменяет константные подвыражения литералами: IRGenerator получает один операнд Imm
+    # вместо цепочки BinOpIR, и оптимизатору нечего досворачивать.
+    def __init__(self):
+        self.folded = 0
+
+    def fold(self, tree):
+        return self.transform(tree)
+
+    def _replace(self, node, value):
+        if value is NOT_CONSTANT:
+            return node
+        self.folded += 1
+        return make_literal(value, node.op, node.node_type)
+
+    def transform_BinOp(self, node):
+        return self._replace(node, _binary_value(node.op.type, literal_value(node.left), literal_value(node.right)))
+
+    def transform_UnaryOp(self, node):
+        return self._replace(node, _unary_value(node.op.type, literal_value(node.expr)))
@@ -6,7 +6,7 @@ import traceback
 import queue
 import sys
 import os
-from main_logic import compile_and_run_pascal
+from main_logic import compile_and_run_pascal_file
 
 class CompilerApp:
     def __init__(self, root):
@@ -16,6 +16,7 @@ class CompilerApp:
 
         self.input_request_queue = queue.Queue()
         self.input_response_queue = queue.Queue()
+        self.incremental_parsers = {}
 
         tk.Label(root, text="Файл с исходным кодом (.pas):").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         self.source_file_entry = tk.Entry(root, width=70)
@@ -204,14 +205,12 @@ class CompilerApp:
 
     def compile_in_background(self, source_path, interpreter_output_path, exe_output_path, input_provider_func_ref):
         try:
-            with open(source_path, 'r', encoding='utf-8') as f:
-                source_code = f.read()
-
-            compiler_logs, interpreter_success, exe_success = compile_and_run_pascal(
-                source_code,
+            compiler_logs, interpreter_success, exe_success = compile_and_run_pascal_file(
+                source_path,
                 interpreter_output_path,
                 exe_output_path,
-                gui_input_provider=input_provider_func_ref
+                gui_input_provider=input_provider_func_ref,
+                incremental_parsers=self.incremental_parsers
             )
 
             self._safe_gui_update(self.update_log, "--- Лог компилятора, интерпретатора и генерации EXE ---")
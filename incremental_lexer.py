@@ -0,0 +1,220 @@
+# incremental_lexer.py
+from array import array
+from bisect import bisect_left, bisect_right
+
+from lexer import (Lexer, Token, LineIndex, MASTER_PATTERN, TRAILING_TRIVIA_PATTERN,
+                   RESERVED_KEYWORDS, OPERATOR_TOKENS, decode_string_literal,
+                   T_EOF, T_ID, T_INTEGER_CONST, T_REAL_CONST, T_STRING_LITERAL)
+from token_stream import TokenStream
+
+# Токен может зависеть от двух символов после своего конца ("1." + цифра),
+# поэтому перезапуск идёт с токена, который кончается не ближе двух символов до правки.
+_LOOKAHEAD_RESERVE = 2
+
+def _fallback_token(text, pos, lines):
+    lexer = Lexer(text, lines)
+    lexer.pos = pos
+    lexer.current_char = text[pos]
+    token = lexer._get_token_logic()
+    return token, lexer.pos
+
+def scan_tokens(text, lines, pos=0):
+    # Выдаёт (тип, значение, начало, конец) начиная с границы токенов pos.
+    keywords = RESERVED_KEYWORDS
+    operators = OPERATOR_TOKENS
+    while True:
+        m = MASTER_PATTERN.match(text, pos)
+        if m is None:
+            if TRAILING_TRIVIA_PATTERN.match(text, pos):
+                yield T_EOF, None, len(text), len(text)
+                return
+            token, end = _fallback_token(text, pos, lines)
+            if token.type == T_EOF:
+                yield T_EOF, None, len(text), len(text)
+                return
+            yield token.type, token.value, token.offset, end
+        else:
+            kind = m.lastindex
+            start, end = m.span(kind)
+            if kind == 1:
+                lexeme = m.group(1)
+                keyword_type = keywords.get(lexeme.upper())
+                if keyword_type:
+                    yield keyword_type, keyword_type, start, end
+                else:
+                    yield T_ID, lexeme, start, end
+            elif kind == 5:
+                lexeme = m.group(5)
+                yield operators[lexeme], lexeme, start, end
+            elif kind == 3:
+                yield T_INTEGER_CONST, int(m.group(3)), start, end
+            elif kind == 2:
+                yield T_REAL_CONST, float(m.group(2)), start, end
+            else:
+                yield T_STRING_LITERAL, decode_string_literal(m.group(4)[1:-1]), start, end
+        pos = end
+
+def diff_texts(old_text, new_text):
+    # Одна правка (смещение, длина удалённого, вставка), покрывающая все различия.
+    # Общие префикс и суффикс ищутся двоичным поиском по сравнению срезов.
+    limit = min(len(old_text), len(new_text))
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_text[:middle] == new_text[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+    low, high = 0, limit - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_text[len(old_text) - middle:] == new_text[len(new_text) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+    return prefix, len(old_text) - prefix - suffix, new_text[prefix:len(new_text) - suffix]
+
+class IncrementalLexer:
+    # Смещения токенов хранятся с "разрывом": до индекса _gap - от начала текста,
+    # начиная с _gap - от конца текста (отрицательные). Правка рядом с разрывом
+    # не требует сдвигать смещения хвоста, перенос разрыва стоит O(расстояния).
+    # Строка и столбец токенов берутся из общего индекса строк, который правится вместе с текстом.
+    def __init__(self, text):
+        self.text = text
+        self.lines = LineIndex(text)
+        self.types = []
+        self.values = []
+        self._starts = array('i')
+        self._ends = array('i')
+        self._gap = 0
+        self.error = None
+        self._collect(scan_tokens(text, self.lines), self.types, self.values, self._starts, self._ends)
+        self._gap = len(self.types)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __str__(self):
+        return f"IncrementalLexer(tokens={len(self.types)}, error={self.error!r})"
+
+    __repr__ = __str__
+
+    def start(self, index):
+        offset = self._starts[index]
+        return offset if index < self._gap else offset + len(self.text)
+
+    def end(self, index):
+        offset = self._ends[index]
+        return offset if index < self._gap else offset + len(self.text)
+
+    def token(self, index, lines=None):
+        return Token(self.types[index], self.values[index], self.start(index), self.lines if lines is None else lines)
+
+    def index(self, offset):
+        # Индекс первого токена, начинающегося не раньше offset.
+        gap = self._gap
+        if gap and self._starts[gap - 1] >= offset:
+            return bisect_left(self._starts, offset, 0, gap)
+        return bisect_left(self._starts, offset - len(self.text), gap)
+
+    def tokens(self):
+        return [self.token(index) for index in range(len(self.types))]
+
+    def _collect(self, scanner, types, values, starts, ends, resync=None, base=0):
+        try:
+            for token_type, value, start, end in scanner:
+                if resync is not None and resync(token_type, value, start, end):
+                    return True
+                types.append(token_type)
+                values.append(value)
+                starts.append(start - base)
+                ends.append(end - base)
+        except Exception as e:
+            self.error = e
+        return False
+
+    def _move_gap(self, index):
+        length = len(self.text)
+        gap = self._gap
+        if index < gap:
+            self._starts[index:gap] = array('i', [offset - length for offset in self._starts[index:gap]])
+            self._ends[index:gap] = array('i', [offset - length for offset in self._ends[index:gap]])
+        elif index > gap:
+            self._starts[gap:index] = array('i', [offset + length for offset in self._starts[gap:index]])
+            self._ends[gap:index] = array('i', [offset + length for offset in self._ends[gap:index]])
+        self._gap = index
+
+    def _restart_index(self, offset):
+        # Последний токен (не EOF), который правка гарантированно не затрагивает.
+        limit = offset - _LOOKAHEAD_RESERVE
+        gap = self._gap
+        if gap and self._ends[gap - 1] <= limit:
+            index = bisect_right(self._ends, limit - len(self.text), gap) - 1
+        else:
+            index = bisect_right(self._ends, limit, 0, gap) - 1
+        while index >= 0 and self.types[index] == T_EOF:
+            index -= 1
+        return index
+
+    def edit(self, offset, removed_length, inserted_text):
+        old_text = self.text
+        if offset < 0 or removed_length < 0 or offset + removed_length > len(old_text):
+            raise ValueError(f"Edit range {offset}+{removed_length} is outside the source of length {len(old_text)}")
+        text = old_text[:offset] + inserted_text + old_text[offset + removed_length:]
+        edit_end = offset + len(inserted_text)
+        restart = self._restart_index(offset)
+        first = restart + 1
+        self._move_gap(first)
+        pos = self._ends[restart] if restart >= 0 else 0
+        self.lines.edit(offset, removed_length, inserted_text)
+        types, values, starts, ends = self.types, self.values, self._starts, self._ends
+        old_error = self.error
+        self.error = None
+        matched = []
+
+        def resync(token_type, value, start, end):
+            # Совпадение с прежним токеном на той же позиции от конца текста: дальше текст и токены одинаковы.
+            if start < edit_end or token_type == T_EOF:
+                return False
+            relative_start = start - len(text)
+            old_index = bisect_left(starts, relative_start, first)
+            if (old_index < len(types) and starts[old_index] == relative_start
+                    and ends[old_index] == end - len(text)
+                    and types[old_index] == token_type and values[old_index] == value):
+                matched.append(old_index)
+                return True
+            return False
+
+        new_types = []
+        new_values = []
+        new_starts = array('i')
+        new_ends = array('i')
+        # После ошибки хвоста нет, и сообщение ссылается на старые координаты: разбираем до конца.
+        resynced = self._collect(scan_tokens(text, self.lines, pos), new_types, new_values, new_starts, new_ends,
+                                 resync if old_error is None else None, len(text))
+        if resynced:
+            resync_index = matched[0]
+            self.error = old_error
+        else:
+            resync_index = len(types)
+        types[first:resync_index] = new_types
+        values[first:resync_index] = new_values
+        starts[first:resync_index] = new_starts
+        ends[first:resync_index] = new_ends
+        self.text = text
+        return self.stream(), (first, resync_index, first + len(new_types))
+
+    def update(self, new_text):
+        offset, removed_length, inserted_text = diff_texts(self.text, new_text)
+        return self.edit(offset, removed_length, inserted_text)
+
+    def _iter_tokens(self, start, lines):
+        for index in range(start, len(self.types)):
+            yield self.token(index, lines)
+        if self.error is not None:
+            raise self.error
+
+    def stream(self, start=0, lines=None):
+        return TokenStream(self._iter_tokens(start, lines))
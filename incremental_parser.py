@@ -0,0 +1,169 @@
+# incremental_parser.py
+from ast_nodes import CompoundStatement, ProcedureDecl, If, While, Block
+from incremental_lexer import IncrementalLexer, diff_texts
+from parser import create_parser, DEFAULT_PARSER_MODE
+
+class EditedLineIndex:
+    # Индекс строк для токенов, разобранных до последующих правок: смещение токена
+    # пересчитывается через журнал правок, строка и столбец берутся из общего индекса.
+    # Так переиспользуемые поддеревья не нужно обходить после каждой правки.
+    def __init__(self, lines, history, start):
+        self.lines = lines
+        self.history = history
+        self.start = start
+
+    def offset(self, offset):
+        history = self.history
+        for index in range(self.start, len(history)):
+            edit_offset, removed_length, inserted_length = history[index]
+            if offset >= edit_offset + removed_length:
+                offset += inserted_length - removed_length
+            elif offset > edit_offset:
+                offset = edit_offset
+        return offset
+
+    def line(self, offset):
+        return self.lines.line(self.offset(offset))
+
+    def column(self, offset):
+        return self.lines.column(self.offset(offset))
+
+    def eof_column(self, offset):
+        return self.lines.eof_column(self.offset(offset))
+
+class IncrementalParser:
+    # После правки переразбирается наименьший охватывающий её ProcedureDecl или
+    # CompoundStatement, новый узел встаёт на место старого в прежнем Program.
+    # Остальные поддеревья (вместе с их семантическими пометками) остаются теми же объектами.
+    def __init__(self, text, parser_mode=DEFAULT_PARSER_MODE):
+        self.lexer = IncrementalLexer(text)
+        self.parser_mode = parser_mode
+        self.tree = None
+        self.reparsed = None
+        self._history = []
+
+    @property
+    def text(self):
+        return self.lexer.text
+
+    def __str__(self):
+        return f"IncrementalParser(tokens={len(self.lexer)}, edits={len(self._history)}, reparsed={type(self.reparsed).__name__})"
+
+    __repr__ = __str__
+
+    def parse(self):
+        if self.tree is None:
+            return self._parse_all()
+        return self.tree
+
+    def _parse_all(self):
+        self.tree = None
+        self._history = []
+        lines = EditedLineIndex(self.lexer.lines, self._history, 0)
+        parser = create_parser(self.lexer.stream(0, lines), self.parser_mode)
+        self.tree = parser.parse()
+        self.reparsed = self.tree
+        return self.tree
+
+    def _offset(self, token):
+        return token.lines.offset(token.offset)
+
+    def _contains(self, node, offset, end):
+        # Правка строго внутри узла: первый токен и токен за узлом не затронуты.
+        span = node.span
+        if span is None:
+            return False
+        return self._offset(span[0]) < offset and end < self._offset(span[1])
+
+    def _child_at(self, children, offset):
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            span = children[middle].span
+            if span is not None and self._offset(span[0]) < offset:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def _enclosing_units(self, offset, end):
+        # Цепочка (узел, контейнер, ключ) от наименьшего охватывающего узла к внешнему.
+        units = []
+        node, container, key = self.tree.block, None, None
+        while True:
+            if isinstance(node, Block):
+                declarations = node.declarations
+                for index, declaration in enumerate(declarations):
+                    if isinstance(declaration, ProcedureDecl) and self._contains(declaration, offset, end):
+                        units.append((declaration, declarations, index))
+                        node = declaration.block_node
+                        break
+                else:
+                    node, container, key = node.compound_statement, node, 'compound_statement'
+                continue
+            if not self._contains(node, offset, end):
+                break
+            if isinstance(node, CompoundStatement):
+                units.append((node, container, key))
+                index = self._child_at(node.children, offset)
+                if index < 0:
+                    break
+                node, container, key = node.children[index], node.children, index
+            elif isinstance(node, If):
+                if node.else_statement is not None and self._contains(node.else_statement, offset, end):
+                    node, container, key = node.else_statement, node, 'else_statement'
+                else:
+                    node, container, key = node.then_statement, node, 'then_statement'
+            elif isinstance(node, While):
+                node, container, key = node.body_statement, node, 'body_statement'
+            else:
+                break
+        units.reverse()
+        return units
+
+    def _token_range(self, node):
+        start, end = node.span
+        return self.lexer.index(self._offset(start)), self.lexer.index(self._offset(end))
+
+    def _reparse(self, node, start_index, end_index):
+        lines = EditedLineIndex(self.lexer.lines, self._history, len(self._history))
+        parser = create_parser(self.lexer.stream(start_index, lines), self.parser_mode)
+        try:
+            if isinstance(node, ProcedureDecl):
+                new_node = parser.procedure_declaration_part()
+            else:
+                new_node = parser.compound_statement()
+        except Exception:
+            # Ошибку покажет разбор внешнего узла или всей программы.
+            return None
+        if self.lexer.index(parser.current_token.offset) != end_index:
+            return None
+        return new_node
+
+    def edit(self, offset, removed_length, inserted_text):
+        if self.tree is None:
+            self.lexer.edit(offset, removed_length, inserted_text)
+            return self._parse_all()
+        units = [(node, container, key, self._token_range(node))
+                 for node, container, key in self._enclosing_units(offset, offset + removed_length)]
+        _, (first, old_stop, new_stop) = self.lexer.edit(offset, removed_length, inserted_text)
+        self._history.append((offset, removed_length, len(inserted_text)))
+        if self.lexer.error is None:
+            for node, container, key, (start_index, end_index) in units:
+                # Токены до first и после old_stop не изменились: узел должен охватывать всю изменённую часть.
+                if start_index >= first or end_index < old_stop:
+                    continue
+                new_node = self._reparse(node, start_index, end_index - old_stop + new_stop)
+                if new_node is None:
+                    continue
+                if isinstance(key, int):
+                    container[key] = new_node
+                else:
+                    setattr(container, key, new_node)
+                self.reparsed = new_node
+                return self.tree
+        return self._parse_all()
+
+    def update(self, new_text):
+        offset, removed_length, inserted_text = diff_texts(self.text, new_text)
+        return self.edit(offset, removed_length, inserted_text)
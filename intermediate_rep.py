@@ -1,5 +1,62 @@
 # intermediate_rep.py
 
+# Типы значений в IR. Их ставит IRGenerator по node_type из SemanticAnalyzer:
+# у LoadConst, LoadVar, BinOpIR и UnaryOpIR - тип результата (временной переменной target),
+# у StoreVar и ReadIR - тип переменной. Сравнения, AND, OR и NOT дают BOOLEAN.
+IR_INTEGER = 'INTEGER'
+IR_REAL = 'REAL'
+IR_STRING = 'STRING'
+IR_BOOLEAN = 'BOOLEAN'
+
+def value_type(value):
+    if isinstance(value, bool): return IR_BOOLEAN
+    if isinstance(value, int): return IR_INTEGER
+    if isinstance(value, float): return IR_REAL
+    if isinstance(value, str): return IR_STRING
+    return None
+
+# Операнды инструкций: имя временной переменной (строка 'tN'), непосредственная константа Imm
+# или переменная Var, читаемая прямо в инструкции, без LoadConst/LoadVar во временную.
+class Imm:
+    __slots__ = ('value',)
+    def __init__(self, value):
+        self.value = value
+    @property
+    def type(self):
+        return value_type(self.value)
+    def __eq__(self, other):
+        return type(other) is Imm and type(self.value) is type(other.value) and repr(self.value) == repr(other.value)
+    def __hash__(self):
+        return hash((type(self.value), repr(self.value)))
+    def __str__(self):
+        return repr(self.value)
+    __repr__ = __str__
+
+class Var:
+    __slots__ = ('name', 'address', 'type')
+    def __init__(self, name, address=None, type=None):
+        self.name = name
+        self.address = address
+        self.type = type
+    def __eq__(self, other):
+        return type(other) is Var and (self.name, self.address, self.type) == (other.name, other.address, other.type)
+    def __hash__(self):
+        return hash((self.name, self.address))
+    def __str__(self):
+        return self.name
+    __repr__ = __str__
+
+def read_operands(instr):
+    # Операнды, которые инструкция читает (без целей и меток).
+    if isinstance(instr, (BinOpIR, CompareJump)): return (instr.left, instr.right)
+    if isinstance(instr, StoreVar): return (instr.source,)
+    if isinstance(instr, UnaryOpIR): return (instr.operand,)
+    if isinstance(instr, (CondJump, CondJumpTrue)): return (instr.condition_var,)
+    if isinstance(instr, WriteIR): return (instr.source_var,)
+    if isinstance(instr, Call): return tuple(instr.args)
+    if isinstance(instr, Return) and instr.value_source_operand is not None: return (instr.value_source_operand,)
+    return ()
+
 class IRInstruction:
     def __str__(self):
         raise NotImplementedError
@@ -11,40 +68,49 @@ class Label(IRInstruction):
         return f"{self.name}:"
 
 class LoadConst(IRInstruction):
-    def __init__(self, target, value):
+    def __init__(self, target, value, type=None):
         self.target = target
         self.value = value
+        self.type = type if type is not None else value_type(value)
     def __str__(self):
         return f"{self.target} = {repr(self.value)}"
 
+# address у LoadVar, StoreVar и ReadIR - пара (уровень области видимости, ячейка кадра)
+# из SemanticAnalyzer; имя переменной остаётся для печати и NASM.
 class LoadVar(IRInstruction):
-    def __init__(self, target, source):
+    def __init__(self, target, source, address=None, type=None):
         self.target = target
         self.source = source
+        self.address = address
+        self.type = type
     def __str__(self):
         return f"{self.target} = {self.source}"
 
 class StoreVar(IRInstruction):
-    def __init__(self, target, source):
+    def __init__(self, target, source, address=None, type=None):
         self.target = target
         self.source = source
+        self.address = address
+        self.type = type
     def __str__(self):
         return f"{self.target} = {self.source}"
 
 class BinOpIR(IRInstruction):
-    def __init__(self, target, op, left, right):
+    def __init__(self, target, op, left, right, type=None):
         self.target = target
         self.op = op
         self.left = left
         self.right = right
+        self.type = type
     def __str__(self):
         return f"{self.target} = {self.left} {self.op} {self.right}"
 
 class UnaryOpIR(IRInstruction):
-    def __init__(self, target, op, operand):
+    def __init__(self, target, op, operand, type=None):
         self.target = target
         self.op = op
         self.operand = operand
+        self.type = type
     def __str__(self):
         return f"{self.target} = {self.op} {self.operand}"
 
@@ -61,6 +127,27 @@ class CondJump(IRInstruction):
     def __str__(self):
         return f"IF_FALSE {self.condition_var} JUMP {self.false_label_name}"
 
+class CondJumpTrue(IRInstruction):
+    # Переход, если условие истинно: ветвь OR при сокращённом вычислении AND/OR.
+    def __init__(self, condition_var, true_label_name):
+        self.condition_var = condition_var
+        self.true_label_name = true_label_name
+    def __str__(self):
+        return f"IF_TRUE {self.condition_var} JUMP {self.true_label_name}"
+
+class CompareJump(IRInstruction):
+    # Сравнение и переход одной инструкцией: IF_FALSE a < b JUMP L (jump_if=True - IF_TRUE).
+    # Результат сравнения не записывается во временную переменную.
+    def __init__(self, left, op, right, label_name, jump_if=False):
+        self.left = left
+        self.op = op
+        self.right = right
+        self.label_name = label_name
+        self.jump_if = jump_if
+    def __str__(self):
+        prefix = "IF_TRUE" if self.jump_if else "IF_FALSE"
+        return f"{prefix} {self.left} {self.op} {self.right} JUMP {self.label_name}"
+
 class Call(IRInstruction):
     def __init__(self, proc_name, args, result_target=None):
         self.proc_name = proc_name
@@ -81,8 +168,10 @@ class Return(IRInstruction):
         return f"RETURN"
 
 class ReadIR(IRInstruction):
-    def __init__(self, target_var):
+    def __init__(self, target_var, address=None, type=None):
         self.target_var = target_var
+        self.address = address
+        self.type = type
     def __str__(self):
         return f"READ {self.target_var}"
 
@@ -93,9 +182,13 @@ class WriteIR(IRInstruction):
         return f"WRITE {self.source_var}"
 
 class EnterProc(IRInstruction):
-    def __init__(self, proc_name, param_names):
+    def __init__(self, proc_name, param_names, level=None, frame_size=0, param_types=None):
         self.proc_name = proc_name
         self.param_names = param_names
+        self.param_types = param_types if param_types is not None else [None] * len(param_names)
+        # Уровень области видимости тела и число ячеек кадра; level None - переменные по именам.
+        self.level = level
+        self.frame_size = frame_size
     def __str__(self):
         params_str = ', '.join(self.param_names)
         return f"ENTER_PROC {self.proc_name}({params_str})"
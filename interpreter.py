@@ -15,6 +15,10 @@ class Interpreter:
         else:
             self.ip = entry_point + 1
         self.call_stack = []
+        # display[level] - кадр (список ячеек) самой свежей активации области этого уровня;
+        # переменные с адресом (уровень, ячейка) читаются по индексу, без поиска по имени.
+        self.global_slots = []
+        self.display = [self.global_slots]
 
     def _find_labels(self):
         labels = {}
@@ -26,6 +30,13 @@ class Interpreter:
         return labels
 
     def _get_value(self, operand_name):
+        operand_class = type(operand_name)
+        if operand_class is Imm:
+            return operand_name.value
+        if operand_class is Var:
+            if operand_name.address is not None:
+                return self._load_variable(operand_name.name, operand_name.address)
+            operand_name = operand_name.name
         if self.call_stack:
             current_frame_locals = self.call_stack[-1]['locals']
             if operand_name in current_frame_locals:
@@ -40,6 +51,23 @@ class Interpreter:
             raise InterpreterError(f"Attempting to use procedure '{operand_name}' as a variable.")
         raise InterpreterError(f"Variable or temporary '{operand_name}' not found in current scope or global memory.")
 
+    def _load_variable(self, name, address):
+        level, slot = address
+        frame = self.display[level] if level < len(self.display) else None
+        value = frame[slot] if frame is not None and slot < len(frame) else None
+        if value is None:
+            raise InterpreterError(f"Variable '{name}' (level {level}, slot {slot}) is not initialized.")
+        return value
+
+    def _store_variable(self, name, address, value):
+        level, slot = address
+        frame = self.display[level] if level < len(self.display) else None
+        if frame is None:
+            raise InterpreterError(f"No active frame of level {level} for variable '{name}'.")
+        if slot >= len(frame):
+            frame.extend([None] * (slot + 1 - len(frame)))
+        frame[slot] = value
+
     def _set_value(self, target_name, value):
         if self.call_stack:
             current_frame = self.call_stack[-1]
@@ -71,18 +99,26 @@ class Interpreter:
                 if isinstance(instruction, Label):
                     pass
                 elif isinstance(instruction, EnterProc):
-                    if self.call_stack:
-                        pass
+                    if not self.call_stack and instruction.level == 0 and len(self.global_slots) < instruction.frame_size:
+                        self.global_slots.extend([None] * (instruction.frame_size - len(self.global_slots)))
                 elif isinstance(instruction, ExitProc):
                     pass
                 elif isinstance(instruction, LoadConst):
                     self._set_value(instruction.target, instruction.value)
                 elif isinstance(instruction, LoadVar):
-                    value = self._get_value(instruction.source)
+                    if instruction.address is not None:
+                        value = self._load_variable(instruction.source, instruction.address)
+                    else:
+                        value = self._get_value(instruction.source)
                     self._set_value(instruction.target, value)
                 elif isinstance(instruction, StoreVar):
                     value_to_store = self._get_value(instruction.source)
-                    self._set_value(instruction.target, value_to_store)
+                    if instruction.type == IR_REAL and type(value_to_store) is int:
+                        value_to_store = float(value_to_store)
+                    if instruction.address is not None:
+                        self._store_variable(instruction.target, instruction.address, value_to_store)
+                    else:
+                        self._set_value(instruction.target, value_to_store)
                 elif isinstance(instruction, BinOpIR):
                     left_val = self._get_value(instruction.left)
                     right_val = self._get_value(instruction.right)
@@ -159,6 +195,30 @@ class Interpreter:
                             raise InterpreterError(f"Undefined label for CondJump: {instruction.false_label_name}")
                         self.ip = self.labels[instruction.false_label_name]
                         jumped = True
+                elif isinstance(instruction, CondJumpTrue):
+                    condition_val = self._get_value(instruction.condition_var)
+                    if bool(condition_val):
+                        if instruction.true_label_name not in self.labels:
+                            raise InterpreterError(f"Undefined label for CondJumpTrue: {instruction.true_label_name}")
+                        self.ip = self.labels[instruction.true_label_name]
+                        jumped = True
+                elif isinstance(instruction, CompareJump):
+                    left_val = self._get_value(instruction.left)
+                    right_val = self._get_value(instruction.right)
+                    op = instruction.op
+                    if op == '==': result = left_val == right_val
+                    elif op == '!=': result = left_val != right_val
+                    elif op == '<': result = left_val < right_val
+                    elif op == '<=': result = left_val <= right_val
+                    elif op == '>': result = left_val > right_val
+                    elif op == '>=': result = left_val >= right_val
+                    else:
+                        raise InterpreterError(f"Unknown comparison operator: {op}")
+                    if result == instruction.jump_if:
+                        if instruction.label_name not in self.labels:
+                            raise InterpreterError(f"Undefined label for CompareJump: {instruction.label_name}")
+                        self.ip = self.labels[instruction.label_name]
+                        jumped = True
                 elif isinstance(instruction, Call):
                     target_label = instruction.proc_name
                     target_ip = self.labels.get(target_label)
@@ -184,8 +244,19 @@ class Interpreter:
                         'entry_ip': enter_proc_instr_index,
                         'locals': {}
                     }
-                    for name, value in zip(enter_proc_instr.param_names, arg_values):
-                        new_frame['locals'][name] = value
+                    level = enter_proc_instr.level
+                    if level is None:
+                        for name, value in zip(enter_proc_instr.param_names, arg_values):
+                            new_frame['locals'][name] = value
+                    else:
+                        # Параметры - первые ячейки кадра; прежний кадр этого уровня восстановит Return.
+                        slots = arg_values + [None] * (enter_proc_instr.frame_size - len(arg_values))
+                        if level >= len(self.display):
+                            self.display.extend([None] * (level + 1 - len(self.display)))
+                        new_frame['level'] = level
+                        new_frame['saved_slots'] = self.display[level]
+                        new_frame['slots'] = slots
+                        self.display[level] = slots
 
                     self.call_stack.append(new_frame)
                     self.ip = enter_proc_instr_index
@@ -196,6 +267,8 @@ class Interpreter:
                         jumped = True
                     else:
                         frame = self.call_stack.pop()
+                        if 'level' in frame:
+                            self.display[frame['level']] = frame['saved_slots']
                         self.ip = frame['return_ip']
                         jumped = True
                 elif isinstance(instruction, ReadIR):
@@ -215,10 +288,18 @@ class Interpreter:
                         else:
                             user_input_str = input(prompt_message)
 
-                        try: value_read_for_set = int(user_input_str)
-                        except ValueError:
+                        # Тип переменной известен из IR: INTEGER читается только как целое, REAL - как вещественное.
+                        if instruction.type == IR_INTEGER:
+                            try: value_read_for_set = int(user_input_str)
+                            except ValueError: raise InterpreterError("Invalid input: Expected integer.")
+                        elif instruction.type == IR_REAL:
                             try: value_read_for_set = float(user_input_str)
-                            except ValueError: raise InterpreterError("Invalid input: Expected integer or real.")
+                            except ValueError: raise InterpreterError("Invalid input: Expected real.")
+                        else:
+                            try: value_read_for_set = int(user_input_str)
+                            except ValueError:
+                                try: value_read_for_set = float(user_input_str)
+                                except ValueError: raise InterpreterError("Invalid input: Expected integer or real.")
 
                     except  EOFError as e:
                         raise InterpreterError(f"Input stream closed or cancelled: {e}")
@@ -226,7 +307,10 @@ class Interpreter:
                         sys.stdout = current_stdout
 
                     if value_read_for_set is not None:
-                        self._set_value(instruction.target_var, value_read_for_set)
+                        if instruction.address is not None:
+                            self._store_variable(instruction.target_var, instruction.address, value_read_for_set)
+                        else:
+                            self._set_value(instruction.target_var, value_read_for_set)
 
                 elif isinstance(instruction, WriteIR):
                     value = self._get_value(instruction.source_var)
@@ -239,9 +323,10 @@ class Interpreter:
                 print(f"\nRuntime Error at IP={self.ip}, Instruction: {instruction}", file=sys.stderr)
                 print(f"Error: {e}", file=sys.stderr)
                 print("Memory:", self.memory, file=sys.stderr)
+                print("Global slots:", self.global_slots, file=sys.stderr)
                 print("Call Stack Frames (locals per frame):")
                 for i, frame_data in enumerate(self.call_stack):
-                    print(f"  Frame {i} ({frame_data.get('name', 'unknown')}): {frame_data.get('locals')}")
+                    print(f"  Frame {i} ({frame_data.get('name', 'unknown')}): {frame_data.get('locals')} slots={frame_data.get('slots')}")
                 if not self.call_stack: print("  <empty>")
                 raise
             if not jumped:
@@ -0,0 +1,288 @@
+# ir_bytecode.py
+from array import array
+
+from intermediate_rep import *
+
+class IRBytecodeError(Exception):
+    pass
+
+# Компактная форма IR: по инструкции в параллельных массивах. ops - заголовок
+# (код операции, тип результата, оператор), a/b/c - поля инструкции; списки аргументов
+# CALL и параметров ENTER_PROC лежат в extra, в поле хранится их смещение.
+# Имена, переменные (имя, адрес и тип) и константы хранятся один раз в таблицах программы.
+# Преобразование в классы intermediate_rep и обратно без потерь.
+
+OP_LABEL = 0
+OP_LOAD_CONST = 1
+OP_LOAD_VAR = 2
+OP_STORE_VAR = 3
+OP_BINOP = 4
+OP_UNARY = 5
+OP_JUMP = 6
+OP_COND_JUMP = 7
+OP_CALL = 8
+OP_RETURN = 9
+OP_READ = 10
+OP_WRITE = 11
+OP_ENTER = 12
+OP_EXIT = 13
+OP_NOOP = 14
+OP_COND_JUMP_TRUE = 15
+OP_COMPARE_JUMP = 16
+OP_COMPARE_JUMP_TRUE = 17
+
+OPCODE_MASK = 0x1F
+TYPE_SHIFT = 5
+TYPE_MASK = 0x7
+OPERATOR_SHIFT = 8
+
+_OPCODES = {Label: OP_LABEL, LoadConst: OP_LOAD_CONST, LoadVar: OP_LOAD_VAR, StoreVar: OP_STORE_VAR,
+            BinOpIR: OP_BINOP, UnaryOpIR: OP_UNARY, Jump: OP_JUMP, CondJump: OP_COND_JUMP, Call: OP_CALL,
+            Return: OP_RETURN, ReadIR: OP_READ, WriteIR: OP_WRITE, EnterProc: OP_ENTER, ExitProc: OP_EXIT,
+            NoOp: OP_NOOP, CondJumpTrue: OP_COND_JUMP_TRUE, CompareJump: OP_COMPARE_JUMP}
+
+IR_TYPES = (None, IR_INTEGER, IR_REAL, IR_STRING, IR_BOOLEAN)
+_TYPE_CODES = {type_name: code for code, type_name in enumerate(IR_TYPES)}
+
+OPERATORS = (None, '+', '-', '*', '/', 'DIV', '==', '!=', '<', '<=', '>', '>=', 'AND', 'OR', 'NOT')
+_OPERATOR_CODES = {operator: code for code, operator in enumerate(OPERATORS)}
+
+# Операнд - одно число: (значение << 3) | вид. Временная переменная tN хранится номером N,
+# остальные имена - индексом в names, Imm - индексом в constants, Var - индексом в variables.
+OPERAND_TEMP = 0
+OPERAND_NAME = 1
+OPERAND_CONST = 2
+OPERAND_VAR = 3
+OPERAND_NONE = 4
+
+OPERAND_SHIFT = 3
+OPERAND_MASK = 0x7
+
+_MAX_TEMP = (1 << 28) - 1
+
+def _is_temp(name):
+    digits = name[1:]
+    return (name[:1] == 't' and digits.isdigit() and digits.isascii() and str(int(digits)) == digits
+            and int(digits) <= _MAX_TEMP)
+
+def _constant_key(value):
+    # repr различает 1, 1.0, True и -0.0, которые равны как ключи словаря.
+    return (type(value), repr(value))
+
+class IRBytecode:
+    def __init__(self):
+        self.ops = array('H')
+        self.a = array('i')
+        self.b = array('i')
+        self.c = array('i')
+        self.extra = array('i')
+        self.names = []
+        self.variables = []
+        self.constants = []
+        self._name_index = {}
+        self._variable_index = {}
+        self._constant_index = {}
+
+    @classmethod
+    def from_ir(cls, ir_code):
+        bytecode = cls()
+        for instr in ir_code:
+            bytecode.append(instr)
+        return bytecode
+
+    @classmethod
+    def from_buffers(cls, ops, a, b, c, extra, names, variables, constants):
+        # Готовые буферы (например, memoryview над mmap файла .pir) без копирования.
+        # Индексы таблиц не строятся: такой байт-код только читается.
+        bytecode = cls()
+        bytecode.ops, bytecode.a, bytecode.b, bytecode.c, bytecode.extra = ops, a, b, c, extra
+        bytecode.names = names
+        bytecode.variables = variables
+        bytecode.constants = constants
+        return bytecode
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __str__(self):
+        return (f"IRBytecode(instructions={len(self.ops)}, names={len(self.names)}, "
+                f"variables={len(self.variables)}, constants={len(self.constants)}, bytes={self.nbytes()})")
+
+    __repr__ = __str__
+
+    def nbytes(self):
+        # Размер массивов инструкций (таблицы имён и констант не входят).
+        return sum(len(buffer) * buffer.itemsize for buffer in (self.ops, self.a, self.b, self.c, self.extra))
+
+    def name(self, name):
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def variable(self, name, address, type_name):
+        key = (name, address, type_name)
+        index = self._variable_index.get(key)
+        if index is None:
+            index = self._variable_index[key] = len(self.variables)
+            self.variables.append(key)
+        return index
+
+    def constant(self, value):
+        key = _constant_key(value)
+        index = self._constant_index.get(key)
+        if index is None:
+            index = self._constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def operand(self, value):
+        if value is None:
+            return OPERAND_NONE
+        if isinstance(value, str):
+            if _is_temp(value):
+                return int(value[1:]) << OPERAND_SHIFT | OPERAND_TEMP
+            return self.name(value) << OPERAND_SHIFT | OPERAND_NAME
+        if isinstance(value, Imm):
+            return self.constant(value.value) << OPERAND_SHIFT | OPERAND_CONST
+        if isinstance(value, Var):
+            return self.variable(value.name, value.address, value.type) << OPERAND_SHIFT | OPERAND_VAR
+        raise IRBytecodeError(f"Cannot encode IR operand {value!r}")
+
+    def operand_value(self, code):
+        kind = code & OPERAND_MASK
+        if kind == OPERAND_TEMP: return f"t{code >> OPERAND_SHIFT}"
+        if kind == OPERAND_NAME: return self.names[code >> OPERAND_SHIFT]
+        if kind == OPERAND_CONST: return Imm(self.constants[code >> OPERAND_SHIFT])
+        if kind == OPERAND_VAR: return Var(*self.variables[code >> OPERAND_SHIFT])
+        return None
+
+    def _emit(self, opcode, a=0, b=0, c=0, type_name=None, operator=None):
+        type_code = _TYPE_CODES.get(type_name)
+        operator_code = _OPERATOR_CODES.get(operator)
+        if type_code is None:
+            raise IRBytecodeError(f"Unsupported IR type: {type_name!r}")
+        if operator_code is None:
+            raise IRBytecodeError(f"Unsupported IR operator: {operator!r}")
+        self.ops.append(opcode | type_code << TYPE_SHIFT | operator_code << OPERATOR_SHIFT)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+
+    def append(self, instr):
+        opcode = _OPCODES.get(type(instr))
+        if opcode is None:
+            raise IRBytecodeError(f"Cannot encode IR instruction of type {type(instr).__name__}")
+        if opcode == OP_LABEL:
+            self._emit(opcode, self.name(instr.name))
+        elif opcode == OP_LOAD_CONST:
+            self._emit(opcode, self.operand(instr.target), self.constant(instr.value), type_name=instr.type)
+        elif opcode == OP_LOAD_VAR:
+            self._emit(opcode, self.operand(instr.target), self.variable(instr.source, instr.address, instr.type), type_name=instr.type)
+        elif opcode == OP_STORE_VAR:
+            self._emit(opcode, self.variable(instr.target, instr.address, instr.type), self.operand(instr.source), type_name=instr.type)
+        elif opcode == OP_BINOP:
+            self._emit(opcode, self.operand(instr.target), self.operand(instr.left), self.operand(instr.right),
+                       instr.type, instr.op)
+        elif opcode == OP_UNARY:
+            self._emit(opcode, self.operand(instr.target), self.operand(instr.operand), type_name=instr.type,
+                       operator=instr.op)
+        elif opcode == OP_JUMP:
+            self._emit(opcode, self.name(instr.label_name))
+        elif opcode == OP_COND_JUMP:
+            self._emit(opcode, self.operand(instr.condition_var), self.name(instr.false_label_name))
+        elif opcode == OP_COND_JUMP_TRUE:
+            self._emit(opcode, self.operand(instr.condition_var), self.name(instr.true_label_name))
+        elif opcode == OP_COMPARE_JUMP:
+            # IF_TRUE - отдельный код операции, оператор сравнения - в заголовке.
+            self._emit(OP_COMPARE_JUMP_TRUE if instr.jump_if else opcode, self.operand(instr.left),
+                       self.operand(instr.right), self.name(instr.label_name), operator=instr.op)
+        elif opcode == OP_CALL:
+            offset = len(self.extra)
+            self.extra.append(len(instr.args))
+            self.extra.extend(self.operand(arg) for arg in instr.args)
+            self._emit(opcode, self.name(instr.proc_name), self.operand(instr.result_target), offset)
+        elif opcode == OP_RETURN:
+            self._emit(opcode, self.operand(instr.value_source_operand))
+        elif opcode == OP_READ:
+            self._emit(opcode, self.variable(instr.target_var, instr.address, instr.type), type_name=instr.type)
+        elif opcode == OP_WRITE:
+            self._emit(opcode, self.operand(instr.source_var))
+        elif opcode == OP_ENTER:
+            # extra: уровень + 1 (0 - нет уровня), размер кадра, число параметров, имена, типы.
+            offset = len(self.extra)
+            self.extra.append(0 if instr.level is None else instr.level + 1)
+            self.extra.append(instr.frame_size)
+            self.extra.append(len(instr.param_names))
+            self.extra.extend(self.name(param_name) for param_name in instr.param_names)
+            for param_type in instr.param_types:
+                type_code = _TYPE_CODES.get(param_type)
+                if type_code is None:
+                    raise IRBytecodeError(f"Unsupported IR type: {param_type!r}")
+                self.extra.append(type_code)
+            self._emit(opcode, self.name(instr.proc_name), offset)
+        elif opcode == OP_EXIT:
+            self._emit(opcode, self.name(instr.proc_name))
+        else:
+            self._emit(opcode)
+
+    def instruction(self, index):
+        head = self.ops[index]
+        opcode = head & OPCODE_MASK
+        type_name = IR_TYPES[head >> TYPE_SHIFT & TYPE_MASK]
+        a = self.a[index]
+        b = self.b[index]
+        if opcode == OP_LABEL:
+            return Label(self.names[a])
+        if opcode == OP_LOAD_CONST:
+            return LoadConst(self.operand_value(a), self.constants[b], type_name)
+        if opcode == OP_LOAD_VAR:
+            source, address, _ = self.variables[b]
+            return LoadVar(self.operand_value(a), source, address, type_name)
+        if opcode == OP_STORE_VAR:
+            target, address, _ = self.variables[a]
+            return StoreVar(target, self.operand_value(b), address, type_name)
+        if opcode == OP_BINOP:
+            return BinOpIR(self.operand_value(a), OPERATORS[head >> OPERATOR_SHIFT], self.operand_value(b),
+                           self.operand_value(self.c[index]), type_name)
+        if opcode == OP_UNARY:
+            return UnaryOpIR(self.operand_value(a), OPERATORS[head >> OPERATOR_SHIFT], self.operand_value(b), type_name)
+        if opcode == OP_JUMP:
+            return Jump(self.names[a])
+        if opcode == OP_COND_JUMP:
+            return CondJump(self.operand_value(a), self.names[b])
+        if opcode == OP_COND_JUMP_TRUE:
+            return CondJumpTrue(self.operand_value(a), self.names[b])
+        if opcode == OP_COMPARE_JUMP or opcode == OP_COMPARE_JUMP_TRUE:
+            return CompareJump(self.operand_value(a), OPERATORS[head >> OPERATOR_SHIFT], self.operand_value(b),
+                               self.names[self.c[index]], opcode == OP_COMPARE_JUMP_TRUE)
+        if opcode == OP_CALL:
+            offset = self.c[index]
+            count = self.extra[offset]
+            args = [self.operand_value(code) for code in self.extra[offset + 1:offset + 1 + count]]
+            return Call(self.names[a], args, self.operand_value(b))
+        if opcode == OP_RETURN:
+            return Return(self.operand_value(a))
+        if opcode == OP_READ:
+            target_var, address, _ = self.variables[a]
+            return ReadIR(target_var, address, type_name)
+        if opcode == OP_WRITE:
+            return WriteIR(self.operand_value(a))
+        if opcode == OP_ENTER:
+            extra = self.extra
+            level = extra[b] - 1 if extra[b] else None
+            count = extra[b + 2]
+            names_start = b + 3
+            types_start = names_start + count
+            param_names = [self.names[code] for code in extra[names_start:types_start]]
+            param_types = [IR_TYPES[code] for code in extra[types_start:types_start + count]]
+            return EnterProc(self.names[a], param_names, level, extra[b + 1], param_types)
+        if opcode == OP_EXIT:
+            return ExitProc(self.names[a])
+        if opcode == OP_NOOP:
+            return NoOp()
+        raise IRBytecodeError(f"Unknown opcode {opcode} at {index}")
+
+    def to_ir(self):
+        return [self.instruction(index) for index in range(len(self.ops))]
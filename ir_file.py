@@ -0,0 +1,173 @@
+# ir_file.py
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from ir_bytecode import IRBytecode, OPCODE_MASK, OP_LABEL, OP_ENTER, OP_EXIT
+
+class IRFileError(Exception):
+    pass
+
+FORMAT_VERSION = 4
+MAGIC = b'PASIR\0'
+IR_FILE_SUFFIX = '.pir'
+
+# Файл .pir: заголовок, затем массивы IRBytecode в том виде, в каком они лежат в памяти
+# (ops, a, b, c, extra, каждый с границы 4 байт), затем таблицы в marshal: имена, переменные,
+# константы, метки (имя -> индекс инструкции) и процедуры (имя -> индексы ENTER_PROC и EXIT_PROC).
+# Загрузка отображает файл в память: массивы - memoryview над mmap, инструкции не разбираются.
+#
+# Заголовок: MAGIC, версия формата, порядок байт (0 - little, 1 - big), число инструкций,
+# длина extra, длина таблиц.
+_HEADER = struct.Struct('<6sHBxIII')
+_BYTE_ORDERS = ('little', 'big')
+
+def _aligned(size):
+    return (size + 3) & ~3
+
+def _sections(count, extra_count):
+    # (код типа, смещение, число элементов) для ops, a, b, c, extra.
+    sections = []
+    offset = _HEADER.size
+    for typecode, length in (('H', count), ('i', count), ('i', count), ('i', count), ('i', extra_count)):
+        sections.append((typecode, offset, length))
+        offset += _aligned(length * array(typecode).itemsize)
+    return sections, offset
+
+def _scan_tables(bytecode):
+    labels = {}
+    procedures = {}
+    ops = bytecode.ops
+    a = bytecode.a
+    names = bytecode.names
+    open_procedures = {}
+    for index in range(len(ops)):
+        opcode = ops[index] & OPCODE_MASK
+        if opcode == OP_LABEL:
+            labels.setdefault(names[a[index]], index)
+        elif opcode == OP_ENTER:
+            open_procedures[names[a[index]]] = index
+        elif opcode == OP_EXIT:
+            name = names[a[index]]
+            enter_index = open_procedures.pop(name, None)
+            if enter_index is not None:
+                procedures.setdefault(name, (enter_index, index))
+    return labels, procedures
+
+def write_ir_file(path, ir_code):
+    bytecode = ir_code if isinstance(ir_code, IRBytecode) else IRBytecode.from_ir(ir_code)
+    labels, procedures = _scan_tables(bytecode)
+    tables = marshal.dumps((list(bytecode.names), list(bytecode.variables), list(bytecode.constants),
+                            labels, procedures))
+    count = len(bytecode)
+    extra_count = len(bytecode.extra)
+    buffers = (bytecode.ops, bytecode.a, bytecode.b, bytecode.c, bytecode.extra)
+    directory = os.path.dirname(os.path.abspath(path))
+    # Запись через временный файл: загрузчик, отобразивший прежнюю версию, её и дочитает.
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _BYTE_ORDERS.index(sys.byteorder),
+                                 count, extra_count, len(tables)))
+            for buffer in buffers:
+                data = buffer.tobytes()
+                f.write(data)
+                f.write(b'\0' * (_aligned(len(data)) - len(data)))
+            f.write(tables)
+        # mkstemp создаёт файл с правами 0600, а .pir - обычный результат сборки.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return bytecode
+
+class IRFile:
+    def __init__(self, path):
+        self.path = path
+        self._mapped = None
+        self._views = []
+        with open(path, 'rb') as f:
+            try:
+                self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise IRFileError(f"IR file is empty: {path}")
+        try:
+            self._load()
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self):
+        mapped = self._mapped
+        if len(mapped) < _HEADER.size:
+            raise IRFileError(f"IR file is truncated: {self.path}")
+        magic, version, byte_order, count, extra_count, tables_size = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise IRFileError(f"Not a compiled IR file: {self.path}")
+        if version != FORMAT_VERSION:
+            raise IRFileError(f"Unsupported IR file format version {version} (expected {FORMAT_VERSION})")
+        if byte_order >= len(_BYTE_ORDERS):
+            raise IRFileError(f"Bad byte order in IR file: {self.path}")
+        sections, tables_offset = _sections(count, extra_count)
+        if tables_offset + tables_size != len(mapped):
+            raise IRFileError(f"IR file size does not match its header: {self.path}")
+        view = memoryview(mapped)
+        self._views.append(view)
+        buffers = []
+        for typecode, offset, length in sections:
+            itemsize = array(typecode).itemsize
+            section = view[offset:offset + length * itemsize]
+            self._views.append(section)
+            if _BYTE_ORDERS[byte_order] == sys.byteorder:
+                buffer = section.cast(typecode)
+                self._views.append(buffer)
+            else:
+                # Файл с другой машины: копия с переставленными байтами.
+                buffer = array(typecode, section.tobytes())
+                buffer.byteswap()
+            buffers.append(buffer)
+        try:
+            names, variables, constants, labels, procedures = marshal.loads(mapped[tables_offset:])
+        except (ValueError, EOFError, TypeError) as e:
+            raise IRFileError(f"Corrupted IR file tables: {e}")
+        self.labels = labels
+        self.procedures = procedures
+        self.bytecode = IRBytecode.from_buffers(*buffers, names, variables, constants)
+
+    def __len__(self):
+        return len(self.bytecode)
+
+    def __str__(self):
+        return (f"IRFile(path={self.path!r}, instructions={len(self.bytecode)}, labels={len(self.labels)}, "
+                f"procedures={len(self.procedures)})")
+
+    __repr__ = __str__
+
+    def to_ir(self):
+        return self.bytecode.to_ir()
+
+    def close(self):
+        # memoryview над mmap нужно освободить до закрытия отображения.
+        self.bytecode = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def load_ir_file(path):
+    return IRFile(path)
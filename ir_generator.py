@@ -2,15 +2,29 @@
 from ast_nodes import *
 from intermediate_rep import *
 from lexer import *
+from symbol_table import ConstSymbol
+from ast_walker import NodeVisitor
 
 class IRGeneratorError(Exception):
     pass
 
-class IRGenerator:
-    def __init__(self):
+BOOLEAN_OPS = ('==', '!=', '<', '<=', '>', '>=', 'AND', 'OR')
+
+RELATIONAL_OPS = {T_EQUAL: '==', T_NOT_EQUAL: '!=', T_LESS_THAN: '<', T_LESS_EQUAL: '<=',
+                  T_GREATER_THAN: '>', T_GREATER_EQUAL: '>='}
+
+def ir_type(node):
+    # Тип из node_type, поставленного SemanticAnalyzer; None, если анализ не выполнялся.
+    node_type = getattr(node, 'node_type', None)
+    return node_type.name if node_type is not None else None
+
+class IRGenerator(NodeVisitor):
+    def __init__(self, temp_start=0, label_start=0):
+        # Номера первой временной переменной и первой метки: единица компиляции
+        # (parallel_compiler) продолжает нумерацию предыдущих единиц.
         self.code = []
-        self.temp_count = 0
-        self.label_count = 0
+        self.temp_count = temp_start
+        self.label_count = label_start
         self.global_constants = {}
 
     def new_temp(self):
@@ -27,16 +41,18 @@ class IRGenerator:
         self.code.append(instruction)
         print(f"DEBUG_IR_ADD: {instruction}")
 
+    def begin_procedure(self, label, name, param_names, level=None, frame_size=0, param_types=None):
+        self.add_instruction(Label(label))
+        self.add_instruction(EnterProc(name, param_names, level, frame_size, param_types))
+
+    def end_procedure(self, name):
+        self.add_instruction(ExitProc(name))
+        self.add_instruction(Return())
+
     def generate(self, node):
         self.visit(node)
         return self.code
 
-    def visit(self, node):
-        method_name = 'visit_' + type(node).__name__
-        visitor = getattr(self, method_name, self.generic_visit)
-        result = visitor(node)
-        return result
-
     def generic_visit(self, node):
         raise IRGeneratorError(f"No visit_{type(node).__name__} method defined for node {type(node)} {node}")
 
@@ -45,12 +61,14 @@ class IRGenerator:
             for declaration in node.block.declarations:
                 self.visit(declaration)
         main_label = "__main_start"
-        self.add_instruction(Label(main_label))
-        self.add_instruction(EnterProc(node.name, []))
+        program_symbol = node.symbol
+        if program_symbol is not None:
+            self.begin_procedure(main_label, node.name, [], program_symbol.scope_level, program_symbol.frame_size)
+        else:
+            self.begin_procedure(main_label, node.name, [])
         if node.block.compound_statement:
             self.visit(node.block.compound_statement)
-        self.add_instruction(ExitProc(node.name))
-        self.add_instruction(Return())
+        self.end_procedure(node.name)
 
     def visit_Block(self, node):
         pass
@@ -60,21 +78,27 @@ class IRGenerator:
 
     def visit_ConstDecl(self, node):
         const_name = node.const_node.value
-        const_value = node.value_node.value
+        # Значение CONST-выражения вычислено семантическим анализатором.
+        const_symbol = node.const_node.symbol
+        const_value = const_symbol.value if const_symbol is not None else node.value_node.value
         self.global_constants[const_name] = const_value
 
     def visit_ProcedureDecl(self, node):
         proc_label = node.proc_name
-        self.add_instruction(Label(proc_label))
         param_names = [p.var_node.value for p in node.params]
-        self.add_instruction(EnterProc(node.proc_name, param_names))
+        param_types = [p.type_node.value for p in node.params]
+        # Вложенные процедуры идут до метки процедуры: иначе вызов прошёл бы в их код.
         if node.block_node.declarations:
             for declaration in node.block_node.declarations:
                 self.visit(declaration)
+        proc_symbol = node.symbol
+        if proc_symbol is not None:
+            self.begin_procedure(proc_label, node.proc_name, param_names, proc_symbol.scope_level, proc_symbol.frame_size, param_types)
+        else:
+            self.begin_procedure(proc_label, node.proc_name, param_names, param_types=param_types)
         if node.block_node.compound_statement:
             self.visit(node.block_node.compound_statement)
-        self.add_instruction(ExitProc(node.proc_name))
-        self.add_instruction(Return())
+        self.end_procedure(node.proc_name)
 
     def visit_Param(self, node):
         pass
@@ -87,31 +111,71 @@ class IRGenerator:
             self.visit(child)
 
     def visit_Assign(self, node):
-        source_temp_name = self.visit(node.right)
+        source_operand = self.visit(node.right)
         target_var_name = node.left.value
-        self.add_instruction(StoreVar(target=target_var_name, source=source_temp_name))
+        self.add_instruction(StoreVar(target=target_var_name, source=source_operand, address=node.left.address,
+                                      type=ir_type(node.left)))
 
+    # Переменные и литералы - операнды Var и Imm прямо в инструкции, без временных переменных.
     def visit_Variable(self, node):
         var_name = node.value
-        target_temp_name = self.new_temp()
+        if node.address is not None:
+            return Var(var_name, node.address, ir_type(node))
+        if isinstance(node.symbol, ConstSymbol):
+            return Imm(node.symbol.value)
         if var_name in self.global_constants:
-            const_value = self.global_constants[var_name]
-            self.add_instruction(LoadConst(target=target_temp_name, value=const_value))
-        else:
-            self.add_instruction(LoadVar(target=target_temp_name, source=var_name))
-        return target_temp_name
+            return Imm(self.global_constants[var_name])
+        return Var(var_name, type=ir_type(node))
 
     def visit_Num(self, node):
-        target_temp_name = self.new_temp()
-        self.add_instruction(LoadConst(target=target_temp_name, value=node.value))
-        return target_temp_name
+        return Imm(node.value)
 
     def visit_StringLiteral(self, node):
-        target_temp_name = self.new_temp()
-        self.add_instruction(LoadConst(target=target_temp_name, value=node.value))
-        return target_temp_name
+        return Imm(node.value)
+
+    # Сокращённое вычисление AND/OR: условие переводится в переходы, правая часть не вычисляется,
+    # если результат уже известен по левой. Это часть семантики языка: ошибка выполнения
+    # в невычисленной правой части (деление на ноль) не возникает. branch переходит на label,
+    # когда значение условия равно jump_if, иначе выполнение идёт дальше.
+    def branch(self, node, label, jump_if):
+        if isinstance(node, BinOp) and node.op.type in (T_AND, T_OR):
+            if (node.op.type == T_AND) != jump_if:
+                # AND ложно, если ложна любая часть; OR истинно, если истинна любая.
+                self.branch(node.left, label, jump_if)
+                self.branch(node.right, label, jump_if)
+            else:
+                skip_label = self.new_label("COND_SKIP")
+                self.branch(node.left, skip_label, not jump_if)
+                self.branch(node.right, label, jump_if)
+                self.add_instruction(Label(skip_label))
+        elif isinstance(node, UnaryOp) and node.op.type == T_NOT:
+            self.branch(node.expr, label, not jump_if)
+        elif isinstance(node, BinOp) and node.op.type in RELATIONAL_OPS:
+            # Сравнение сразу в переходе, без временной с результатом.
+            left = self.visit(node.left)
+            right = self.visit(node.right)
+            self.add_instruction(CompareJump(left, RELATIONAL_OPS[node.op.type], right, label, jump_if))
+        else:
+            condition = self.visit(node)
+            if jump_if:
+                self.add_instruction(CondJumpTrue(condition, label))
+            else:
+                self.add_instruction(CondJump(condition, label))
 
     def visit_BinOp(self, node):
+        if node.op.type in (T_AND, T_OR):
+            # Значение AND/OR вне условия IF/WHILE: те же переходы, результат - True или False.
+            false_label = self.new_label("BOOL_FALSE")
+            end_label = self.new_label("BOOL_END")
+            result_temp_name = self.new_temp()
+            self.branch(node, false_label, False)
+            self.add_instruction(LoadConst(result_temp_name, True, IR_BOOLEAN))
+            self.add_instruction(Jump(end_label))
+            self.add_instruction(Label(false_label))
+            self.add_instruction(LoadConst(result_temp_name, False, IR_BOOLEAN))
+            self.add_instruction(Label(end_label))
+            return result_temp_name
+
         print(f"\nDEBUG_BINOP_ENTER: Op='{node.op.value}', Left Node Type: {type(node.left).__name__}, Right Node Type: {type(node.right).__name__}")
 
         left_operand_temp_name = self.visit(node.left)
@@ -138,7 +202,8 @@ class IRGenerator:
         generated_instruction = BinOpIR(target=result_temp_name,
                                         op=op_symbol_for_ir,
                                         left=left_operand_temp_name,
-                                        right=right_operand_temp_name)
+                                        right=right_operand_temp_name,
+                                        type=IR_BOOLEAN if op_symbol_for_ir in BOOLEAN_OPS else ir_type(node))
 
         print(f"DEBUG_BINOP_GENERATED_INSTR: Op='{node.op.value}', Instruction = {generated_instruction}")
 
@@ -154,15 +219,15 @@ class IRGenerator:
         op_symbol_for_ir = op_str_map.get(node.op.type)
         if not op_symbol_for_ir:
             raise IRGeneratorError(f"Unsupported unary operator token: {node.op.token}")
-        self.add_instruction(UnaryOpIR(target=result_temp_name, op=op_symbol_for_ir, operand=operand_temp_name))
+        result_type = IR_BOOLEAN if op_symbol_for_ir == 'NOT' else ir_type(node)
+        self.add_instruction(UnaryOpIR(target=result_temp_name, op=op_symbol_for_ir, operand=operand_temp_name, type=result_type))
         return result_temp_name
 
     def visit_If(self, node):
-        condition_temp_name = self.visit(node.condition)
         else_label = self.new_label("IF_ELSE")
         end_if_label = self.new_label("IF_END")
         jump_target_on_false = else_label if node.else_statement else end_if_label
-        self.add_instruction(CondJump(condition_temp_name, jump_target_on_false))
+        self.branch(node.condition, jump_target_on_false, False)
         self.visit(node.then_statement)
         if node.else_statement:
             self.add_instruction(Jump(end_if_label))
@@ -174,8 +239,7 @@ class IRGenerator:
         loop_start_label = self.new_label("WHILE_START")
         loop_end_label = self.new_label("WHILE_END")
         self.add_instruction(Label(loop_start_label))
-        condition_temp_name = self.visit(node.condition)
-        self.add_instruction(CondJump(condition_temp_name, loop_end_label))
+        self.branch(node.condition, loop_end_label, False)
         self.visit(node.body_statement)
         self.add_instruction(Jump(loop_start_label))
         self.add_instruction(Label(loop_end_label))
@@ -189,7 +253,7 @@ class IRGenerator:
     def visit_Read(self, node):
         for var_node in node.variables:
             var_name_to_read_into = var_node.value
-            self.add_instruction(ReadIR(target_var=var_name_to_read_into))
+            self.add_instruction(ReadIR(target_var=var_name_to_read_into, address=var_node.address, type=ir_type(var_node)))
 
     def visit_Write(self, node):
         for expr_node in node.expressions:
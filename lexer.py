@@ -1,12 +1,69 @@
 import re
 import sys
+from array import array
+from bisect import bisect_right
+
+_NEWLINE_PATTERN = re.compile('\n')
+
+class LineIndex:
+    # Начала строк исходного текста; строка и столбец токена вычисляются по смещению двоичным поиском.
+    def __init__(self, text='', base_offset=0, first_line=1):
+        self.line_starts = array('q', [base_offset])
+        self.first_line = first_line
+        self.add_text(text, base_offset)
+
+    def __str__(self):
+        return f"LineIndex(lines={len(self.line_starts)}, first_line={self.first_line})"
+
+    __repr__ = __str__
+
+    def add_text(self, text, offset):
+        self.line_starts.extend(offset + m.end() for m in _NEWLINE_PATTERN.finditer(text))
+
+    def line(self, offset):
+        return self.first_line + bisect_right(self.line_starts, offset) - 1
+
+    def column(self, offset):
+        return offset - self.line_starts[bisect_right(self.line_starts, offset) - 1] + 1
+
+    def eof_column(self, offset):
+        # Посимвольный лексер не сдвигает столбец за последним символом; у пустого текста столбец 1.
+        return self.column(offset) - 1 if offset else 1
+
+    def edit(self, offset, removed_length, inserted_text):
+        line_starts = self.line_starts
+        first = bisect_right(line_starts, offset)
+        stop = bisect_right(line_starts, offset + removed_length)
+        delta = len(inserted_text) - removed_length
+        inserted = array('q', (offset + m.end() for m in _NEWLINE_PATTERN.finditer(inserted_text)))
+        if delta:
+            inserted.extend(line_start + delta for line_start in line_starts[stop:])
+            stop = len(line_starts)
+        line_starts[first:stop] = inserted
 
 class Token:
-    def __init__(self, type, value, line=None, column=None):
+    __slots__ = ('type', 'value', 'offset', 'lines')
+
+    def __init__(self, type, value, offset=None, lines=None):
         self.type = type
         self.value = value
-        self.line = line
-        self.column = column
+        self.offset = offset
+        self.lines = lines
+
+    @property
+    def line(self):
+        if self.lines is None:
+            return None
+        return self.lines.line(self.offset)
+
+    @property
+    def column(self):
+        if self.lines is None:
+            return None
+        if self.type == T_EOF:
+            return self.lines.eof_column(self.offset)
+        return self.lines.column(self.offset)
+
     def __str__(self):
         return f'Token({self.type}, {repr(self.value)}, L{self.line}:C{self.column})'
     def __repr__(self):
@@ -56,16 +113,26 @@ T_REAL_CONST = 'REAL_CONST'
 T_STRING_LITERAL = 'STRING_LITERAL'
 T_EOF = 'EOF'
 
+# Компактные целочисленные коды типов токенов (индекс в TOKEN_TYPES).
+TOKEN_TYPES = (
+    T_EOF, T_PROGRAM, T_VAR, T_CONST, T_PROCEDURE, T_BEGIN, T_END, T_INTEGER, T_REAL,
+    T_IF, T_THEN, T_ELSE, T_WHILE, T_DO, T_READ, T_WRITE, T_DIV, T_AND, T_OR, T_NOT,
+    T_PLUS, T_MINUS, T_MUL, T_REAL_DIV, T_ASSIGN, T_SEMI, T_DOT, T_COLON, T_COMMA,
+    T_LPAREN, T_RPAREN, T_LBRACE, T_RBRACE, T_EQUAL, T_NOT_EQUAL, T_LESS_THAN, T_LESS_EQUAL,
+    T_GREATER_THAN, T_GREATER_EQUAL, T_ID, T_INTEGER_CONST, T_REAL_CONST, T_STRING_LITERAL
+)
+TOKEN_KINDS = {token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)}
+
 class LexerError(Exception):
     pass
 
 class Lexer:
-    def __init__(self, text):
+    def __init__(self, text, line_index=None, base_offset=0):
         self.text = text
         self.pos = 0
         self.current_char = self.text[self.pos] if self.pos < len(self.text) else None
-        self.line = 1
-        self.column = 1
+        self.base_offset = base_offset
+        self.lines = line_index if line_index is not None else LineIndex(text, base_offset)
         self.reserved_keywords = {
             'PROGRAM': Token(T_PROGRAM, 'PROGRAM'), 'VAR': Token(T_VAR, 'VAR'),
             'CONST': Token(T_CONST, 'CONST'), 'PROCEDURE': Token(T_PROCEDURE, 'PROCEDURE'),
@@ -81,16 +148,27 @@ class Lexer:
     def error(self, message=""):
         raise LexerError(f'Lexer error on L{self.line}:C{self.column}. {message}')
 
+    # Строка и столбец текущей позиции нужны только для сообщений об ошибках и считаются по индексу строк.
+    @property
+    def line(self):
+        return self.lines.line(self.base_offset + self.pos)
+
+    @property
+    def column(self):
+        if self.current_char is None:
+            return self.lines.eof_column(self.base_offset + self.pos)
+        return self.lines.column(self.base_offset + self.pos)
+
+    def _location(self, pos):
+        offset = self.base_offset + pos
+        return f'L{self.lines.line(offset)}:C{self.lines.column(offset)}'
+
     def advance(self):
-        if self.current_char == '\n':
-            self.line += 1
-            self.column = 0
         self.pos += 1
         if self.pos >= len(self.text):
             self.current_char = None
         else:
             self.current_char = self.text[self.pos]
-            self.column += 1
 
     def peek_char(self):
         peek_pos = self.pos + 1
@@ -114,11 +192,11 @@ class Lexer:
 
     def skip_pascal_comment(self):
         if self.current_char == '{':
-            start_line, start_col = self.line, self.column
+            start = self.pos
             self.advance()
             while self.current_char != '}':
                 if self.current_char is None:
-                    raise LexerError(f'Unterminated comment starting at L{start_line}:C{start_col}.')
+                    raise LexerError(f'Unterminated comment starting at {self._location(start)}.')
                 self.advance()
             self.advance()
             return True
@@ -126,7 +204,7 @@ class Lexer:
 
     def number(self):
         result_str = ''
-        start_line, start_col = self.line, self.column
+        start = self.pos
         is_real = False
         while self.current_char is not None and self.current_char.isdigit():
             result_str += self.current_char
@@ -140,14 +218,14 @@ class Lexer:
                     result_str += self.current_char
                     self.advance()
             elif not is_real and result_str:
-                return Token(T_INTEGER_CONST, int(result_str), start_line, start_col)
+                return Token(T_INTEGER_CONST, int(result_str), self.base_offset + start, self.lines)
 
         if is_real:
             if not result_str.split('.')[-1]:
                 self.error(f"Invalid real number format near '{result_str}' - missing digits after decimal point.")
-            return Token(T_REAL_CONST, float(result_str), start_line, start_col)
+            return Token(T_REAL_CONST, float(result_str), self.base_offset + start, self.lines)
         elif result_str:
-            return Token(T_INTEGER_CONST, int(result_str), start_line, start_col)
+            return Token(T_INTEGER_CONST, int(result_str), self.base_offset + start, self.lines)
         else:
             self.error("Internal lexer error: number() called unexpectedly.")
             return None
@@ -155,25 +233,25 @@ class Lexer:
 
     def _id(self):
         result = ''
-        start_line, start_col = self.line, self.column
+        start = self.pos
         while self.current_char is not None and (self.current_char.isalnum() or self.current_char == '_'):
             result += self.current_char
             self.advance()
         token_info = self.reserved_keywords.get(result.upper())
         if token_info:
-            return Token(token_info.type, token_info.value, start_line, start_col)
+            return Token(token_info.type, token_info.value, self.base_offset + start, self.lines)
         else:
-            return Token(T_ID, result, start_line, start_col)
+            return Token(T_ID, result, self.base_offset + start, self.lines)
 
     def string_literal(self):
         result_chars = []
-        start_line, start_col = self.line, self.column
+        start = self.pos
         self.advance()
         while self.current_char is not None and self.current_char != "'":
             if self.current_char == '\\':
                 self.advance()
                 if self.current_char is None:
-                    self.error(f"Unterminated escape sequence in string literal starting at L{start_line}:C{start_col}")
+                    self.error(f"Unterminated escape sequence in string literal starting at {self._location(start)}")
                     break
                 if self.current_char == 'n':
                     result_chars.append('\n')
@@ -195,10 +273,10 @@ class Lexer:
                 result_chars.append(self.current_char)
                 self.advance()
         if self.current_char is None:
-            self.error(f"Unterminated string literal starting at L{start_line}:C{start_col}")
+            self.error(f"Unterminated string literal starting at {self._location(start)}")
         else:
             self.advance()
-        return Token(T_STRING_LITERAL, "".join(result_chars), start_line, start_col)
+        return Token(T_STRING_LITERAL, "".join(result_chars), self.base_offset + start, self.lines)
 
     def _get_token_logic(self):
         while self.current_char is not None:
@@ -218,9 +296,9 @@ class Lexer:
             break
 
         if self.current_char is None:
-            return Token(T_EOF, None, self.line, self.column)
+            return Token(T_EOF, None, self.base_offset + self.pos, self.lines)
 
-        token_start_line, token_start_col = self.line, self.column
+        token_start = self.base_offset + self.pos
 
         if self.current_char.isalpha() or self.current_char == '_':
             return self._id()
@@ -234,16 +312,16 @@ class Lexer:
 
         if ch == ':' and ch_peek == '=':
             self.advance(); self.advance()
-            return Token(T_ASSIGN, ':=', token_start_line, token_start_col)
+            return Token(T_ASSIGN, ':=', token_start, self.lines)
         if ch == '<' and ch_peek == '>':
             self.advance(); self.advance()
-            return Token(T_NOT_EQUAL, '<>', token_start_line, token_start_col)
+            return Token(T_NOT_EQUAL, '<>', token_start, self.lines)
         if ch == '<' and ch_peek == '=':
             self.advance(); self.advance()
-            return Token(T_LESS_EQUAL, '<=', token_start_line, token_start_col)
+            return Token(T_LESS_EQUAL, '<=', token_start, self.lines)
         if ch == '>' and ch_peek == '=':
             self.advance(); self.advance()
-            return Token(T_GREATER_EQUAL, '>=', token_start_line, token_start_col)
+            return Token(T_GREATER_EQUAL, '>=', token_start, self.lines)
 
         token_map = {
             '+': T_PLUS, '-': T_MINUS, '*': T_MUL, '/': T_REAL_DIV,
@@ -254,7 +332,7 @@ class Lexer:
         if ch in token_map:
             token_type = token_map[ch]
             self.advance()
-            return Token(token_type, ch, token_start_line, token_start_col)
+            return Token(token_type, ch, token_start, self.lines)
 
         self.error(f"Unexpected character '{self.current_char}'")
         return None
@@ -263,10 +341,138 @@ class Lexer:
         return self._get_token_logic()
 
     def peek_token(self):
-        temp_lexer = Lexer(self.text)
+        temp_lexer = Lexer(self.text, self.lines, self.base_offset)
         temp_lexer.pos = self.pos
         temp_lexer.current_char = self.current_char
-        temp_lexer.line = self.line
-        temp_lexer.column = self.column
         token = temp_lexer._get_token_logic()
-        return token
\ No newline at end of file
+        return token
+
+RESERVED_KEYWORDS = {
+    'PROGRAM': T_PROGRAM, 'VAR': T_VAR, 'CONST': T_CONST, 'PROCEDURE': T_PROCEDURE,
+    'BEGIN': T_BEGIN, 'END': T_END, 'INTEGER': T_INTEGER, 'REAL': T_REAL,
+    'DIV': T_DIV, 'IF': T_IF, 'THEN': T_THEN, 'ELSE': T_ELSE,
+    'WHILE': T_WHILE, 'DO': T_DO, 'READ': T_READ, 'WRITE': T_WRITE,
+    'AND': T_AND, 'OR': T_OR, 'NOT': T_NOT
+}
+
+OPERATOR_TOKENS = {
+    ':=': T_ASSIGN, '<>': T_NOT_EQUAL, '<=': T_LESS_EQUAL, '>=': T_GREATER_EQUAL,
+    '+': T_PLUS, '-': T_MINUS, '*': T_MUL, '/': T_REAL_DIV,
+    ';': T_SEMI, '.': T_DOT, ':': T_COLON, ',': T_COMMA,
+    '(': T_LPAREN, ')': T_RPAREN, '=': T_EQUAL,
+    '<': T_LESS_THAN, '>': T_GREATER_THAN
+}
+
+STRING_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', "'": "'"}
+
+# Мастер-шаблон: пробелы и комментарии перед токеном, затем одна из групп
+# 1 - ID, 2 - REAL, 3 - INTEGER, 4 - строковый литерал, 5 - оператор.
+# Всё, что шаблон не покрывает (не-ASCII символы, незакрытые строки и комментарии, ошибки),
+# разбирается посимвольным движком Lexer, поэтому типы токенов и сообщения об ошибках совпадают.
+_NON_ASCII = r'[^\x00-\x7f]'
+MASTER_PATTERN = re.compile(
+    r"(?:[ \t\n\r\x0b\x0c\x1c-\x1f]|//[^\n]*(?![^\n])|\{[^}]*\})*"
+    r"(?:([A-Za-z_][A-Za-z0-9_]*)(?![A-Za-z0-9_]|" + _NON_ASCII + r")"
+    r"|([0-9]+\.[0-9]+)(?![0-9]|" + _NON_ASCII + r")"
+    r"|([0-9]+)(?![0-9]|\.?" + _NON_ASCII + r"|\.[0-9])"
+    r"|('[^'\\]*(?:\\[\s\S][^'\\]*)*')"
+    r"|(:=|<>|<=|>=|/(?!/)|[-+*;.:,()=<>]))"
+)
+TRAILING_TRIVIA_PATTERN = re.compile(r"(?:[ \t\n\r\x0b\x0c\x1c-\x1f]|//[^\n]*(?![^\n])|\{[^}]*\})*\Z")
+_ESCAPE_PATTERN = re.compile(r'\\([\s\S])')
+
+
+def _unescape_match(match):
+    ch = match.group(1)
+    return STRING_ESCAPES.get(ch, '\\' + ch)
+
+
+def decode_string_literal(body):
+    if '\\' not in body:
+        return body
+    return _ESCAPE_PATTERN.sub(_unescape_match, body)
+
+
+class RegexLexer(Lexer):
+    def __init__(self, text, line_index=None, base_offset=0):
+        super().__init__(text, line_index, base_offset)
+        self._scanner = None
+        self._peeked = None
+
+    def _fallback_token(self):
+        # Посимвольный движок продолжает с той же позиции.
+        self.current_char = self.text[self.pos]
+        return Lexer._get_token_logic(self)
+
+    def _scan(self):
+        text = self.text
+        lines = self.lines
+        base = self.base_offset
+        keywords = RESERVED_KEYWORDS
+        operators = OPERATOR_TOKENS
+        while True:
+            pos = self.pos
+            # scanner.match продолжает с конца предыдущего токена и на первой неудаче возвращает None;
+            # finditer искал бы следующее совпадение дальше по тексту - квадратично на длинном ряду пробелов.
+            for m in iter(MASTER_PATTERN.scanner(text, pos).match, None):
+                kind = m.lastindex
+                pos = m.end()
+                if kind == 1:
+                    lexeme = m.group(1)
+                    keyword_type = keywords.get(lexeme.upper())
+                    if keyword_type:
+                        yield Token(keyword_type, keyword_type, base + m.start(1), lines)
+                    else:
+                        yield Token(T_ID, lexeme, base + m.start(1), lines)
+                elif kind == 5:
+                    lexeme = m.group(5)
+                    yield Token(operators[lexeme], lexeme, base + m.start(5), lines)
+                elif kind == 3:
+                    yield Token(T_INTEGER_CONST, int(m.group(3)), base + m.start(3), lines)
+                elif kind == 2:
+                    yield Token(T_REAL_CONST, float(m.group(2)), base + m.start(2), lines)
+                else:
+                    yield Token(T_STRING_LITERAL, decode_string_literal(m.group(4)[1:-1]), base + m.start(4), lines)
+            self.pos = pos
+            if TRAILING_TRIVIA_PATTERN.match(text, pos):
+                self.pos = len(text)
+                self.current_char = None
+                while True:
+                    yield Token(T_EOF, None, base + len(text), lines)
+            yield self._fallback_token()
+
+    def _get_token_logic(self):
+        if self._scanner is None:
+            self._scanner = self._scan()
+        try:
+            return next(self._scanner)
+        except LexerError:
+            self._scanner = None
+            raise
+
+    def get_next_token(self):
+        token = self._peeked
+        if token is not None:
+            self._peeked = None
+            return token
+        return self._get_token_logic()
+
+    def peek_token(self):
+        if self._peeked is None:
+            self._peeked = self._get_token_logic()
+        return self._peeked
+
+
+LEXER_ENGINES = {
+    'char': Lexer,
+    'regex': RegexLexer,
+}
+
+DEFAULT_LEXER_ENGINE = 'regex'
+
+
+def create_lexer(text, engine=DEFAULT_LEXER_ENGINE, line_index=None, base_offset=0):
+    lexer_class = LEXER_ENGINES.get(engine)
+    if lexer_class is None:
+        raise ValueError(f"Unknown lexer engine '{engine}'. Available: {', '.join(LEXER_ENGINES)}")
+    return lexer_class(text, line_index, base_offset)
@@ -4,25 +4,132 @@ import traceback
 import io
 import os
 
-from lexer import Lexer, LexerError
-from parser import Parser, ParserError
+from lexer import LexerError, create_lexer, DEFAULT_LEXER_ENGINE
+from stream_lexer import StreamingLexer, open_source_stream
+from incremental_parser import IncrementalParser
+from ast_cache import ParseCache
+from single_pass import create_single_pass_front_end
+from parser import ParserError, create_parser, DEFAULT_PARSER_MODE
 from semantic_analyzer import SemanticAnalyzer, SemanticError
+from constant_folder import ConstantFolder
 from ir_generator import IRGenerator, IRGeneratorError
 from optimizer import Optimizer
+from call_graph import CallGraph
 from interpreter import Interpreter, InterpreterError
 from ast_printer import ASTPrinter
 from nasm_generator import NASMGenerator, NASMGeneratorError
+from parallel_compiler import ParallelCompiler
+from ir_file import IRFileError, IR_FILE_SUFFIX, write_ir_file, load_ir_file
 from nasm_compiler_linker import compile_nasm_and_link_exe, CompilationError
 
 COMPILER_STAGES_OUTPUT = io.StringIO()
 
+# Файлы крупнее порога лексер читает блоками из mmap, не загружая их целиком.
+STREAMING_THRESHOLD_BYTES = 8 * 1024 * 1024
+
 def print_to_compiler_output(*args, **kwargs):
     print(*args, **kwargs, file=COMPILER_STAGES_OUTPUT)
 
+def _run_back_end(optimized_ir_code, nasm_code, interpreter_output_target_file, exe_output_target_file,
+                  gui_input_provider=None):
+    # Этапы после оптимизации: общие для компиляции из исходного кода и запуска готового файла .pir.
+    original_stdout = sys.stdout
+    interpreter_output_handle = None
+    interpreter_successful = False
+    exe_generation_successful = False
+    if optimized_ir_code:
+        # Что читает и пишет каждый вызов (с учётом вложенных вызовов): глобальные переменные и ввод-вывод.
+        print_to_compiler_output("\n[Этап 4a] Граф вызовов и побочные эффекты процедур...")
+        call_graph = CallGraph(optimized_ir_code)
+        for summary in call_graph.procedures.values():
+            print_to_compiler_output(f"  {summary}")
+
+    if optimized_ir_code:
+        print_to_compiler_output("\n[Этап 5a] Интерпретация...")
+        print_to_compiler_output(f"Вывод интерпретатора (операторы WRITE) будет направлен в: {interpreter_output_target_file}")
+        try:
+            interpreter_output_handle = open(interpreter_output_target_file, 'w', encoding='utf-8')
+            sys.stdout = interpreter_output_handle
+            interpreter = Interpreter(list(optimized_ir_code))
+            interpreter.run(original_stdout_ref=original_stdout, input_provider_func=gui_input_provider)
+            interpreter_successful = True
+            print_to_compiler_output(f"\nВыполнение интерпретатором завершено. Вывод в {interpreter_output_target_file}")
+        except InterpreterError as ie:
+            sys.stdout = original_stdout
+            print_to_compiler_output(f"\n--- Ошибка времени выполнения интерпретатора ---")
+            print_to_compiler_output(f"Ошибка: {str(ie)}")
+            interpreter_successful = False
+        except Exception as e_interp:
+            sys.stdout = original_stdout
+            print_to_compiler_output(f"\n--- Непредвиденная ошибка во время интерпретации ---")
+            print_to_compiler_output(f"Ошибка: {str(e_interp)}")
+            traceback.print_exc(file=COMPILER_STAGES_OUTPUT)
+            interpreter_successful = False
+        finally:
+            if interpreter_output_handle:
+                interpreter_output_handle.close()
+            sys.stdout = original_stdout
+    else:
+        print_to_compiler_output("Нет IR-кода для интерпретации.")
+        interpreter_successful = False
+
+    if optimized_ir_code:
+        print_to_compiler_output("\n[Этап 5b] Генерация NASM-кода...")
+        try:
+            # symtab_ref = symtab_for_nasm if 'symtab_for_nasm' in locals() else None
+            if nasm_code is not None:
+                nasm_code_output_str = nasm_code
+            else:
+                nasm_generator = NASMGenerator(optimized_ir_code, symbol_table=None)
+                nasm_code_output_str = nasm_generator.generate()
+            print_to_compiler_output("Генерация NASM-кода успешно завершена.")
+
+            print_to_compiler_output("\n--- Сгенерированный NASM-код (фрагмент) ---")
+            nasm_lines_for_log = nasm_code_output_str.splitlines()
+            if len(nasm_lines_for_log) > 40:
+                for line in nasm_lines_for_log[:20]: print_to_compiler_output(line)
+                print_to_compiler_output("...")
+                for line in nasm_lines_for_log[-20:]: print_to_compiler_output(line)
+            else:
+                print_to_compiler_output(nasm_code_output_str)
+            print_to_compiler_output("-----------------------------------------")
+
+            print_to_compiler_output(f"\n[Этап 6] Ассемблирование NASM и компоновка EXE в: {exe_output_target_file}")
+            exe_dir = os.path.dirname(exe_output_target_file)
+            if exe_dir and not os.path.exists(exe_dir):
+                os.makedirs(exe_dir, exist_ok=True)
+                print_to_compiler_output(f"Создана директория для EXE: {exe_dir}")
+
+            compile_nasm_and_link_exe(nasm_code_output_str, exe_output_target_file)
+            print_to_compiler_output(f"Генерация EXE успешно завершена: {exe_output_target_file}")
+            exe_generation_successful = True
+        except (NASMGeneratorError, CompilationError) as nge_ce:
+            print_to_compiler_output(f"\n--- Ошибка генерации EXE ---")
+            print_to_compiler_output(f"Ошибка: {str(nge_ce)}")
+            exe_generation_successful = False
+        except Exception as e_nasm_link:
+            print_to_compiler_output(f"\n--- Непредвиденная ошибка во время генерации EXE ---")
+            print_to_compiler_output(f"Ошибка: {str(e_nasm_link)}")
+            traceback.print_exc(file=COMPILER_STAGES_OUTPUT)
+            exe_generation_successful = False
+    else:
+        print_to_compiler_output("Нет IR-кода для генерации NASM.")
+        exe_generation_successful = False
+    return interpreter_successful, exe_generation_successful
+
 def compile_and_run_pascal(source_code_str,
                            interpreter_output_target_file,
                            exe_output_target_file,
-                           gui_input_provider=None):
+                           gui_input_provider=None,
+                           lexer_engine=DEFAULT_LEXER_ENGINE,
+                           source_stream=None,
+                           token_source=None,
+                           parser_mode=DEFAULT_PARSER_MODE,
+                           incremental_parser=None,
+                           parse_cache=None,
+                           single_pass=False,
+                           parallel_units=False,
+                           emit_ir_path=None):
     global COMPILER_STAGES_OUTPUT
     COMPILER_STAGES_OUTPUT = io.StringIO()
 
@@ -34,6 +141,7 @@ def compile_and_run_pascal(source_code_str,
     interpreter = None
     nasm_generator = None
     nasm_code_output_str = None
+    unit_compiler = None
 
     original_stdout = sys.stdout
     interpreter_output_handle = None
@@ -44,34 +152,101 @@ def compile_and_run_pascal(source_code_str,
     try:
         print_to_compiler_output("--- Запуск компилятора ---")
         print_to_compiler_output("--- Исходный код ---")
-        print_to_compiler_output(source_code_str)
+        if source_stream is not None:
+            print_to_compiler_output("<исходный код читается потоком и не выводится>")
+        else:
+            print_to_compiler_output(source_code_str)
         print_to_compiler_output("--------------------")
 
+        if single_pass:
+            # Однопроходный режим не строит AST целиком: кэш разбора и инкрементальный парсер не используются.
+            parse_cache = None
+            incremental_parser = None
+
+        if parse_cache is not None and source_code_str is not None and incremental_parser is None:
+            # Готовое AST для того же текста и той же версии компилятора: лексер и парсер не нужны.
+            ast = parse_cache.load(source_code_str)
+
         print_to_compiler_output("\n[Этап 1] Лексический анализ...")
-        lexer = Lexer(source_code_str)
-        print_to_compiler_output("Лексический анализ завершен.")
+        if ast is not None:
+            print_to_compiler_output("Лексический анализ пропущен: AST загружен из кэша разбора.")
+        elif source_stream is not None:
+            # Токены выдаются по мере чтения, парсер стартует до конца файла.
+            lexer = StreamingLexer(source_stream)
+            print_to_compiler_output("Лексический анализ запущен в потоковом режиме.")
+        elif incremental_parser is not None:
+            print_to_compiler_output("Лексический анализ выполняется инкрементально вместе с парсингом.")
+        elif token_source is not None:
+            lexer = token_source
+            print_to_compiler_output("Лексический анализ завершен (инкрементально, переразобраны только изменённые токены).")
+        else:
+            lexer = create_lexer(source_code_str, lexer_engine)
+            print_to_compiler_output(f"Лексический анализ завершен (движок: {lexer_engine}).")
 
         print_to_compiler_output("\n[Этап 2] Синтаксический анализ (Парсинг)...")
-        parser = Parser(lexer)
-        ast = parser.parse()
-        print_to_compiler_output("Парсинг успешно завершен.")
-
-        print_to_compiler_output("\n--- Абстрактное Синтаксическое Дерево (AST) ---")
-        ast_printer = ASTPrinter()
-        ast_representation = ast_printer.get_representation(ast)
-        print_to_compiler_output(ast_representation)
-        print_to_compiler_output("---------------------------------------------")
-
-        print_to_compiler_output("\n[Этап X] Семантический анализ...")
-        sem_analyzer = SemanticAnalyzer()
-        sem_analyzer.analyze(ast)
-        print_to_compiler_output("Семантический анализ успешно завершен.")
-        symtab_for_nasm = sem_analyzer.symtab
-
-        print_to_compiler_output("\n[Этап 3] Генерация промежуточного представления (IR)...")
-        ir_gen = IRGenerator()
-        ir_code = ir_gen.generate(ast)
-        print_to_compiler_output("Генерация IR успешно завершена.")
+        if single_pass:
+            print_to_compiler_output("Однопроходный режим: семантический анализ и генерация IR выполняются вместе с парсингом.")
+        elif ast is not None:
+            print_to_compiler_output(f"Парсинг пропущен: AST загружен из кэша ({parse_cache.directory}).")
+        elif incremental_parser is not None:
+            # Переразбирается только процедура или составной оператор вокруг правки, остальное AST прежнее.
+            ast = incremental_parser.update(source_code_str)
+            reparsed = incremental_parser.reparsed
+            scope = "вся программа" if reparsed is ast else type(reparsed).__name__
+            print_to_compiler_output(f"Парсинг успешно завершен (инкрементально, переразобрано: {scope}).")
+        else:
+            parser = create_parser(lexer, parser_mode)
+            ast = parser.parse()
+            print_to_compiler_output(f"Парсинг успешно завершен (режим: {parser_mode}).")
+            if parse_cache is not None and source_code_str is not None:
+                if parse_cache.store(source_code_str, ast):
+                    print_to_compiler_output("AST сохранён в кэш разбора.")
+
+        if single_pass:
+            # Каждый оператор проверяется и переводится в IR сразу после разбора и не хранится.
+            front_end = create_single_pass_front_end(lexer, parser_mode)
+            ir_code = front_end.parse()
+            symtab_for_nasm = front_end.symtab
+            print_to_compiler_output(f"Парсинг, семантический анализ и генерация IR успешно завершены за один проход (режим: {parser_mode}, операторов: {front_end.lowered_statements}).")
+        else:
+            print_to_compiler_output("\n--- Абстрактное Синтаксическое Дерево (AST) ---")
+            ast_printer = ASTPrinter()
+            ast_representation = ast_printer.get_representation(ast)
+            print_to_compiler_output(ast_representation)
+            print_to_compiler_output("---------------------------------------------")
+
+            if parallel_units and incremental_parser is None:
+                # Процедуры проверяются, переводятся в IR, оптимизируются и переводятся в NASM в отдельных процессах.
+                unit_compiler = ParallelCompiler(ast)
+                if not unit_compiler.compile():
+                    print_to_compiler_output("Компиляция по процедурам невозможна (ошибка в программе): последовательный режим.")
+                    unit_compiler = None
+
+            print_to_compiler_output("\n[Этап X] Семантический анализ...")
+            if unit_compiler is not None:
+                print_to_compiler_output(f"Семантический анализ успешно завершен (единиц компиляции: {len(unit_compiler.units)}, процессов: {unit_compiler.workers}).")
+                print_to_compiler_output(f"Свёртка констант: свёрнуто выражений: {unit_compiler.folded}.")
+                print_to_compiler_output("\n[Этап 3] Генерация промежуточного представления (IR)...")
+                ir_code = unit_compiler.ir_code
+                print_to_compiler_output("Генерация IR успешно завершена (по единицам компиляции).")
+            else:
+                sem_analyzer = SemanticAnalyzer()
+                sem_analyzer.analyze(ast)
+                print_to_compiler_output("Семантический анализ успешно завершен.")
+                symtab_for_nasm = sem_analyzer.symtab
+
+                if incremental_parser is None:
+                    constant_folder = ConstantFolder()
+                    ast = constant_folder.fold(ast)
+                    print_to_compiler_output(f"Свёртка констант: свёрнуто выражений: {constant_folder.folded}.")
+                else:
+                    # Свёрнутые значения констант устарели бы после правки их объявлений в другом месте текста.
+                    print_to_compiler_output("Свёртка констант пропущена: AST переиспользуется инкрементальным парсером.")
+
+                print_to_compiler_output("\n[Этап 3] Генерация промежуточного представления (IR)...")
+                ir_gen = IRGenerator()
+                ir_code = ir_gen.generate(ast)
+                print_to_compiler_output("Генерация IR успешно завершена.")
 
         print_to_compiler_output("\n--- Промежуточное представление (IR) ---")
         if ir_code:
@@ -82,8 +257,11 @@ def compile_and_run_pascal(source_code_str,
         print_to_compiler_output("--------------------------------------")
 
         print_to_compiler_output("\n[Этап 4] Оптимизация IR...")
-        optimizer = Optimizer(list(ir_code) if ir_code else [])
-        optimized_ir_code = optimizer.optimize()
+        if unit_compiler is not None:
+            optimized_ir_code = unit_compiler.optimized_ir_code
+        else:
+            optimizer = Optimizer(list(ir_code) if ir_code else [])
+            optimized_ir_code = optimizer.optimize()
         initial_ir_len = len(ir_code) if ir_code else 0
         optimized_ir_len = len(optimized_ir_code) if optimized_ir_code else 0
 
@@ -100,76 +278,15 @@ def compile_and_run_pascal(source_code_str,
             elif optimized_ir_code is None and ir_code is None:
                 optimized_ir_code = []
 
-        if optimized_ir_code:
-            print_to_compiler_output("\n[Этап 5a] Интерпретация...")
-            print_to_compiler_output(f"Вывод интерпретатора (операторы WRITE) будет направлен в: {interpreter_output_target_file}")
-            try:
-                interpreter_output_handle = open(interpreter_output_target_file, 'w', encoding='utf-8')
-                sys.stdout = interpreter_output_handle
-                interpreter = Interpreter(list(optimized_ir_code))
-                interpreter.run(original_stdout_ref=original_stdout, input_provider_func=gui_input_provider)
-                interpreter_successful = True
-                print_to_compiler_output(f"\nВыполнение интерпретатором завершено. Вывод в {interpreter_output_target_file}")
-            except InterpreterError as ie:
-                sys.stdout = original_stdout
-                print_to_compiler_output(f"\n--- Ошибка времени выполнения интерпретатора ---")
-                print_to_compiler_output(f"Ошибка: {str(ie)}")
-                interpreter_successful = False
-            except Exception as e_interp:
-                sys.stdout = original_stdout
-                print_to_compiler_output(f"\n--- Непредвиденная ошибка во время интерпретации ---")
-                print_to_compiler_output(f"Ошибка: {str(e_interp)}")
-                traceback.print_exc(file=COMPILER_STAGES_OUTPUT)
-                interpreter_successful = False
-            finally:
-                if interpreter_output_handle:
-                    interpreter_output_handle.close()
-                sys.stdout = original_stdout
-        else:
-            print_to_compiler_output("Нет IR-кода для интерпретации.")
-            interpreter_successful = False
+        if emit_ir_path is not None and optimized_ir_code:
+            write_ir_file(emit_ir_path, optimized_ir_code)
+            print_to_compiler_output(f"\nОптимизированный IR сохранён в {emit_ir_path}.")
 
-        if optimized_ir_code:
-            print_to_compiler_output("\n[Этап 5b] Генерация NASM-кода...")
-            try:
-                # symtab_ref = symtab_for_nasm if 'symtab_for_nasm' in locals() else None
-                nasm_generator = NASMGenerator(optimized_ir_code, symbol_table=None)
-                nasm_code_output_str = nasm_generator.generate()
-                print_to_compiler_output("Генерация NASM-кода успешно завершена.")
-
-                print_to_compiler_output("\n--- Сгенерированный NASM-код (фрагмент) ---")
-                nasm_lines_for_log = nasm_code_output_str.splitlines()
-                if len(nasm_lines_for_log) > 40:
-                    for line in nasm_lines_for_log[:20]: print_to_compiler_output(line)
-                    print_to_compiler_output("...")
-                    for line in nasm_lines_for_log[-20:]: print_to_compiler_output(line)
-                else:
-                    print_to_compiler_output(nasm_code_output_str)
-                print_to_compiler_output("-----------------------------------------")
-
-                print_to_compiler_output(f"\n[Этап 6] Ассемблирование NASM и компоновка EXE в: {exe_output_target_file}")
-                exe_dir = os.path.dirname(exe_output_target_file)
-                if exe_dir and not os.path.exists(exe_dir):
-                    os.makedirs(exe_dir, exist_ok=True)
-                    print_to_compiler_output(f"Создана директория для EXE: {exe_dir}")
-
-                compile_nasm_and_link_exe(nasm_code_output_str, exe_output_target_file)
-                print_to_compiler_output(f"Генерация EXE успешно завершена: {exe_output_target_file}")
-                exe_generation_successful = True
-            except (NASMGeneratorError, CompilationError) as nge_ce:
-                print_to_compiler_output(f"\n--- Ошибка генерации EXE ---")
-                print_to_compiler_output(f"Ошибка: {str(nge_ce)}")
-                exe_generation_successful = False
-            except Exception as e_nasm_link:
-                print_to_compiler_output(f"\n--- Непредвиденная ошибка во время генерации EXE ---")
-                print_to_compiler_output(f"Ошибка: {str(e_nasm_link)}")
-                traceback.print_exc(file=COMPILER_STAGES_OUTPUT)
-                exe_generation_successful = False
-        else:
-            print_to_compiler_output("Нет IR-кода для генерации NASM.")
-            exe_generation_successful = False
+        interpreter_successful, exe_generation_successful = _run_back_end(
+            optimized_ir_code, unit_compiler.nasm_code if unit_compiler is not None else None,
+            interpreter_output_target_file, exe_output_target_file, gui_input_provider)
 
-    except (LexerError, ParserError, IRGeneratorError, NASMGeneratorError, CompilationError) as e_compile: # SemanticError
+    except (LexerError, ParserError, IRGeneratorError, NASMGeneratorError, CompilationError, IRFileError) as e_compile: # SemanticError
         if sys.stdout != original_stdout: sys.stdout = original_stdout
         if interpreter_output_handle and not interpreter_output_handle.closed: interpreter_output_handle.close()
         error_message_str = f"\n--- Ошибка компиляции/генерации ---"
@@ -182,7 +299,7 @@ def compile_and_run_pascal(source_code_str,
         elif line_info is not None and column_info is not None: error_message_str += f"\nМестоположение: L{line_info}:C{column_info}"
         print_to_compiler_output(error_message_str)
         print(error_message_str, file=sys.stderr)
-        if not isinstance(e_compile, (LexerError, ParserError, IRGeneratorError, NASMGeneratorError, CompilationError)): # SemanticError
+        if not isinstance(e_compile, (LexerError, ParserError, IRGeneratorError, NASMGeneratorError, CompilationError, IRFileError)): # SemanticError
             traceback.print_exc(file=COMPILER_STAGES_OUTPUT)
             traceback.print_exc(file=sys.stderr)
         interpreter_successful = False
@@ -208,9 +325,93 @@ def compile_and_run_pascal(source_code_str,
     log_output = COMPILER_STAGES_OUTPUT.getvalue()
     return log_output, interpreter_successful, exe_generation_successful
 
+def compile_and_run_pascal_file(source_file_path,
+                                interpreter_output_target_file,
+                                exe_output_target_file,
+                                gui_input_provider=None,
+                                lexer_engine=DEFAULT_LEXER_ENGINE,
+                                incremental_parsers=None,
+                                parser_mode=DEFAULT_PARSER_MODE,
+                                parse_cache=None,
+                                single_pass=False,
+                                parallel_units=False,
+                                emit_ir_path=None):
+    if os.path.getsize(source_file_path) <= STREAMING_THRESHOLD_BYTES:
+        with open(source_file_path, 'r', encoding='utf-8') as f:
+            source_code = f.read()
+        if incremental_parsers is None or single_pass:
+            return compile_and_run_pascal(source_code, interpreter_output_target_file, exe_output_target_file,
+                                          gui_input_provider=gui_input_provider, lexer_engine=lexer_engine,
+                                          parser_mode=parser_mode, parse_cache=parse_cache,
+                                          single_pass=single_pass, parallel_units=parallel_units,
+                                          emit_ir_path=emit_ir_path)
+        # Токены и AST прошлой компиляции того же файла обновляются только в изменённом месте.
+        incremental_parser = incremental_parsers.get(source_file_path)
+        if incremental_parser is None or incremental_parser.parser_mode != parser_mode:
+            incremental_parser = incremental_parsers[source_file_path] = IncrementalParser(source_code, parser_mode)
+        return compile_and_run_pascal(source_code, interpreter_output_target_file, exe_output_target_file,
+                                      gui_input_provider=gui_input_provider,
+                                      incremental_parser=incremental_parser, emit_ir_path=emit_ir_path)
+    source_stream = open_source_stream(source_file_path)
+    try:
+        return compile_and_run_pascal(None, interpreter_output_target_file, exe_output_target_file,
+                                      gui_input_provider=gui_input_provider, source_stream=source_stream,
+                                      parser_mode=parser_mode, single_pass=single_pass,
+                                      parallel_units=parallel_units, emit_ir_path=emit_ir_path)
+    finally:
+        source_stream.close()
+
+def run_pascal_ir_file(ir_file_path,
+                       interpreter_output_target_file,
+                       exe_output_target_file,
+                       gui_input_provider=None):
+    # Готовый оптимизированный IR из файла .pir: лексер, парсер, анализ, генерация IR и оптимизатор не нужны.
+    global COMPILER_STAGES_OUTPUT
+    COMPILER_STAGES_OUTPUT = io.StringIO()
+    interpreter_successful = False
+    exe_generation_successful = False
+    try:
+        print_to_compiler_output("--- Запуск готового IR ---")
+        print_to_compiler_output(f"\n[Этап 1-4] Загрузка IR из {ir_file_path}...")
+        with load_ir_file(ir_file_path) as ir_file:
+            optimized_ir_code = ir_file.to_ir()
+            print_to_compiler_output(f"IR загружен: инструкций: {len(ir_file)}, процедур: {len(ir_file.procedures)}.")
+        print_to_compiler_output("\n--- Оптимизированный IR ---")
+        for i, instr in enumerate(optimized_ir_code):
+            print_to_compiler_output(f"{i:03d}: {instr}")
+        print_to_compiler_output("---------------------------")
+        interpreter_successful, exe_generation_successful = _run_back_end(
+            optimized_ir_code, None, interpreter_output_target_file, exe_output_target_file, gui_input_provider)
+    except (IRFileError, OSError) as e_load:
+        error_message_str = "\n--- Ошибка загрузки IR ---"
+        error_message_str += f"\nТип ошибки: {type(e_load).__name__}"
+        error_message_str += f"\nСообщение: {str(e_load)}"
+        print_to_compiler_output(error_message_str)
+        print(error_message_str, file=sys.stderr)
+    log_output = COMPILER_STAGES_OUTPUT.getvalue()
+    return log_output, interpreter_successful, exe_generation_successful
+
 if __name__ == '__main__':
+    # --single-pass: парсинг, семантический анализ и генерация IR за один проход, без полного AST.
+    single_pass = '--single-pass' in sys.argv
+    if single_pass:
+        sys.argv.remove('--single-pass')
+    # --parallel: проверка, IR, оптимизация и NASM по процедурам в нескольких процессах.
+    parallel_units = '--parallel' in sys.argv
+    if parallel_units:
+        sys.argv.remove('--parallel')
+    # --emit-ir <файл.pir>: сохранить оптимизированный IR; следующий запуск с этим файлом вместо .pas
+    # пропускает всю компиляцию до интерпретатора и NASM.
+    emit_ir_path = None
+    if '--emit-ir' in sys.argv:
+        flag_index = sys.argv.index('--emit-ir')
+        if flag_index + 1 >= len(sys.argv):
+            print(f"Ошибка: после --emit-ir нужен путь к файлу {IR_FILE_SUFFIX}", file=sys.stderr)
+            sys.exit(1)
+        emit_ir_path = sys.argv[flag_index + 1]
+        del sys.argv[flag_index:flag_index + 2]
     if len(sys.argv) not in [3, 4]:
-        print(f"Использование: python {sys.argv[0]} <входной_pas_файл> <выходной_файл_интерпретатора> [<выходной_exe_файл>]")
+        print(f"Использование: python {sys.argv[0]} [--single-pass] [--parallel] [--emit-ir <файл.pir>] <входной_pas_или_pir_файл> <выходной_файл_интерпретатора> [<выходной_exe_файл>]")
         sys.exit(1)
 
     source_file_path = sys.argv[1]
@@ -224,14 +425,24 @@ if __name__ == '__main__':
         print(f"Примечание: Путь для EXE не указан, используется по умолчанию '{exe_file_path_target}'")
 
     try:
-        with open(source_file_path, 'r', encoding='utf-8') as f:
-            pascal_source_code = f.read()
-        logs, interp_ok, exe_ok = compile_and_run_pascal(
-            pascal_source_code,
-            interpreter_output_file_path,
-            exe_file_path_target,
-            gui_input_provider=None
-        )
+        if source_file_path.endswith(IR_FILE_SUFFIX):
+            logs, interp_ok, exe_ok = run_pascal_ir_file(
+                source_file_path,
+                interpreter_output_file_path,
+                exe_file_path_target,
+                gui_input_provider=None
+            )
+        else:
+            logs, interp_ok, exe_ok = compile_and_run_pascal_file(
+                source_file_path,
+                interpreter_output_file_path,
+                exe_file_path_target,
+                gui_input_provider=None,
+                parse_cache=ParseCache.from_environment(),
+                single_pass=single_pass,
+                parallel_units=parallel_units,
+                emit_ir_path=emit_ir_path
+            )
         print("\n=== Подробный лог компилятора (из main_logic.py) ===")
         print(logs)
         print("=====================================================")
@@ -5,6 +5,13 @@ import struct
 class NASMGeneratorError(Exception):
     pass
 
+# Условный переход для CompareJump: (переход, если сравнение истинно; если ложно).
+# После fcompp/fstsw/sahf флаги как у беззнакового сравнения, отсюда отдельная таблица для REAL.
+_JCC_SIGNED = {'==': ('je', 'jne'), '!=': ('jne', 'je'), '<': ('jl', 'jge'),
+               '<=': ('jle', 'jg'), '>': ('jg', 'jle'), '>=': ('jge', 'jl')}
+_JCC_FLOAT = {'==': ('je', 'jne'), '!=': ('jne', 'je'), '<': ('jb', 'jae'),
+              '<=': ('jbe', 'ja'), '>': ('ja', 'jbe'), '>=': ('jae', 'jb')}
+
 class NASMGenerator:
     def __init__(self, ir_code, symbol_table=None):
         self.ir_code = ir_code
@@ -21,7 +28,7 @@ class NASMGenerator:
         self._next_float_lit_id = 0
         self._global_vars = set()
         self._proc_stack_info = {}
-        self._variable_type_hints = {}
+        self._operand_types = {}
 
     def _add_string_literal(self, value_str):
         if value_str not in self._string_literals_map:
@@ -42,92 +49,33 @@ class NASMGenerator:
             self.data_section_lines.append(f'  {label} dd 0x{hex_repr}')
         return self._float_literals_map[value_float]
 
-    def _get_scope_for_var(self, var_name, current_proc_name):
-        if not isinstance(var_name, str): return "__literal__"
-        if var_name.startswith('t') and current_proc_name: return current_proc_name
-        if current_proc_name:
-            proc_info = self._proc_stack_info.get(current_proc_name)
-            if proc_info and (var_name in proc_info['params'] or var_name in proc_info['locals_temps']):
-                return current_proc_name
-        if var_name in self._global_vars: return "__global__"
-        if var_name in self._string_literals_map.values() or var_name in self._float_literals_map.values():
-            return "__literal_label__"
-        if var_name.startswith('t') and not current_proc_name: return "__global_temp__"
-        return "__unknown__"
-
-    def _update_type_hint(self, var_name, type_str, current_proc_name_context):
-        scope_key = self._get_scope_for_var(var_name, current_proc_name_context)
-        if scope_key == "__unknown__" and var_name.startswith('t') and current_proc_name_context:
-            scope_key = current_proc_name_context
-        if scope_key not in ["__literal__", "__literal_label__", "__unknown__"]:
-            if scope_key not in self._variable_type_hints:
-                self._variable_type_hints[scope_key] = {}
-            self._variable_type_hints[scope_key][var_name] = type_str
+    def _record_operand_type(self, name, type_str, scope_key):
+        if type_str is not None and isinstance(name, str):
+            self._operand_types.setdefault(scope_key, {})[name] = type_str
 
-    def _get_type_hint(self, var_name, current_proc_name_context):
-        scope_key = self._get_scope_for_var(var_name, current_proc_name_context)
-        return self._variable_type_hints.get(scope_key, {}).get(var_name)
+    def _variable_scope(self, instr, current_proc_name):
+        address = instr.address
+        if address is not None and address[0] == 0: return "__global__"
+        return current_proc_name if current_proc_name else "__global__"
 
-    def _determine_operand_type(self, operand_name, current_proc_context, ir_instruction_index):
-        hint = self._get_type_hint(operand_name, current_proc_context)
-        if hint: return hint
-        if isinstance(operand_name, str) and operand_name.startswith('t'):
-            for k in range(ir_instruction_index - 1, -1, -1):
-                prev_instr = self.ir_code[k]
-                if hasattr(prev_instr, 'target') and prev_instr.target == operand_name:
-                    if isinstance(prev_instr, LoadConst):
-                        if isinstance(prev_instr.value, float): return 'REAL'
-                        if isinstance(prev_instr.value, int): return 'INTEGER'
-                        if isinstance(prev_instr.value, str): return 'STRING'
-                    if isinstance(prev_instr, BinOpIR):
-                        left_type = self._determine_operand_type(prev_instr.left, current_proc_context, k)
-                        right_type = self._determine_operand_type(prev_instr.right, current_proc_context, k)
-                        if prev_instr.op == '/' or left_type == 'REAL' or right_type == 'REAL': return 'REAL'
-                        return 'INTEGER'
-                    if isinstance(prev_instr, UnaryOpIR):
-                        op_type = self._determine_operand_type(prev_instr.operand, current_proc_context, k)
-                        if op_type == 'REAL' and prev_instr.op in ['+','-']: return 'REAL'
-                        return 'INTEGER'
-                    if isinstance(prev_instr, LoadVar):
-                        return self._determine_operand_type(prev_instr.source, current_proc_context, k)
-                    if isinstance(prev_instr, Call) and prev_instr.result_target == operand_name:
-                        return self._get_type_hint(operand_name, current_proc_context) or 'INTEGER'
-                    return None
-            return None
-        if isinstance(operand_name, str) and operand_name in self._float_literals_map.values(): return 'REAL'
-        if isinstance(operand_name, str) and operand_name in self._string_literals_map.values(): return 'STRING'
+    def _operand_type(self, operand_name, current_proc_name):
+        # Типы пришли из IR (IRGenerator): один проход в _pre_scan_ir, дальше поиск в словаре.
+        if isinstance(operand_name, Imm): return operand_name.type
+        if isinstance(operand_name, Var):
+            if operand_name.type is not None: return operand_name.type
+            operand_name = operand_name.name
+        proc_types = self._operand_types.get(current_proc_name)
+        if proc_types is not None:
+            operand_type = proc_types.get(operand_name)
+            if operand_type is not None: return operand_type
+        operand_type = self._operand_types.get("__global__", {}).get(operand_name)
+        if operand_type is not None: return operand_type
+        if operand_name in self._float_literals_map.values(): return 'REAL'
+        if operand_name in self._string_literals_map.values(): return 'STRING'
         return 'INTEGER'
 
-    def _is_float_operand_by_determined_type(self, operand_name, current_proc_context, ir_instruction_index):
-        determined_type = self._determine_operand_type(operand_name, current_proc_context, ir_instruction_index)
-        return determined_type == 'REAL'
-
-    def _infer_and_store_type_hint_for_target(self, target_var, source_instr, current_proc_context, ir_instruction_index):
-        inferred_type = None
-        if isinstance(source_instr, LoadConst):
-            if isinstance(source_instr.value, float): inferred_type = 'REAL'
-            elif isinstance(source_instr.value, int): inferred_type = 'INTEGER'
-            elif isinstance(source_instr.value, str): inferred_type = 'STRING'
-        elif isinstance(source_instr, BinOpIR):
-            left_type = self._determine_operand_type(source_instr.left, current_proc_context, ir_instruction_index -1)
-            right_type = self._determine_operand_type(source_instr.right, current_proc_context, ir_instruction_index -1)
-            if source_instr.op == '/' or left_type == 'REAL' or right_type == 'REAL':
-                inferred_type = 'REAL'
-            elif left_type == 'INTEGER' and right_type == 'INTEGER':
-                inferred_type = 'INTEGER'
-        elif isinstance(source_instr, UnaryOpIR):
-            op_type = self._determine_operand_type(source_instr.operand, current_proc_context, ir_instruction_index -1)
-            if op_type == 'REAL' and source_instr.op in ['+','-']: inferred_type = 'REAL'
-            elif op_type == 'INTEGER': inferred_type = 'INTEGER'
-        elif isinstance(source_instr, LoadVar):
-            inferred_type = self._determine_operand_type(source_instr.source, current_proc_context, ir_instruction_index -1)
-        elif isinstance(source_instr, Call) and source_instr.result_target == target_var :
-            pass
-
-        if inferred_type:
-            self._update_type_hint(target_var, inferred_type, current_proc_context)
-
     def _get_operand_address_syntax(self, operand_name, current_proc_name):
+        if isinstance(operand_name, Var): operand_name = operand_name.name
         proc_info = self._proc_stack_info.get(current_proc_name)
         if proc_info:
             if operand_name in proc_info['locals_temps']:
@@ -143,6 +91,13 @@ class NASMGenerator:
         raise NASMGeneratorError(f"_get_operand_address_syntax: No address for '{operand_name}' in '{current_proc_name}'.")
 
     def _get_operand_value_syntax(self, operand_name, current_proc_name):
+        if isinstance(operand_name, Imm):
+            # Непосредственный операнд: целое - число, строка - адрес литерала SL*, вещественное - ячейка FL*.
+            value = operand_name.value
+            if isinstance(value, str): return self._string_literals_map[value]
+            if isinstance(value, float): return f"[{self._float_literals_map[value]}]"
+            return str(int(value))
+        if isinstance(operand_name, Var): operand_name = operand_name.name
         try:
             return str(int(operand_name))
         except ValueError:
@@ -160,12 +115,33 @@ class NASMGenerator:
         except NASMGeneratorError:
             raise NASMGeneratorError(f"_get_operand_value_syntax: Unknown operand '{operand_name}' in '{current_proc_name}'.")
 
+    def _fild_lines(self, operand, val_syn):
+        # fild не принимает непосредственный операнд: целая константа загружается через стек.
+        if isinstance(operand, Imm):
+            return [f"    push dword {val_syn}", "    fild dword [esp]", "    add esp, 4"]
+        return [f"    fild dword {val_syn}"]
+
+    def _instruction_literals(self, instr):
+        # Строковые и вещественные литералы инструкции в порядке появления: LoadConst и операнды Imm.
+        if isinstance(instr, LoadConst):
+            if isinstance(instr.value, (str, float)): yield instr.value
+            return
+        for operand in read_operands(instr):
+            if isinstance(operand, Imm) and isinstance(operand.value, (str, float)):
+                yield operand.value
+
     def _pre_scan_ir(self):
+        self._operand_types.clear()
+        defined_in_any_proc_scope = self._scan_procedures(self.ir_code)
+        proc_labels = {info.proc_name for info in self.ir_code if isinstance(info, EnterProc)}
+        addressed_globals, candidates = self._scan_global_candidates(self.ir_code)
+        self._global_vars = self._resolve_global_vars(addressed_globals, candidates, defined_in_any_proc_scope, proc_labels)
+
+    def _scan_procedures(self, code):
+        # Кадры процедур, типы операндов и литералы; возвращает имена, которые присваиваются внутри процедур.
         current_proc_name_scan = None
         defined_in_any_proc_scope = set()
-        proc_labels = {info.proc_name for info in self.ir_code if isinstance(info, EnterProc)}
-        self._variable_type_hints.clear()
-        for ir_idx_scan, instr_scan in enumerate(self.ir_code):
+        for instr_scan in code:
             if isinstance(instr_scan, EnterProc):
                 current_proc_name_scan = instr_scan.proc_name
                 self._proc_stack_info[current_proc_name_scan] = {
@@ -174,17 +150,21 @@ class NASMGenerator:
                 }
                 defined_in_any_proc_scope.update(instr_scan.param_names)
             current_context_for_infer = current_proc_name_scan if current_proc_name_scan else "__global__"
-            if hasattr(instr_scan, 'target') and isinstance(instr_scan.target, str):
-                self._infer_and_store_type_hint_for_target(instr_scan.target, instr_scan, current_context_for_infer, ir_idx_scan)
-            if hasattr(instr_scan, 'result_target') and isinstance(instr_scan.result_target, str) and isinstance(instr_scan, Call):
-                self._infer_and_store_type_hint_for_target(instr_scan.result_target, instr_scan, current_context_for_infer, ir_idx_scan)
-            if isinstance(instr_scan, StoreVar):
-                source_type_for_store = self._determine_operand_type(instr_scan.source, current_context_for_infer, ir_idx_scan)
-                if source_type_for_store:
-                    self._update_type_hint(instr_scan.target, source_type_for_store, current_context_for_infer)
-            if isinstance(instr_scan, ReadIR):
-                if not self._get_type_hint(instr_scan.target_var, current_context_for_infer):
-                    self._update_type_hint(instr_scan.target_var, 'INTEGER', current_context_for_infer)
+            if isinstance(instr_scan, EnterProc):
+                for param_name, param_type in zip(instr_scan.param_names, instr_scan.param_types):
+                    self._record_operand_type(param_name, param_type, current_context_for_infer)
+            elif isinstance(instr_scan, (LoadConst, LoadVar, BinOpIR, UnaryOpIR)):
+                self._record_operand_type(instr_scan.target, instr_scan.type, current_context_for_infer)
+                if isinstance(instr_scan, LoadVar):
+                    self._record_operand_type(instr_scan.source, instr_scan.type,
+                                              self._variable_scope(instr_scan, current_proc_name_scan))
+            elif isinstance(instr_scan, StoreVar):
+                store_type = instr_scan.type or self._operand_type(instr_scan.source, current_context_for_infer)
+                self._record_operand_type(instr_scan.target, store_type,
+                                          self._variable_scope(instr_scan, current_proc_name_scan))
+            elif isinstance(instr_scan, ReadIR):
+                self._record_operand_type(instr_scan.target_var, instr_scan.type or 'INTEGER',
+                                          self._variable_scope(instr_scan, current_proc_name_scan))
             if current_proc_name_scan:
                 proc_info = self._proc_stack_info[current_proc_name_scan]
                 target_name_to_check = None
@@ -194,6 +174,9 @@ class NASMGenerator:
                     target_name_to_check = instr_scan.result_target
                 elif isinstance(instr_scan, ReadIR) and isinstance(instr_scan.target_var, str):
                     target_name_to_check = instr_scan.target_var
+                if isinstance(instr_scan, (StoreVar, ReadIR)) and \
+                        instr_scan.address is not None and instr_scan.address[0] == 0:
+                    target_name_to_check = None
                 if target_name_to_check and \
                         target_name_to_check not in proc_info['params'] and \
                         target_name_to_check not in proc_info['locals_temps']:
@@ -202,41 +185,113 @@ class NASMGenerator:
                     proc_info['frame_size'] += 4
                     if not target_name_to_check.startswith('t'):
                         defined_in_any_proc_scope.add(target_name_to_check)
-            if isinstance(instr_scan, LoadConst):
-                if isinstance(instr_scan.value, str): self._add_string_literal(instr_scan.value)
-                elif isinstance(instr_scan.value, float): self._add_float_literal(instr_scan.value)
+            for operand in read_operands(instr_scan):
+                if isinstance(operand, Var):
+                    self._record_operand_type(operand.name, operand.type,
+                                              self._variable_scope(operand, current_proc_name_scan))
+            self._add_literals(self._instruction_literals(instr_scan))
             if isinstance(instr_scan, ExitProc): current_proc_name_scan = None
-        potential_globals = set()
-        fmt_strings = {"fmt_int_write", "fmt_str_write", "fmt_newline", "fmt_int_read", "fmt_float_write", "fmt_float_read"}
-        for instr in self.ir_code:
+        return defined_in_any_proc_scope
+
+    def _scan_global_candidates(self, code):
+        # Переменные с адресом уровня 0 - глобальные, даже если им присваивают внутри процедуры.
+        # Остальные имена операндов - кандидаты в глобальные (IR без адресов).
+        addressed_globals = set()
+        candidates = set()
+        for instr in code:
+            address = getattr(instr, 'address', None)
+            if address is not None and address[0] == 0:
+                if isinstance(instr, LoadVar): addressed_globals.add(instr.source)
+                elif isinstance(instr, StoreVar): addressed_globals.add(instr.target)
+                elif isinstance(instr, ReadIR): addressed_globals.add(instr.target_var)
             operands_to_check = []
             if isinstance(instr, LoadVar): operands_to_check.append(instr.source)
-            if isinstance(instr, StoreVar): operands_to_check.extend([instr.source, instr.target])
+            if isinstance(instr, StoreVar): operands_to_check.append(instr.target)
             if isinstance(instr, ReadIR): operands_to_check.append(instr.target_var)
-            if isinstance(instr, BinOpIR): operands_to_check.extend([instr.left, instr.right])
-            if isinstance(instr, UnaryOpIR): operands_to_check.append(instr.operand)
-            if isinstance(instr, CondJump): operands_to_check.append(instr.condition_var)
-            if isinstance(instr, WriteIR): operands_to_check.append(instr.source_var)
-            if isinstance(instr, Call): operands_to_check.extend(instr.args)
             if hasattr(instr, 'result_target') and instr.result_target: operands_to_check.append(instr.result_target)
+            for operand in read_operands(instr):
+                if isinstance(operand, Var):
+                    if operand.address is not None and operand.address[0] == 0:
+                        addressed_globals.add(operand.name)
+                    operands_to_check.append(operand.name)
+                elif not isinstance(operand, Imm):
+                    operands_to_check.append(operand)
             for op_name in operands_to_check:
-                if isinstance(op_name, str) and \
-                        not op_name.startswith('t') and \
-                        op_name not in defined_in_any_proc_scope and \
-                        op_name not in proc_labels and \
-                        op_name not in self._string_literals_map.values() and \
-                        op_name not in self._float_literals_map.values() and \
-                        op_name not in fmt_strings:
+                if isinstance(op_name, str) and not op_name.startswith('t'):
                     try: int(op_name); continue
                     except ValueError:
                         try: float(op_name); continue
-                        except ValueError: potential_globals.add(op_name)
-        self._global_vars = potential_globals
+                        except ValueError: candidates.add(op_name)
+        return addressed_globals, candidates
+
+    def _resolve_global_vars(self, addressed_globals, candidates, defined_in_any_proc_scope, proc_labels):
+        fmt_strings = {"fmt_int_write", "fmt_str_write", "fmt_newline", "fmt_int_read", "fmt_float_write", "fmt_float_read"}
+        string_labels = set(self._string_literals_map.values())
+        float_labels = set(self._float_literals_map.values())
+        potential_globals = {op_name for op_name in candidates
+                             if op_name not in defined_in_any_proc_scope and
+                             op_name not in proc_labels and
+                             op_name not in string_labels and
+                             op_name not in float_labels and
+                             op_name not in fmt_strings}
+        return potential_globals | addressed_globals
 
     def generate(self):
         self._reset_state()
         self._pre_scan_ir()
+        self._begin_sections()
+        self._emit_text(self.ir_code)
+        return self._join_sections()
+
+    # Раздельная генерация (parallel_compiler): ir_code - одна единица компиляции.
+    # Единицы сканируются независимо (scan_unit), глобальные переменные и литералы
+    # собираются по всей программе (resolve_unit_globals), код каждой единицы строится
+    # отдельно (generate_unit_text), затем секции склеиваются (assemble_units).
+    # Результат совпадает с generate() для всей программы.
+
+    def scan_unit(self):
+        self._reset_state()
+        defined_in_any_proc_scope = self._scan_procedures(self.ir_code)
+        addressed_globals, candidates = self._scan_global_candidates(self.ir_code)
+        proc_names = [instr.proc_name for instr in self.ir_code if isinstance(instr, EnterProc)]
+        literals = list(dict.fromkeys(value for instr in self.ir_code for value in self._instruction_literals(instr)))
+        return defined_in_any_proc_scope, addressed_globals, candidates, proc_names, literals
+
+    def resolve_unit_globals(self, literals, unit_scans):
+        # Литералы и глобальные переменные всей программы: их таблицы нужны generate_unit_text.
+        self._reset_state()
+        self._add_literals(literals)
+        addressed_globals, candidates, defined_in_any_proc_scope, proc_labels = set(), set(), set(), set()
+        for defined, addressed, unit_candidates, proc_names, _ in unit_scans:
+            defined_in_any_proc_scope |= defined
+            addressed_globals |= addressed
+            candidates |= unit_candidates
+            proc_labels.update(proc_names)
+        self._global_vars = self._resolve_global_vars(addressed_globals, candidates, defined_in_any_proc_scope, proc_labels)
+        return self._global_vars
+
+    def generate_unit_text(self, start_index, string_literals, float_literals, global_vars):
+        self._reset_state()
+        self._string_literals_map = string_literals
+        self._float_literals_map = float_literals
+        self._global_vars = global_vars
+        self._scan_procedures(self.ir_code)
+        self._emit_text(self.ir_code, start_index)
+        return self.text_section_lines
 
+    def assemble_units(self, unit_texts):
+        # После resolve_unit_globals: секции данных из его таблиц, код - из generate_unit_text.
+        self._begin_sections()
+        for lines in unit_texts:
+            self.text_section_lines.extend(lines)
+        return self._join_sections()
+
+    def _add_literals(self, literals):
+        for value in literals:
+            if isinstance(value, str): self._add_string_literal(value)
+            else: self._add_float_literal(value)
+
+    def _begin_sections(self):
         self.data_section_lines.insert(0, '  fmt_float_read db "%lf", 0')
         self.data_section_lines.insert(0, '  fmt_float_write db "%.6g", 0')
         self.data_section_lines.insert(0, '  fmt_int_read db "%d", 0')
@@ -245,17 +300,29 @@ class NASMGenerator:
         self.data_section_lines.insert(0, '  fmt_int_write db "%d", 0')
         self.data_section_lines.insert(0, "SECTION .data")
 
+        # Порядок .bss не зависит от порядка обхода множества (хеши строк случайны между запусками).
         self.bss_section_lines.append("SECTION .bss")
-        for g_var in self._global_vars:
+        for g_var in sorted(self._global_vars):
             self.bss_section_lines.append(f'  {g_var} resd 1')
 
         self.text_section_lines.append("SECTION .text")
         self.text_section_lines.append("  global _main")
         self.text_section_lines.append("  extern _printf, _scanf, _exit")
 
+    def _join_sections(self):
+        full_nasm_code = []
+        full_nasm_code.extend(self.data_section_lines)
+        full_nasm_code.append("")
+        full_nasm_code.extend(self.bss_section_lines)
+        full_nasm_code.append("")
+        full_nasm_code.extend(self.text_section_lines)
+        return "\n".join(full_nasm_code)
+
+    def _emit_text(self, code, start_index=0):
+        # start_index - номер первой инструкции code во всей программе (метки DIV_* строятся по нему).
         current_proc_name = None
 
-        for ir_idx, instr in enumerate(self.ir_code):
+        for ir_idx, instr in enumerate(code, start_index):
             if isinstance(instr, Label):
                 self.text_section_lines.append(f"{instr.name}:")
             elif isinstance(instr, EnterProc):
@@ -290,10 +357,14 @@ class NASMGenerator:
                 target_op_name = instr.target
                 src_val_syn = self._get_operand_value_syntax(source_op_name, current_proc_name)
                 trg_val_syn = self._get_operand_value_syntax(target_op_name, current_proc_name)
-                is_float_op = self._is_float_operand_by_determined_type(source_op_name, current_proc_name, ir_idx)
-                if is_float_op:
+                source_type = self._operand_type(source_op_name, current_proc_name)
+                if source_type == 'REAL':
                     self.text_section_lines.append(f"    fld dword {src_val_syn}")
                     self.text_section_lines.append(f"    fstp dword {trg_val_syn}")
+                elif isinstance(instr, StoreVar) and instr.type == 'REAL':
+                    # INTEGER в переменную REAL: преобразование через FPU.
+                    self.text_section_lines.extend(self._fild_lines(source_op_name, src_val_syn))
+                    self.text_section_lines.append(f"    fstp dword {trg_val_syn}")
                 else:
                     self.text_section_lines.append(f"    mov eax, {src_val_syn}")
                     self.text_section_lines.append(f"    mov {trg_val_syn}, eax")
@@ -303,20 +374,20 @@ class NASMGenerator:
                 right_op_name = instr.right
                 left_val_syn = self._get_operand_value_syntax(left_op_name, current_proc_name)
                 right_val_syn = self._get_operand_value_syntax(right_op_name, current_proc_name)
-                left_type = self._determine_operand_type(left_op_name, current_proc_name, ir_idx)
-                right_type = self._determine_operand_type(right_op_name, current_proc_name, ir_idx)
+                left_type = self._operand_type(left_op_name, current_proc_name)
+                right_type = self._operand_type(right_op_name, current_proc_name)
                 op_produces_float = (instr.op == '/') or (left_type == 'REAL') or (right_type == 'REAL')
                 if instr.op in ['+', '-', '*', '/'] and op_produces_float:
                     if left_type == 'REAL':
                         self.text_section_lines.append(f"    fld dword {left_val_syn}")
                     elif left_type == 'INTEGER':
-                        self.text_section_lines.append(f"    fild dword {left_val_syn}")
+                        self.text_section_lines.extend(self._fild_lines(left_op_name, left_val_syn))
                     else:
                         self.text_section_lines.append(f"    fldz")
                     if right_type == 'REAL':
                         self.text_section_lines.append(f"    fld dword {right_val_syn}")
                     elif right_type == 'INTEGER':
-                        self.text_section_lines.append(f"    fild dword {right_val_syn}")
+                        self.text_section_lines.extend(self._fild_lines(right_op_name, right_val_syn))
                     else:
                         self.text_section_lines.append(f"    fldz")
                     if instr.op == '+': self.text_section_lines.append("    faddp st1, st0")
@@ -363,7 +434,7 @@ class NASMGenerator:
             elif isinstance(instr, UnaryOpIR):
                 operand_val_syn = self._get_operand_value_syntax(instr.operand, current_proc_name)
                 target_val_syn = self._get_operand_value_syntax(instr.target, current_proc_name)
-                op_is_float = self._is_float_operand_by_determined_type(instr.operand, current_proc_name, ir_idx)
+                op_is_float = self._operand_type(instr.operand, current_proc_name) == 'REAL'
                 if instr.op == '-' and op_is_float:
                     self.text_section_lines.append(f"    fld dword {operand_val_syn}")
                     self.text_section_lines.append(f"    fchs")
@@ -383,12 +454,40 @@ class NASMGenerator:
                 self.text_section_lines.append(f"    mov eax, {cond_val_syn}")
                 self.text_section_lines.append(f"    test eax, eax")
                 self.text_section_lines.append(f"    jz {instr.false_label_name}")
+            elif isinstance(instr, CondJumpTrue):
+                cond_val_syn = self._get_operand_value_syntax(instr.condition_var, current_proc_name)
+                self.text_section_lines.append(f"    mov eax, {cond_val_syn}")
+                self.text_section_lines.append(f"    test eax, eax")
+                self.text_section_lines.append(f"    jnz {instr.true_label_name}")
+            elif isinstance(instr, CompareJump):
+                left_val_syn = self._get_operand_value_syntax(instr.left, current_proc_name)
+                right_val_syn = self._get_operand_value_syntax(instr.right, current_proc_name)
+                left_type = self._operand_type(instr.left, current_proc_name)
+                right_type = self._operand_type(instr.right, current_proc_name)
+                if left_type == 'REAL' or right_type == 'REAL':
+                    # st0 = левый, st1 = правый; fcompp снимает оба.
+                    for operand, val_syn, operand_type in ((instr.right, right_val_syn, right_type),
+                                                           (instr.left, left_val_syn, left_type)):
+                        if operand_type == 'REAL':
+                            self.text_section_lines.append(f"    fld dword {val_syn}")
+                        else:
+                            self.text_section_lines.extend(self._fild_lines(operand, val_syn))
+                    self.text_section_lines.append("    fcompp")
+                    self.text_section_lines.append("    fstsw ax")
+                    self.text_section_lines.append("    sahf")
+                    jcc_map = _JCC_FLOAT
+                else:
+                    self.text_section_lines.append(f"    mov eax, {left_val_syn}")
+                    self.text_section_lines.append(f"    cmp eax, {right_val_syn}")
+                    jcc_map = _JCC_SIGNED
+                jump_on_true, jump_on_false = jcc_map[instr.op]
+                self.text_section_lines.append(f"    {jump_on_true if instr.jump_if else jump_on_false} {instr.label_name}")
             elif isinstance(instr, Call):
                 num_args_pushed_bytes = 0
                 if instr.args:
                     for arg_temp_name in reversed(instr.args):
                         arg_val_syn = self._get_operand_value_syntax(arg_temp_name, current_proc_name)
-                        is_float_arg = self._is_float_operand_by_determined_type(arg_temp_name, current_proc_name, ir_idx)
+                        is_float_arg = self._operand_type(arg_temp_name, current_proc_name) == 'REAL'
                         if is_float_arg:
                             self.text_section_lines.append(f"    fld dword {arg_val_syn}")
                             self.text_section_lines.append(f"    sub esp, 8")
@@ -403,12 +502,11 @@ class NASMGenerator:
                     self.text_section_lines.append(f"    add esp, {num_args_pushed_bytes}")
                 if instr.result_target:
                     res_target_val_syn = self._get_operand_value_syntax(instr.result_target, current_proc_name)
-                    is_float_return = self._get_type_hint(instr.result_target, current_proc_name) == 'REAL'
+                    is_float_return = self._operand_type(instr.result_target, current_proc_name) == 'REAL'
                     if is_float_return:
                         self.text_section_lines.append(f"    fstp dword {res_target_val_syn}")
                     else:
                         self.text_section_lines.append(f"    mov {res_target_val_syn}, eax")
-                    self._update_type_hint(instr.result_target, 'REAL' if is_float_return else 'INTEGER', current_proc_name)
             elif isinstance(instr, Return):
                 if current_proc_name == "__main_start":
                     self.text_section_lines.append("    push 0")
@@ -416,7 +514,7 @@ class NASMGenerator:
                 elif current_proc_name:
                     if instr.value_source_operand:
                         ret_val_syn = self._get_operand_value_syntax(instr.value_source_operand, current_proc_name)
-                        is_float_ret = self._is_float_operand_by_determined_type(instr.value_source_operand, current_proc_name, ir_idx)
+                        is_float_ret = self._operand_type(instr.value_source_operand, current_proc_name) == 'REAL'
                         if is_float_ret:
                             self.text_section_lines.append(f"    fld dword {ret_val_syn}")
                         else:
@@ -425,22 +523,18 @@ class NASMGenerator:
                 else: self.text_section_lines.append("    ; ERR: Return outside procedure context")
             elif isinstance(instr, ReadIR):
                 var_addr_syn_no_brackets = self._get_operand_address_syntax(instr.target_var, current_proc_name)
-                is_reading_float = self._get_type_hint(instr.target_var, current_proc_name) == 'REAL'
+                is_reading_float = self._operand_type(instr.target_var, current_proc_name) == 'REAL'
                 self.text_section_lines.append(f"    lea eax, [{var_addr_syn_no_brackets}]")
                 self.text_section_lines.append(f"    push eax")
                 format_str_label = "fmt_float_read" if is_reading_float else "fmt_int_read"
                 self.text_section_lines.append(f"    push {format_str_label}")
                 self.text_section_lines.append(f"    call _scanf")
                 self.text_section_lines.append(f"    add esp, 8")
-                self._update_type_hint(instr.target_var, 'REAL' if is_reading_float else 'INTEGER', current_proc_name)
             elif isinstance(instr, WriteIR):
                 source_val_syn = self._get_operand_value_syntax(instr.source_var, current_proc_name)
-                is_float_val = self._is_float_operand_by_determined_type(instr.source_var, current_proc_name, ir_idx)
-                is_string_val = False
-                if not is_float_val:
-                    if (isinstance(instr.source_var, str) and instr.source_var.startswith("SL") and instr.source_var in self._string_literals_map.values()) or \
-                            self._get_type_hint(instr.source_var, current_proc_name) == 'STRING':
-                        is_string_val = True
+                source_type = self._operand_type(instr.source_var, current_proc_name)
+                is_float_val = source_type == 'REAL'
+                is_string_val = source_type == 'STRING'
                 stack_cleanup_size = 8
                 if is_string_val:
                     self.text_section_lines.append(f"    push dword {source_val_syn}")
@@ -459,12 +553,4 @@ class NASMGenerator:
             elif isinstance(instr, NoOp):
                 self.text_section_lines.append("    nop")
             else:
-                self.text_section_lines.append(f"    ; ERR: Unknown IR: {type(instr).__name__}")
-
-        full_nasm_code = []
-        full_nasm_code.extend(self.data_section_lines)
-        full_nasm_code.append("")
-        full_nasm_code.extend(self.bss_section_lines)
-        full_nasm_code.append("")
-        full_nasm_code.extend(self.text_section_lines)
-        return "\n".join(full_nasm_code)
\ No newline at end of file
+                self.text_section_lines.append(f"    ; ERR: Unknown IR: {type(instr).__name__}")
\ No newline at end of file
@@ -3,9 +3,14 @@
 from intermediate_rep import *
 
 class Optimizer:
-    def __init__(self, ir_code):
+    def __init__(self, ir_code, external_labels=(), starts_unreachable=False):
+        # Для части программы (единица компиляции parallel_compiler): external_labels - метки,
+        # на которые переходят из других частей (вызываемые процедуры); starts_unreachable -
+        # код перед частью заканчивается RETURN, и начало части до первой активной метки недостижимо.
         self.ir_code = ir_code
         self.optimized_code = []
+        self.external_labels = set(external_labels)
+        self.starts_unreachable = starts_unreachable
 
     def optimize(self):
         if not self.ir_code:
@@ -22,19 +27,28 @@ class Optimizer:
             passes += 1
             previous_code_str = current_code_str
 
+            # Временная с одним определением: результат AND/OR вне условия записывается
+            # двумя LoadConst в разных ветвях, и его значение заранее не известно.
+            definitions = {}
+            for instr_scan in optimized_pass_code:
+                if isinstance(instr_scan, (LoadConst, LoadVar, BinOpIR, UnaryOpIR)):
+                    definitions[instr_scan.target] = definitions.get(instr_scan.target, 0) + 1
             known_constants_this_pass = {}
             for instr_scan in optimized_pass_code:
-                if isinstance(instr_scan, LoadConst):
+                if isinstance(instr_scan, LoadConst) and definitions[instr_scan.target] == 1:
                     known_constants_this_pass[instr_scan.target] = instr_scan.value
 
             temp_code_after_folding = []
             for instr in optimized_pass_code:
                 folded_instr = self._try_fold_instruction(instr, known_constants_this_pass)
                 temp_code_after_folding.append(folded_instr)
-                if isinstance(folded_instr, LoadConst) and folded_instr is not instr:
+                if isinstance(folded_instr, LoadConst) and folded_instr is not instr and \
+                        definitions[folded_instr.target] == 1:
                     known_constants_this_pass[folded_instr.target] = folded_instr.value
 
-            optimized_pass_code = temp_code_after_folding
+            optimized_pass_code = [self._propagate_constants(instr, known_constants_this_pass)
+                                   for instr in temp_code_after_folding]
+            optimized_pass_code = self._remove_unused_constants(optimized_pass_code)
             optimized_pass_code = self._dead_code_elimination(optimized_pass_code)
 
             current_code_str = self._code_to_str(optimized_pass_code)
@@ -42,7 +56,10 @@ class Optimizer:
                 break
 
         self.optimized_code = optimized_pass_code
+        self.report()
+        return self.optimized_code
 
+    def report(self):
         initial_ir_str = self._code_to_str(self.ir_code)
         final_optimized_ir_str = self._code_to_str(self.optimized_code)
 
@@ -51,25 +68,16 @@ class Optimizer:
         else:
             print("[Optimizer] Optimization complete.")
 
-        return self.optimized_code
-
     def _code_to_str(self, code_list):
         return "\n".join(map(str, code_list))
 
-    def _is_literal_value(self, val):
-        return isinstance(val, (int, float, bool, str))
-
-    def _get_value_if_const(self, operand_name_or_literal, constants_map):
-        if isinstance(operand_name_or_literal, str) and operand_name_or_literal in constants_map:
-            return constants_map[operand_name_or_literal]
-
-        if self._is_literal_value(operand_name_or_literal):
-            if isinstance(operand_name_or_literal, str) and \
-                    operand_name_or_literal.startswith('t') and \
-                    operand_name_or_literal[1:].isdigit():
-                return None
-            return operand_name_or_literal
-
+    def _get_value_if_const(self, operand, constants_map):
+        # Константа - операнд Imm или временная переменная, в которую записан LoadConst.
+        # Прочие строки - имена переменных, а не строковые литералы.
+        if isinstance(operand, Imm):
+            return operand.value
+        if isinstance(operand, str):
+            return constants_map.get(operand)
         return None
 
     def _try_fold_instruction(self, instr, known_constants):
@@ -126,7 +134,7 @@ class Optimizer:
                     elif op == 'OR': result = bool(left_value) or bool(right_value)
 
                     if result is not None:
-                        return LoadConst(instr.target, result)
+                        return LoadConst(instr.target, result, instr.type)
                 except (TypeError, ZeroDivisionError):
                     return instr
         elif isinstance(instr, UnaryOpIR):
@@ -142,7 +150,7 @@ class Optimizer:
                     elif op == 'NOT':
                         result = not bool(operand_value)
                     if result is not None:
-                        return LoadConst(instr.target, result)
+                        return LoadConst(instr.target, result, instr.type)
                 except TypeError:
                     return instr
         elif isinstance(instr, CondJump):
@@ -152,9 +160,77 @@ class Optimizer:
                     return NoOp()
                 else:
                     return Jump(instr.false_label_name)
+        elif isinstance(instr, CondJumpTrue):
+            cond_value = self._get_value_if_const(instr.condition_var, known_constants)
+            if cond_value is not None:
+                if bool(cond_value):
+                    return Jump(instr.true_label_name)
+                else:
+                    return NoOp()
+        elif isinstance(instr, CompareJump):
+            # Сравнение сворачивается по тем же правилам, что и BinOpIR.
+            comparison = BinOpIR(None, instr.op, instr.left, instr.right, IR_BOOLEAN)
+            folded = self._try_fold_instruction(comparison, known_constants)
+            if isinstance(folded, LoadConst):
+                if bool(folded.value) == instr.jump_if:
+                    return Jump(instr.label_name)
+                else:
+                    return NoOp()
 
         return instr
 
+    def _constant_operand(self, operand, known_constants):
+        if isinstance(operand, str) and operand in known_constants:
+            return Imm(known_constants[operand])
+        return operand
+
+    def _propagate_constants(self, instr, known_constants):
+        # Временная переменная с известным значением заменяется операндом Imm прямо в инструкции;
+        # сама LoadConst после этого никем не читается и удаляется. Инструкции не меняются на месте:
+        # исходный IR печатается и используется дальше.
+        imm = lambda operand: self._constant_operand(operand, known_constants)
+        if isinstance(instr, BinOpIR):
+            left, right = imm(instr.left), imm(instr.right)
+            if left is not instr.left or right is not instr.right:
+                return BinOpIR(instr.target, instr.op, left, right, instr.type)
+        elif isinstance(instr, UnaryOpIR):
+            operand = imm(instr.operand)
+            if operand is not instr.operand:
+                return UnaryOpIR(instr.target, instr.op, operand, instr.type)
+        elif isinstance(instr, StoreVar):
+            source = imm(instr.source)
+            if source is not instr.source:
+                return StoreVar(instr.target, source, instr.address, instr.type)
+        elif isinstance(instr, CondJump):
+            condition = imm(instr.condition_var)
+            if condition is not instr.condition_var:
+                return CondJump(condition, instr.false_label_name)
+        elif isinstance(instr, CondJumpTrue):
+            condition = imm(instr.condition_var)
+            if condition is not instr.condition_var:
+                return CondJumpTrue(condition, instr.true_label_name)
+        elif isinstance(instr, CompareJump):
+            left, right = imm(instr.left), imm(instr.right)
+            if left is not instr.left or right is not instr.right:
+                return CompareJump(left, instr.op, right, instr.label_name, instr.jump_if)
+        elif isinstance(instr, WriteIR):
+            source = imm(instr.source_var)
+            if source is not instr.source_var:
+                return WriteIR(source)
+        elif isinstance(instr, Call):
+            args = [imm(arg) for arg in instr.args]
+            if any(arg is not old_arg for arg, old_arg in zip(args, instr.args)):
+                return Call(instr.proc_name, args, instr.result_target)
+        return instr
+
+    def _remove_unused_constants(self, code):
+        read = {operand for instr in code for operand in read_operands(instr) if isinstance(operand, str)}
+        return [instr for instr in code
+                if not (isinstance(instr, LoadConst) and self._is_temp(instr.target) and instr.target not in read)]
+
+    def _is_temp(self, name):
+        return isinstance(name, str) and name.startswith('t') and name[1:].isdigit()
+
     def _dead_code_elimination(self, code):
         code_no_noop = [instr for instr in code if not isinstance(instr, NoOp)]
         active_labels = set()
@@ -163,10 +239,18 @@ class Optimizer:
             if isinstance(instr, Label): label_positions[instr.name] = i
             elif isinstance(instr, Jump): active_labels.add(instr.label_name)
             elif isinstance(instr, CondJump): active_labels.add(instr.false_label_name)
+            elif isinstance(instr, CondJumpTrue): active_labels.add(instr.true_label_name)
+            elif isinstance(instr, CompareJump): active_labels.add(instr.label_name)
             elif isinstance(instr, Call): active_labels.add(instr.proc_name)
         if "__main_start" in label_positions: active_labels.add("__main_start")
+        active_labels |= self.external_labels
         new_code_pass1 = []
         i = 0
+        if self.starts_unreachable:
+            while i < len(code_no_noop):
+                next_instr = code_no_noop[i]
+                if isinstance(next_instr, Label) and next_instr.name in active_labels: break
+                i += 1
         while i < len(code_no_noop):
             instr = code_no_noop[i]; new_code_pass1.append(instr)
             if isinstance(instr, (Jump, Return)):
@@ -0,0 +1,284 @@
+# parallel_compiler.py
+import contextlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from ast_nodes import *
+from ast_cache import dump_ast, load_ast
+from ast_walker import iter_child_nodes
+from lexer import T_AND, T_OR, T_NOT
+from semantic_analyzer import SemanticAnalyzer
+from symbol_table import SymbolTable
+from constant_folder import ConstantFolder
+from ir_generator import IRGenerator, RELATIONAL_OPS
+from intermediate_rep import Label, EnterProc, Call
+from optimizer import Optimizer
+from nasm_generator import NASMGenerator
+
+DEFAULT_BATCHES_PER_WORKER = 4
+
+MAIN_LABEL = "__main_start"
+
+# Единица компиляции - процедура верхнего уровня (вместе с вложенными) или основной блок программы.
+# Глобальные объявления проверяются в основном процессе, после этого единицы проверяются,
+# переводятся в IR, оптимизируются и переводятся в NASM независимо, в ProcessPoolExecutor.
+# Результат склеивается в порядке единиц и совпадает с последовательной компиляцией
+# байт в байт: номера временных переменных и меток продолжают нумерацию предыдущих единиц,
+# литералы и глобальные переменные NASM собираются по всей программе.
+#
+# Единица: (индекс, длина префикса глобальной таблицы, AST в формате ast_cache, имя программы или None,
+# размер кадра глобальных переменных). Префикс - глобальные символы, объявленные до процедуры:
+# ровно их видит последовательный анализатор.
+
+_NO_IR_NODES = (VarDecl, ConstDecl, Param, Type, Read)
+_TEMP_NODES = (BinOp, UnaryOp)
+_SHORT_CIRCUIT_OPS = (T_AND, T_OR)
+
+def _ir_name_counts(node):
+    # Столько временных переменных и меток выдаст IRGenerator для свёрнутого дерева.
+    # Второй элемент кадра - как IRGenerator.branch: None - значение выражения,
+    # True/False - условие, по которому выполняется переход.
+    temps = 0
+    labels = 0
+    calls = set()
+    stack = [(node, None)]
+    while stack:
+        node, jump_if = stack.pop()
+        if isinstance(node, _NO_IR_NODES):
+            continue
+        if jump_if is not None:
+            if isinstance(node, BinOp) and node.op.type in _SHORT_CIRCUIT_OPS:
+                if (node.op.type == T_AND) != jump_if:
+                    stack.extend(((node.left, jump_if), (node.right, jump_if)))
+                else:
+                    labels += 1
+                    stack.extend(((node.left, not jump_if), (node.right, jump_if)))
+                continue
+            if isinstance(node, UnaryOp) and node.op.type == T_NOT:
+                stack.append((node.expr, not jump_if))
+                continue
+            if isinstance(node, BinOp) and node.op.type in RELATIONAL_OPS:
+                # Сравнение в условии - CompareJump, временной для результата нет.
+                stack.extend(((node.left, None), (node.right, None)))
+                continue
+        if isinstance(node, BinOp) and node.op.type in _SHORT_CIRCUIT_OPS:
+            temps += 1
+            labels += 2
+            stack.append((node, False))
+            continue
+        if isinstance(node, _TEMP_NODES): temps += 1
+        elif isinstance(node, ProcedureCall): calls.add(node.proc_name)
+        if isinstance(node, Assign):
+            stack.append((node.right, None))
+        elif isinstance(node, (If, While)):
+            labels += 2
+            stack.extend((child, False if child is node.condition else None) for child in iter_child_nodes(node))
+        else:
+            stack.extend((child, None) for child in iter_child_nodes(node))
+    return temps, labels, calls
+
+class _UnitScope:
+    # Глобальная область в процессе-исполнителе. Единицы пакета идут по порядку,
+    # префиксы растут, поэтому таблица только дополняется.
+    def __init__(self, header_data):
+        self.header = pickle.loads(header_data)
+        self.global_scope = SymbolTable('global', 0)
+        self.restored = 0
+
+    def check(self, unit):
+        _, prefix_length, data, _, _ = unit
+        for symbol in self.header[self.restored:prefix_length]:
+            self.global_scope.insert(symbol)
+        self.restored = prefix_length
+        node = load_ast(data) if data is not None else None
+        if node is None:
+            return None, 0
+        analyzer = SemanticAnalyzer()
+        analyzer.global_scope = analyzer.symtab = self.global_scope
+        analyzer.visit(node)
+        folder = ConstantFolder()
+        node = folder.fold(node)
+        return node, folder.folded
+
+def _check_batch(header_data, units):
+    scope = _UnitScope(header_data)
+    results = []
+    # IRGenerator и Optimizer печатают отладочные строки; из процессов-исполнителей они не нужны.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for unit in units:
+            node, folded = scope.check(unit)
+            temps, labels, calls = _ir_name_counts(node) if node is not None else (0, 0, set())
+            results.append((folded, temps, labels, calls))
+    return results
+
+def _lower_batch(header_data, units, starts, external_labels):
+    scope = _UnitScope(header_data)
+    results = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for unit, (temp_start, label_start, temps, labels) in zip(units, starts):
+            index, _, _, program_name, frame_size = unit
+            node, _ = scope.check(unit)
+            ir_gen = IRGenerator(temp_start, label_start)
+            if program_name is not None:
+                ir_gen.begin_procedure(MAIN_LABEL, program_name, [], 0, frame_size)
+                if node is not None:
+                    ir_gen.visit(node)
+                ir_gen.end_procedure(program_name)
+            else:
+                ir_gen.visit(node)
+            if ir_gen.temp_count - temp_start != temps or ir_gen.label_count - label_start != labels:
+                raise RuntimeError(f"Unit {index}: IR name count mismatch")
+            ir_code = ir_gen.code
+            optimized = Optimizer(list(ir_code), external_labels, starts_unreachable=index > 0).optimize()
+            calls = {instr.proc_name for instr in optimized if isinstance(instr, Call)}
+            # До первого ENTER_PROC единицы могут идти только метки: иначе NASMGenerator
+            # отнёс бы эти инструкции к процедуре предыдущей единицы.
+            well_formed = True
+            if index > 0:
+                for instr in optimized:
+                    if isinstance(instr, EnterProc): break
+                    if not isinstance(instr, Label):
+                        well_formed = False
+                        break
+            results.append((ir_code, optimized, calls, well_formed, NASMGenerator(optimized).scan_unit()))
+    return results
+
+def _emit_batch(codes, start_indices, string_literals, float_literals, global_vars):
+    return [NASMGenerator(code).generate_unit_text(start_index, string_literals, float_literals, global_vars)
+            for code, start_index in zip(codes, start_indices)]
+
+class ParallelCompiler:
+    def __init__(self, program, workers=None, executor=None, batches_per_worker=DEFAULT_BATCHES_PER_WORKER):
+        self.program = program
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor
+        self.batches_per_worker = batches_per_worker
+        self.units = []
+        self.folded = 0
+        self.ir_code = None
+        self.optimized_ir_code = None
+        self.nasm_code = None
+        # Почему часть работы выполнена последовательно (None - всё по единицам).
+        self.optimizer_fallback = None
+        self.nasm_fallback = None
+        self.error = None
+
+    def compile(self):
+        # False - программу нужно компилировать последовательно: ошибка в объявлениях или
+        # в единице (последовательный проход выдаст ту же ошибку в том же месте).
+        try:
+            header_data = self._split()
+        except Exception as e:
+            self.error = e
+            return False
+        if self.executor is not None or self.workers == 1 or self._batch_count() == 1:
+            return self._compile_units(self.executor, header_data)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return self._compile_units(executor, header_data)
+
+    def _split(self):
+        analyzer = SemanticAnalyzer()
+        header_folder = ConstantFolder()
+        block = self.program.block
+        units = []
+        for declaration in block.declarations:
+            if isinstance(declaration, ProcedureDecl):
+                units.append((len(units), len(analyzer.global_scope), dump_ast(declaration), None, 0))
+                analyzer.enter_procedure(declaration)
+                analyzer.leave_scope()
+            else:
+                # Копия: дерево программы остаётся несвёрнутым на случай последовательной компиляции.
+                declaration = load_ast(dump_ast(declaration))
+                analyzer.visit(declaration)
+                header_folder.fold(declaration)
+        compound = dump_ast(block.compound_statement) if block.compound_statement is not None else None
+        units.append((len(units), len(analyzer.global_scope), compound, self.program.name,
+                      analyzer.global_scope.slot_count))
+        self.units = units
+        self.folded = header_folder.folded
+        return pickle.dumps(analyzer.global_scope.symbols())
+
+    def _batch_count(self):
+        return max(1, min(len(self.units), self.workers * self.batches_per_worker))
+
+    def _batches(self):
+        count = self._batch_count()
+        bounds = [len(self.units) * part // count for part in range(count + 1)]
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+    def _run(self, executor, function, batch_args):
+        if executor is None:
+            return [result for args in batch_args for result in function(*args)]
+        futures = [executor.submit(function, *args) for args in batch_args]
+        return [result for future in futures for result in future.result()]
+
+    def _compile_units(self, executor, header_data):
+        batches = self._batches()
+        try:
+            checked = self._run(executor, _check_batch,
+                                [(header_data, self.units[start:end]) for start, end in batches])
+            starts = []
+            temp_start = label_start = 0
+            called = set()
+            for folded, temps, labels, calls in checked:
+                self.folded += folded
+                starts.append((temp_start, label_start, temps, labels))
+                temp_start += temps
+                label_start += labels
+                called |= calls
+            external_labels = called | {MAIN_LABEL}
+            lowered = self._run(executor, _lower_batch,
+                                [(header_data, self.units[start:end], starts[start:end], external_labels)
+                                 for start, end in batches])
+        except Exception as e:
+            self.error = e
+            return False
+
+        self.ir_code = [instr for ir_code, _, _, _, _ in lowered for instr in ir_code]
+        remaining_calls = set()
+        for _, _, calls, _, _ in lowered:
+            remaining_calls |= calls
+        if remaining_calls != called:
+            # Оптимизатор удалил вызов процедуры: её метка неактивна во всей программе,
+            # а единицы считали её активной. Оптимизация всей программы целиком.
+            self.optimizer_fallback = "removed calls"
+            self.optimized_ir_code = Optimizer(list(self.ir_code)).optimize()
+            self.nasm_fallback = self.optimizer_fallback
+            return True
+        optimizer = Optimizer(self.ir_code)
+        optimizer.optimized_code = self.optimized_ir_code = [instr for _, optimized, _, _, _ in lowered for instr in optimized]
+        optimizer.report()
+
+        self.nasm_code = self._generate_nasm(executor, batches, lowered)
+        return True
+
+    def _generate_nasm(self, executor, batches, lowered):
+        proc_names = [name for _, _, _, _, scan in lowered for name in scan[3]]
+        if len(proc_names) != len(set(proc_names)):
+            # Кадры и типы NASMGenerator хранит по имени процедуры: одноимённые процедуры из разных единиц.
+            self.nasm_fallback = "duplicate procedure names"
+            return None
+        if not all(well_formed for _, _, _, well_formed, _ in lowered):
+            self.nasm_fallback = "unit starts outside a procedure"
+            return None
+        unit_scans = [scan for _, _, _, _, scan in lowered]
+        literals = list(dict.fromkeys(value for scan in unit_scans for value in scan[4]))
+        generator = NASMGenerator(self.optimized_ir_code)
+        global_vars = generator.resolve_unit_globals(literals, unit_scans)
+        codes = [optimized for _, optimized, _, _, _ in lowered]
+        start_indices = []
+        start_index = 0
+        for code in codes:
+            start_indices.append(start_index)
+            start_index += len(code)
+        try:
+            unit_texts = self._run(executor, _emit_batch,
+                                   [(codes[start:end], start_indices[start:end], generator._string_literals_map,
+                                     generator._float_literals_map, global_vars)
+                                    for start, end in batches])
+        except Exception as e:
+            # Ошибку с привычным сообщением выдаст последовательная генерация NASM.
+            self.nasm_fallback = f"{type(e).__name__}: {e}"
+            return None
+        return generator.assemble_units(unit_texts)
@@ -0,0 +1,118 @@
+# parallel_lexer.py
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import Token, LineIndex, T_EOF, create_lexer, DEFAULT_LEXER_ENGINE
+
+DEFAULT_MIN_CHUNK_SIZE = 64 * 1024
+
+# Непрозрачные участки, внутри которых перевод строки не является границей токена:
+# строковые литералы (в том числе незакрытые) и комментарии обоих видов.
+OPAQUE_PATTERN = re.compile(r"'[^'\\]*(?:\\[\s\S][^'\\]*)*(?:'|\\?\Z)|\{[^}]*(?:\}|\Z)|//[^\n]*")
+
+def find_split_points(text, parts):
+    points = []
+    if parts < 2:
+        return points
+    spans = OPAQUE_PATTERN.finditer(text)
+    span = next(spans, None)
+    for part in range(1, parts):
+        target = max(len(text) * part // parts, points[-1] if points else 0)
+        newline = text.find('\n', target)
+        while newline != -1:
+            while span is not None and span.end() <= newline:
+                span = next(spans, None)
+            if span is None or span.start() > newline:
+                break
+            newline = text.find('\n', span.end())
+        if newline == -1 or newline + 1 >= len(text):
+            break
+        points.append(newline + 1)
+    return points
+
+def _lex_tokens(engine, text, base_offset, first_line):
+    # Индекс строк блока продолжает нумерацию исходного текста, смещения токенов абсолютные.
+    lexer = create_lexer(text, engine, LineIndex(text, base_offset, first_line), base_offset)
+    tokens = []
+    try:
+        while True:
+            token = lexer.get_next_token()
+            tokens.append(token)
+            if token.type == T_EOF:
+                return tokens, None
+    except Exception as e:
+        return tokens, e
+
+def _lex_chunk(engine, text, base_offset, first_line):
+    # Выполняется в процессе-исполнителе: токены передаются кортежами, ошибка - объектом.
+    tokens, error = _lex_tokens(engine, text, base_offset, first_line)
+    return [(token.type, token.value, token.offset) for token in tokens], error
+
+class ParallelLexer:
+    def __init__(self, text, workers=None, engine=DEFAULT_LEXER_ENGINE,
+                 min_chunk_size=DEFAULT_MIN_CHUNK_SIZE, executor=None):
+        self.text = text
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.min_chunk_size = min_chunk_size
+        self.executor = executor
+        self.error = None
+        self._tokens = None
+        self._index = 0
+
+    def chunks(self):
+        parts = max(1, min(self.workers, len(self.text) // max(1, self.min_chunk_size)))
+        bounds = [0] + find_split_points(self.text, parts) + [len(self.text)]
+        chunks = []
+        line = 1
+        for start, end in zip(bounds, bounds[1:]):
+            chunks.append((start, end, line))
+            line += self.text.count('\n', start, end)
+        return chunks
+
+    def _run_chunks(self, chunks):
+        if len(chunks) == 1:
+            start, end, line = chunks[0]
+            return [_lex_tokens(self.engine, self.text[start:end], start, line)]
+        if self.executor is not None:
+            return self._submit_all(self.executor, chunks)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+            return self._submit_all(executor, chunks)
+
+    def _submit_all(self, executor, chunks):
+        futures = [executor.submit(_lex_chunk, self.engine, self.text[start:end], start, line)
+                   for start, end, line in chunks]
+        lines = LineIndex(self.text)
+        results = []
+        for future in futures:
+            fields_list, error = future.result()
+            results.append(([Token(token_type, value, offset, lines) for token_type, value, offset in fields_list], error))
+        return results
+
+    def tokenize(self):
+        if self._tokens is not None:
+            return self._tokens
+        results = self._run_chunks(self.chunks())
+        tokens = []
+        last = len(results) - 1
+        for index, (chunk_tokens, error) in enumerate(results):
+            if index != last and error is None:
+                # EOF промежуточного блока не является концом исходного текста.
+                chunk_tokens.pop()
+            tokens.extend(chunk_tokens)
+            if error is not None:
+                self.error = error
+                break
+        self._tokens = tokens
+        return tokens
+
+    def get_next_token(self):
+        tokens = self.tokenize()
+        if self._index < len(tokens):
+            token = tokens[self._index]
+            self._index += 1
+            return token
+        if self.error is not None:
+            raise self.error
+        return tokens[-1]
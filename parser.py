@@ -1,13 +1,35 @@
 from lexer import *
 from ast_nodes import *
+from token_stream import TokenStream
 
 class ParserError(Exception):
     pass
 
+# Сила связывания операций в выражениях (чем больше, тем сильнее).
+# NOT - префиксная операция между AND и сравнениями; унарные + и - разбираются в primary.
+BP_OR = 1
+BP_AND = 2
+BP_NOT = 3
+BP_RELATIONAL = 4
+BP_ADDITIVE = 5
+BP_MULTIPLICATIVE = 6
+BP_PRIMARY = 7
+
+BINARY_BINDING_POWERS = {
+    T_OR: BP_OR,
+    T_AND: BP_AND,
+    T_EQUAL: BP_RELATIONAL, T_NOT_EQUAL: BP_RELATIONAL,
+    T_LESS_THAN: BP_RELATIONAL, T_LESS_EQUAL: BP_RELATIONAL,
+    T_GREATER_THAN: BP_RELATIONAL, T_GREATER_EQUAL: BP_RELATIONAL,
+    T_PLUS: BP_ADDITIVE, T_MINUS: BP_ADDITIVE,
+    T_MUL: BP_MULTIPLICATIVE, T_REAL_DIV: BP_MULTIPLICATIVE, T_DIV: BP_MULTIPLICATIVE,
+}
+
 class Parser:
     def __init__(self, lexer):
         self.lexer = lexer
-        self.current_token = self.lexer.get_next_token()
+        self.tokens = lexer if hasattr(lexer, 'next_token') else TokenStream(lexer)
+        self.current_token = self.tokens.next_token()
 
     def error(self, message=""):
         token = self.current_token
@@ -17,7 +39,7 @@ class Parser:
 
     def eat(self, token_type):
         if self.current_token.type == token_type:
-            self.current_token = self.lexer.get_next_token()
+            self.current_token = self.tokens.next_token()
         else:
             self.error(f"Expected token {token_type}, but got {self.current_token.type}")
 
@@ -93,10 +115,11 @@ class Parser:
         const_node = Variable(self.current_token)
         self.eat(T_ID)
         self.eat(T_EQUAL)
-        value_node = self.constant()
+        value_node = self.expr()
         return ConstDecl(const_node, value_node)
 
     def procedure_declaration_part(self):
+        start_token = self.current_token
         self.eat(T_PROCEDURE)
         proc_name = self.current_token.value
         self.eat(T_ID)
@@ -110,6 +133,7 @@ class Parser:
         block_node = self.block()
         self.eat(T_SEMI)
         proc_decl = ProcedureDecl(proc_name, params, block_node)
+        proc_decl.span = (start_token, self.current_token)
         return proc_decl
 
     def formal_parameter_list(self):
@@ -142,12 +166,14 @@ class Parser:
         return Type(token)
 
     def compound_statement(self):
+        start_token = self.current_token
         self.eat(T_BEGIN)
         nodes = self.statement_list()
         self.eat(T_END)
         root = CompoundStatement()
         for node in nodes:
             root.children.append(node)
+        root.span = (start_token, self.current_token)
         return root
 
     def statement_list(self):
@@ -168,14 +194,15 @@ class Parser:
         return nodes
 
     def statement(self):
-        token_type = self.current_token.type
+        start_token = self.current_token
+        token_type = start_token.type
         node = None
 
         if token_type == T_BEGIN:
             node = self.compound_statement()
         elif token_type == T_ID:
             id_token = self.current_token
-            next_token_after_id = self.lexer.peek_token()
+            next_token_after_id = self.tokens.peek()
 
             if next_token_after_id.type == T_ASSIGN:
                 node = self.assignment_statement()
@@ -201,6 +228,7 @@ class Parser:
 
         if node is None:
             self.error(f"Failed to parse statement near token: {self.current_token}")
+        node.span = (start_token, self.current_token)
         return node
 
     def assignment_statement(self):
@@ -270,59 +298,42 @@ class Parser:
         return Write(expressions)
 
     def expr(self):
-        return self.condition()
+        return self.expression()
 
     def condition(self):
-        node = self.and_expr()
-        while self.current_token.type == T_OR:
-            token = self.current_token
-            self.eat(T_OR)
-            node = BinOp(left=node, op=token, right=self.and_expr())
-        return node
-
-    def and_expr(self):
-        node = self.not_expr()
-        while self.current_token.type == T_AND:
-            token = self.current_token
-            self.eat(T_AND)
-            node = BinOp(left=node, op=token, right=self.not_expr())
-        return node
+        return self.expression()
 
-    def not_expr(self):
-        if self.current_token.type == T_NOT:
-            token = self.current_token
+    def expression(self, min_bp=0):
+        # Разбор методом Пратта: операнд, затем бинарные операции, связанные сильнее, чем min_bp.
+        token = self.current_token
+        if token.type == T_NOT and min_bp < BP_RELATIONAL:
             self.eat(T_NOT)
-            node = UnaryOp(op=token, expr=self.not_expr())
-            return node
-        else:
-            return self.comparison_expr()
-
-    def comparison_expr(self):
-        node = self.additive_expr()
+            return self.infix_expression(UnaryOp(op=token, expr=self.expression(BP_NOT)), BP_NOT, min_bp)
+        return self.infix_expression(self.primary(), BP_PRIMARY, min_bp)
 
-        rel_ops = (T_EQUAL, T_NOT_EQUAL, T_LESS_THAN, T_LESS_EQUAL, T_GREATER_THAN, T_GREATER_EQUAL)
-        if self.current_token.type in rel_ops:
+    def infix_expression(self, left, left_bp, min_bp):
+        binding_powers = BINARY_BINDING_POWERS
+        token_type = self.current_token.type
+        bp = binding_powers[token_type] if token_type in binding_powers else 0
+        while bp > min_bp:
+            # Сравнение неассоциативно и применяется только к арифметическому операнду.
+            if bp == BP_RELATIONAL and left_bp <= BP_RELATIONAL:
+                break
             op_token = self.current_token
             self.eat(op_token.type)
-            right_node = self.additive_expr()
-            node = BinOp(left=node, op=op_token, right=right_node)
-        return node
-
-    def additive_expr(self):
-        node = self.multiplicative_expr()
-        while self.current_token.type in (T_PLUS, T_MINUS):
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.multiplicative_expr())
-        return node
-
-    def multiplicative_expr(self):
-        node = self.primary()
-        while self.current_token.type in (T_MUL, T_REAL_DIV, T_DIV):
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.primary())
-        return node
+            if bp < BP_RELATIONAL and self.current_token.type == T_NOT:
+                right = self.expression(bp)
+            else:
+                # Правый операнд без лишнего вызова expression: подъём только перед более сильной операцией.
+                right = self.primary()
+                token_type = self.current_token.type
+                if token_type in binding_powers and binding_powers[token_type] > bp:
+                    right = self.infix_expression(right, BP_PRIMARY, bp)
+            left = BinOp(left=left, op=op_token, right=right)
+            left_bp = bp
+            token_type = self.current_token.type
+            bp = binding_powers[token_type] if token_type in binding_powers else 0
+        return left
 
     def primary(self):
         token = self.current_token
@@ -363,20 +374,6 @@ class Parser:
         self.eat(T_ID)
         return node
 
-    def constant(self):
-        token = self.current_token
-        if token.type == T_INTEGER_CONST:
-            self.eat(T_INTEGER_CONST)
-            return Num(token)
-        elif token.type == T_REAL_CONST:
-            self.eat(T_REAL_CONST)
-            return Num(token)
-        elif token.type == T_STRING_LITERAL:
-            self.eat(T_STRING_LITERAL)
-            return StringLiteral(token)
-        else:
-            self.error(f"Expected INTEGER_CONST, REAL_CONST, or STRING_LITERAL for constant value, got {token.type}")
-
     def empty(self):
         return NoOp()
 
@@ -384,4 +381,174 @@ class Parser:
         node = self.program()
         if self.current_token.type != T_EOF:
             self.error("Expected EOF token at the end of parsing.")
-        return node
\ No newline at end of file
+        return node
+
+# Состояния кадров явного стека IterativeParser.
+_AWAIT_COMPOUND = 0
+_AWAIT_THEN = 1
+_AWAIT_ELSE = 2
+_AWAIT_WHILE_BODY = 3
+
+_AWAIT_OPERAND = 0
+_AWAIT_NOT_OPERAND = 1
+_AWAIT_RIGHT = 2
+_AWAIT_UNARY = 3
+_AWAIT_PAREN = 4
+
+_NO_STATEMENT = object()
+
+class IterativeParser(Parser):
+    # Операторы и выражения разбираются без рекурсии: вложенные BEGIN/IF/WHILE и скобки
+    # откладываются в явный стек кадров, глубина вложенности ограничена только памятью.
+    # Порядок чтения токенов и сообщения об ошибках те же, что у Parser, AST тоже.
+    def compound_statement(self):
+        if self.current_token.type != T_BEGIN:
+            self.eat(T_BEGIN)
+        return self.statement()
+
+    def statement(self):
+        stack = []
+        while True:
+            # Спуск: составные операторы откладываются в стек до первого простого.
+            start_token = self.current_token
+            token_type = start_token.type
+            if token_type == T_BEGIN:
+                self.eat(T_BEGIN)
+                stack.append([_AWAIT_COMPOUND, start_token, []])
+                if self.current_token.type not in (T_END, T_ELSE):
+                    continue
+                node = _NO_STATEMENT
+            elif token_type == T_IF:
+                self.eat(T_IF)
+                condition_node = self.condition()
+                self.eat(T_THEN)
+                stack.append([_AWAIT_THEN, start_token, condition_node, None])
+                continue
+            elif token_type == T_WHILE:
+                self.eat(T_WHILE)
+                condition_node = self.condition()
+                self.eat(T_DO)
+                stack.append([_AWAIT_WHILE_BODY, start_token, condition_node])
+                continue
+            else:
+                node = super().statement()
+
+            # Подъём: готовый оператор достраивает ожидающие его кадры.
+            while stack:
+                frame = stack[-1]
+                state = frame[0]
+                if state == _AWAIT_COMPOUND:
+                    if node is not _NO_STATEMENT:
+                        frame[2].append(node)
+                    if self._statement_list_continues():
+                        break
+                    self.eat(T_END)
+                    stack.pop()
+                    node = CompoundStatement()
+                    node.children.extend(frame[2])
+                elif state == _AWAIT_THEN:
+                    if self.current_token.type == T_ELSE:
+                        self.eat(T_ELSE)
+                        frame[0] = _AWAIT_ELSE
+                        frame[3] = node
+                        break
+                    stack.pop()
+                    node = If(frame[2], node, None)
+                elif state == _AWAIT_ELSE:
+                    stack.pop()
+                    node = If(frame[2], frame[3], node)
+                else:
+                    stack.pop()
+                    node = While(frame[2], node)
+                node.span = (frame[1], self.current_token)
+            else:
+                return node
+
+    def _statement_list_continues(self):
+        # Тот же разбор разделителей, что в Parser.statement_list.
+        while self.current_token.type == T_SEMI:
+            self.eat(T_SEMI)
+            if self.current_token.type in (T_END, T_ELSE):
+                return False
+            if self.current_token.type == T_EOF:
+                self.error("Unexpected EOF after SEMI in statement list")
+            return True
+        return False
+
+    def expression(self, min_bp=0):
+        # Кадр: [состояние, min_bp, левый операнд, сила левого операнда, токен операции].
+        binding_powers = BINARY_BINDING_POWERS
+        stack = []
+        while True:
+            # Начало выражения с силой min_bp: префиксный NOT, затем унарные знаки и скобки операнда.
+            token = self.current_token
+            if token.type == T_NOT and min_bp < BP_RELATIONAL:
+                self.eat(T_NOT)
+                stack.append([_AWAIT_NOT_OPERAND, min_bp, None, None, token])
+                min_bp = BP_NOT
+                continue
+            stack.append([_AWAIT_OPERAND, min_bp, None, None, None])
+            while True:
+                token = self.current_token
+                if token.type in (T_PLUS, T_MINUS):
+                    self.eat(token.type)
+                    stack.append([_AWAIT_UNARY, None, None, None, token])
+                elif token.type == T_LPAREN:
+                    self.eat(T_LPAREN)
+                    stack.append([_AWAIT_PAREN, None, None, None, None])
+                    break
+                else:
+                    node = super().primary()
+                    break
+            if token.type == T_LPAREN:
+                min_bp = 0
+                continue
+
+            # Подъём: готовый операнд передаётся кадрам, пока какой-нибудь не потребует новый.
+            while True:
+                frame = stack[-1]
+                state = frame[0]
+                if state == _AWAIT_UNARY:
+                    stack.pop()
+                    node = UnaryOp(op=frame[4], expr=node)
+                    continue
+                if state == _AWAIT_PAREN:
+                    stack.pop()
+                    self.eat(T_RPAREN)
+                    continue
+                if state == _AWAIT_OPERAND:
+                    left, left_bp = node, BP_PRIMARY
+                elif state == _AWAIT_NOT_OPERAND:
+                    left, left_bp = UnaryOp(op=frame[4], expr=node), BP_NOT
+                else:
+                    left, left_bp = BinOp(left=frame[2], op=frame[4], right=node), frame[3]
+                token_type = self.current_token.type
+                bp = binding_powers[token_type] if token_type in binding_powers else 0
+                if bp > frame[1] and not (bp == BP_RELATIONAL and left_bp <= BP_RELATIONAL):
+                    op_token = self.current_token
+                    self.eat(op_token.type)
+                    frame[0] = _AWAIT_RIGHT
+                    frame[2] = left
+                    frame[3] = bp
+                    frame[4] = op_token
+                    min_bp = bp
+                    break
+                stack.pop()
+                node = left
+                if not stack:
+                    return node
+
+
+PARSER_MODES = {
+    'recursive': Parser,
+    'iterative': IterativeParser,
+}
+
+DEFAULT_PARSER_MODE = 'recursive'
+
+
+def create_parser(lexer, mode=DEFAULT_PARSER_MODE):
+    parser_class = PARSER_MODES.get(mode)
+    if parser_class is None:
+        raise ValueError(f"Unknown parser mode '{mode}'. Available: {', '.join(PARSER_MODES)}")
+    return parser_class(lexer)
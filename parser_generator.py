@@ -0,0 +1,311 @@
+# parser_generator.py
+import os
+import re
+import sys
+
+class GrammarError(Exception):
+    pass
+
+# Грамматика в том же виде, что gramma.txt: "имя ::= правая часть", продолжение правила -
+# строки без "::=". Терминалы пишутся заглавными буквами (это типы токенов лексера),
+# нетерминалы - строчными. В правой части допустимы |, скобки, * и ?; пустая правая часть - ε.
+
+DEFAULT_GRAMMAR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gramma.txt')
+
+END_OF_INPUT = 'EOF'
+
+# Виды вспомогательных нетерминалов, которые появляются при переводе EBNF в BNF.
+HELPER_STAR = 'star'
+HELPER_OPTIONAL = 'optional'
+HELPER_GROUP = 'group'
+
+_GRAMMAR_TOKEN_RE = re.compile(r'\s*(?:(::=|[()|*?])|([A-Za-z_][A-Za-z_0-9]*))')
+
+def is_terminal(symbol):
+    return symbol.isupper()
+
+def _tokenize_rule(text, rule_name):
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _GRAMMAR_TOKEN_RE.match(text, position)
+        if match is None:
+            raise GrammarError(f"Unexpected character {text[position:].strip()[:1]!r} in rule '{rule_name}'")
+        tokens.append(match.group(1) or match.group(2))
+        position = match.end()
+    return tokens
+
+class _RuleReader:
+    # Рекурсивный разбор правой части: alt ::= seq ('|' seq)*, seq ::= item*, item ::= atom ('*' | '?')*.
+    def __init__(self, tokens, rule_name):
+        self.tokens = tokens
+        self.position = 0
+        self.rule_name = rule_name
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def alternatives(self):
+        options = [self.sequence()]
+        while self.peek() == '|':
+            self.position += 1
+            options.append(self.sequence())
+        return ('alt', options)
+
+    def sequence(self):
+        items = []
+        while self.peek() not in (None, '|', ')'):
+            items.append(self.item())
+        return ('seq', items)
+
+    def item(self):
+        token = self.peek()
+        self.position += 1
+        if token == '(':
+            node = self.alternatives()
+            if self.peek() != ')':
+                raise GrammarError(f"Missing ')' in rule '{self.rule_name}'")
+            self.position += 1
+        elif token in ('*', '?', '::='):
+            raise GrammarError(f"Unexpected '{token}' in rule '{self.rule_name}'")
+        else:
+            node = ('symbol', token)
+        while self.peek() in ('*', '?'):
+            node = ('star' if self.peek() == '*' else 'optional', node)
+            self.position += 1
+        return node
+
+def parse_grammar(text):
+    rules = {}
+    order = []
+    current_name = None
+    current_lines = []
+
+    def finish():
+        if current_name is None:
+            return
+        tokens = _tokenize_rule(' '.join(current_lines), current_name)
+        reader = _RuleReader(tokens, current_name)
+        rules[current_name] = reader.alternatives()
+        if reader.peek() is not None:
+            raise GrammarError(f"Unexpected '{reader.peek()}' in rule '{current_name}'")
+
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        if '::=' in line:
+            finish()
+            name, _, body = line.partition('::=')
+            current_name = name.strip()
+            if not re.fullmatch(r'[a-z_][a-z_0-9]*', current_name):
+                raise GrammarError(f"Line {line_number}: bad nonterminal name '{current_name}'")
+            if current_name in rules:
+                raise GrammarError(f"Line {line_number}: rule '{current_name}' defined twice")
+            order.append(current_name)
+            current_lines = [body]
+        elif current_name is None:
+            raise GrammarError(f"Line {line_number}: text before the first rule")
+        else:
+            current_lines.append(line)
+    finish()
+    if not order:
+        raise GrammarError("Grammar has no rules")
+    return Grammar(order[0], [(name, rules[name]) for name in order])
+
+def load_grammar(path=DEFAULT_GRAMMAR_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_grammar(f.read())
+
+class Production:
+    __slots__ = ('index', 'lhs', 'rhs')
+
+    def __init__(self, index, lhs, rhs):
+        self.index = index
+        self.lhs = lhs
+        self.rhs = rhs
+
+    def __str__(self):
+        return f"{self.lhs} ::= {' '.join(self.rhs) if self.rhs else 'ε'}"
+
+    __repr__ = __str__
+
+class Grammar:
+    # Правила EBNF переводятся в BNF: каждая группа, повторение и необязательная часть
+    # становятся вспомогательным нетерминалом "правило#N" (вид записан в helpers).
+    def __init__(self, start, rules):
+        self.start = start
+        self.rules = rules
+        self.productions = []
+        self.helpers = {}
+        self.nonterminals = []
+        self._counters = {}
+        for name, _ in rules:
+            self.nonterminals.append(name)
+        defined = set(self.nonterminals)
+        for name, node in rules:
+            for option in node[1]:
+                self._add_production(name, self._lower_sequence(name, option))
+        for production in self.productions:
+            for symbol in production.rhs:
+                if not is_terminal(symbol) and symbol not in defined and symbol not in self.helpers:
+                    raise GrammarError(f"Nonterminal '{symbol}' used in '{production.lhs}' is not defined")
+        self.terminals = sorted({symbol for production in self.productions for symbol in production.rhs
+                                 if is_terminal(symbol)} | {END_OF_INPUT})
+
+    def _add_production(self, lhs, rhs):
+        self.productions.append(Production(len(self.productions), lhs, tuple(rhs)))
+
+    def _new_helper(self, rule_name, kind):
+        self._counters[rule_name] = self._counters.get(rule_name, 0) + 1
+        name = f"{rule_name}#{self._counters[rule_name]}"
+        self.helpers[name] = kind
+        self.nonterminals.append(name)
+        return name
+
+    def _lower_sequence(self, rule_name, sequence):
+        return [self._lower_item(rule_name, item) for item in sequence[1]]
+
+    def _lower_item(self, rule_name, item):
+        kind = item[0]
+        if kind == 'symbol':
+            return item[1]
+        if kind == 'alt':
+            if len(item[1]) == 1 and len(item[1][0][1]) == 1:
+                return self._lower_item(rule_name, item[1][0][1][0])
+            helper = self._new_helper(rule_name, HELPER_GROUP)
+            for option in item[1]:
+                self._add_production(helper, self._lower_sequence(rule_name, option))
+            return helper
+        body = item[1]
+        options = body[1] if body[0] == 'alt' else [('seq', [body])]
+        if kind == 'star':
+            helper = self._new_helper(rule_name, HELPER_STAR)
+            if len(options) == 1:
+                body_symbols = self._lower_sequence(rule_name, options[0])
+            else:
+                body_symbols = [self._lower_item(rule_name, body)]
+            self._add_production(helper, body_symbols + [helper])
+            self._add_production(helper, [])
+            return helper
+        helper = self._new_helper(rule_name, HELPER_OPTIONAL)
+        for option in options:
+            self._add_production(helper, self._lower_sequence(rule_name, option))
+        self._add_production(helper, [])
+        return helper
+
+class ParseTable:
+    def __init__(self, grammar, nullable, first, follow, table, conflicts):
+        self.grammar = grammar
+        self.start = grammar.start
+        self.productions = grammar.productions
+        self.helpers = grammar.helpers
+        self.nullable = nullable
+        self.first = first
+        self.follow = follow
+        self.table = table
+        self.conflicts = conflicts
+
+    def __str__(self):
+        return (f"ParseTable(start={self.start!r}, productions={len(self.productions)}, "
+                f"nonterminals={len(self.table)}, conflicts={len(self.conflicts)})")
+
+    __repr__ = __str__
+
+    def format(self):
+        lines = ["Продукции:"]
+        for production in self.productions:
+            lines.append(f"  {production.index:3d}: {production}")
+        lines.append("")
+        lines.append("Таблица LL(1) (нетерминал, терминал -> продукция):")
+        for nonterminal in self.grammar.nonterminals:
+            row = self.table[nonterminal]
+            cells = ', '.join(f"{terminal}->{row[terminal]}" for terminal in sorted(row))
+            lines.append(f"  {nonterminal}: {cells}")
+        lines.append("")
+        if self.conflicts:
+            lines.append("Разрешённые конфликты (выбрана непустая продукция):")
+            for nonterminal, terminal, chosen, dropped in self.conflicts:
+                lines.append(f"  {nonterminal} на {terminal}: {self.productions[chosen]} вместо {self.productions[dropped]}")
+        else:
+            lines.append("Конфликтов нет.")
+        return '\n'.join(lines)
+
+def _sequence_first(symbols, nullable, first):
+    result = set()
+    for symbol in symbols:
+        if is_terminal(symbol):
+            result.add(symbol)
+            return result, False
+        result |= first[symbol]
+        if symbol not in nullable:
+            return result, False
+    return result, True
+
+def build_parse_table(grammar):
+    productions = grammar.productions
+    nullable = set()
+    first = {name: set() for name in grammar.nonterminals}
+    follow = {name: set() for name in grammar.nonterminals}
+    follow[grammar.start].add(END_OF_INPUT)
+
+    changed = True
+    while changed:
+        changed = False
+        for production in productions:
+            symbols_first, symbols_nullable = _sequence_first(production.rhs, nullable, first)
+            if not symbols_first <= first[production.lhs]:
+                first[production.lhs] |= symbols_first
+                changed = True
+            if symbols_nullable and production.lhs not in nullable:
+                nullable.add(production.lhs)
+                changed = True
+
+    changed = True
+    while changed:
+        changed = False
+        for production in productions:
+            rhs = production.rhs
+            for position, symbol in enumerate(rhs):
+                if is_terminal(symbol):
+                    continue
+                rest_first, rest_nullable = _sequence_first(rhs[position + 1:], nullable, first)
+                update = rest_first | follow[production.lhs] if rest_nullable else rest_first
+                if not update <= follow[symbol]:
+                    follow[symbol] |= update
+                    changed = True
+
+    table = {name: {} for name in grammar.nonterminals}
+    conflicts = []
+    for production in productions:
+        symbols_first, symbols_nullable = _sequence_first(production.rhs, nullable, first)
+        lookaheads = symbols_first | follow[production.lhs] if symbols_nullable else symbols_first
+        row = table[production.lhs]
+        for terminal in sorted(lookaheads):
+            previous = row.get(terminal)
+            if previous is None:
+                row[terminal] = production.index
+                continue
+            # Висячий ELSE и подобные случаи: непустая продукция выигрывает у пустой (как "сдвиг" в LR).
+            previous_nullable = _sequence_first(productions[previous].rhs, nullable, first)[1]
+            if previous_nullable == symbols_nullable:
+                raise GrammarError(f"LL(1) conflict in '{production.lhs}' on {terminal}: "
+                                   f"'{productions[previous]}' and '{production}'")
+            if previous_nullable:
+                row[terminal] = production.index
+                conflicts.append((production.lhs, terminal, production.index, previous))
+            else:
+                conflicts.append((production.lhs, terminal, previous, production.index))
+    return ParseTable(grammar, nullable, first, follow, table, conflicts)
+
+def generate_parse_table(path=DEFAULT_GRAMMAR_PATH):
+    return build_parse_table(load_grammar(path))
+
+if __name__ == '__main__':
+    grammar_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_GRAMMAR_PATH
+    try:
+        parse_table = generate_parse_table(grammar_path)
+    except (GrammarError, OSError) as e:
+        print(f"Ошибка грамматики: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(parse_table.format())
@@ -1,16 +1,28 @@
 # semantic_analyzer.py
 from ast_nodes import *
+from ast_walker import NodeVisitor, iter_child_nodes
+from constant_folder import constant_value, NOT_CONSTANT
 from symbol_table import SymbolTable, VarSymbol, ConstSymbol, ProcedureSymbol, BuiltinTypeSymbol, SymbolError
 from lexer import *
 
 class SemanticError(Exception):
     pass
 
-class SemanticAnalyzer:
+class SemanticAnalyzer(NodeVisitor):
     def __init__(self):
-        self.symtab = SymbolTable()
+        self.global_scope = SymbolTable('global', 0)
+        self.symtab = self.global_scope
         self._init_builtins()
 
+    def enter_scope(self, scope_name):
+        self.symtab = SymbolTable(scope_name, self.symtab.scope_level + 1, self.symtab)
+        return self.symtab
+
+    def leave_scope(self):
+        scope = self.symtab
+        self.symtab = scope.enclosing_scope
+        return scope
+
     def _init_builtins(self):
         self.symtab.define(BuiltinTypeSymbol('INTEGER'))
         self.symtab.define(BuiltinTypeSymbol('REAL'))
@@ -24,27 +36,21 @@ class SemanticAnalyzer:
             f"Semantic Error: {message} {location}"
         )
 
-    def visit(self, node):
-        method_name = 'visit_' + type(node).__name__
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
-
     def generic_visit(self, node):
         if node is None: return
         if isinstance(node, list):
             for item in node:
                 if isinstance(item, AST): self.visit(item)
         else:
-            for attr_name in dir(node):
-                if not attr_name.startswith('_'):
-                    attr_value = getattr(node, attr_name)
-                    if isinstance(attr_value, AST): self.visit(attr_value)
-                    elif isinstance(attr_value, list):
-                        for item in attr_value:
-                            if isinstance(item, AST): self.visit(item)
+            for child in iter_child_nodes(node): self.visit(child)
 
     def visit_Program(self, node):
         self.visit(node.block)
+        # Символ программы хранит размер кадра глобальных переменных для IR.
+        program_symbol = ProcedureSymbol(node.name)
+        program_symbol.scope_level = self.global_scope.scope_level
+        program_symbol.frame_size = self.global_scope.slot_count
+        node.symbol = program_symbol
 
     def visit_Block(self, node):
         for declaration in node.declarations:
@@ -60,6 +66,7 @@ class SemanticAnalyzer:
         var_symbol = VarSymbol(var_name, type_symbol)
         self.symtab.define(var_symbol)
         node.var_node.symbol = var_symbol
+        node.var_node.address = var_symbol.address
         node.var_node.var_type = type_symbol
 
     def visit_ConstDecl(self, node):
@@ -70,12 +77,22 @@ class SemanticAnalyzer:
         if const_type_symbol is None:
             value_token = getattr(node.value_node, 'token', node.const_node.token)
             self.error(f"Could not determine type of constant value for '{const_name}'", value_token); return
-        const_symbol = ConstSymbol(const_name, const_type_symbol, node.value_node.value)
+        const_value = constant_value(node.value_node)
+        if const_value is NOT_CONSTANT:
+            value_token = getattr(node.value_node, 'token', getattr(node.value_node, 'op', node.const_node.token))
+            self.error(f"Constant expression expected for '{const_name}'", value_token); return
+        const_symbol = ConstSymbol(const_name, const_type_symbol, const_value)
         self.symtab.define(const_symbol)
         node.const_node.symbol = const_symbol
         node.const_node.var_type = const_type_symbol
 
     def visit_ProcedureDecl(self, node):
+        self.enter_procedure(node)
+        self.visit(node.block_node)
+        self.leave_procedure(node)
+
+    def enter_procedure(self, node):
+        # Имя процедуры определяется в охватывающей области, параметры и тело - в новой.
         proc_name = node.proc_name
         proc_token = getattr(node, 'token', None)
         if not proc_token and node.params: proc_token = node.params[0].var_node.token
@@ -86,6 +103,7 @@ class SemanticAnalyzer:
         proc_symbol = ProcedureSymbol(proc_name)
         self.symtab.define(proc_symbol)
         node.symbol = proc_symbol
+        proc_symbol.scope_level = self.enter_scope(proc_name).scope_level
         param_symbols = []
         if node.params:
             for param in node.params:
@@ -93,7 +111,9 @@ class SemanticAnalyzer:
                 param_symbol = getattr(param.var_node, 'symbol', None)
                 if param_symbol: param_symbols.append(param_symbol)
         proc_symbol.params = param_symbols
-        self.visit(node.block_node)
+
+    def leave_procedure(self, node):
+        node.symbol.frame_size = self.leave_scope().slot_count
 
     def visit_Param(self, node):
         type_name = node.type_node.value
@@ -104,6 +124,7 @@ class SemanticAnalyzer:
         var_symbol = VarSymbol(var_name, type_symbol)
         self.symtab.define(var_symbol)
         node.var_node.symbol = var_symbol
+        node.var_node.address = var_symbol.address
         node.var_node.var_type = type_symbol
 
     def visit_CompoundStatement(self, node):
@@ -133,6 +154,7 @@ class SemanticAnalyzer:
         node.symbol = symbol
         if symbol is None: self.error(f"Identifier not found: '{var_name}'", node.token); node.node_type = None
         else: node.node_type = symbol.type if isinstance(symbol, (VarSymbol, ConstSymbol)) else None
+        if isinstance(symbol, VarSymbol): node.address = symbol.address
 
     def visit_Num(self, node):
         if isinstance(node.value, int): node.node_type = self.symtab.lookup('INTEGER')
@@ -141,7 +163,7 @@ class SemanticAnalyzer:
 
     def visit_StringLiteral(self, node):
         string_type = self.symtab.lookup('STRING')
-        if string_type is None: string_type = BuiltinTypeSymbol('STRING'); self.symtab.define(string_type)
+        if string_type is None: string_type = BuiltinTypeSymbol('STRING'); self.global_scope.define(string_type)
         node.node_type = string_type
 
     def visit_BinOp(self, node):
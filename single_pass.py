@@ -0,0 +1,127 @@
+# single_pass.py
+from lexer import *
+from ast_nodes import ProcedureDecl
+from parser import Parser, IterativeParser, DEFAULT_PARSER_MODE
+from semantic_analyzer import SemanticAnalyzer
+from ir_generator import IRGenerator
+from constant_folder import ConstantFolder
+
+class SinglePassFrontEnd(Parser):
+    # Парсер, который проверяет типы и генерирует IR по ходу разбора: каждое объявление и
+    # каждый оператор тела проходят через SemanticAnalyzer, ConstantFolder и IRGenerator
+    # сразу после разбора и затем выбрасываются. Целиком AST не строится, в памяти живёт только текущий оператор.
+    # Порядок обхода тот же, что у трёхпроходного конвейера, поэтому IR совпадает с ним.
+    # Отличие одно: семантическая ошибка обнаруживается раньше синтаксической ошибки ниже по тексту.
+    def __init__(self, lexer):
+        super().__init__(lexer)
+        self.analyzer = SemanticAnalyzer()
+        self.folder = ConstantFolder()
+        self.generator = IRGenerator()
+        self.lowered_statements = 0
+
+    @property
+    def symtab(self):
+        return self.analyzer.symtab
+
+    def _lower(self, node):
+        self.analyzer.visit(node)
+        self.generator.visit(self.folder.fold(node))
+
+    def program(self):
+        prog_name = "DefaultProgram"
+        if self.current_token.type == T_PROGRAM:
+            self.eat(T_PROGRAM)
+            prog_name_token = self.current_token
+            self.eat(T_ID)
+            prog_name = prog_name_token.value
+            self.eat(T_SEMI)
+        self.declarations()
+        # Как IRGenerator.visit_Program: сначала процедуры, затем главная программа.
+        global_scope = self.analyzer.global_scope
+        self.generator.begin_procedure("__main_start", prog_name, [], global_scope.scope_level, global_scope.slot_count)
+        self.lowered_compound_statement()
+        self.generator.end_procedure(prog_name)
+        self.eat(T_DOT)
+        if self.current_token.type != T_EOF:
+            self.error("Expected EOF after program DOT")
+        return self.generator.code
+
+    def declarations(self):
+        while self.current_token.type in (T_VAR, T_CONST, T_PROCEDURE):
+            if self.current_token.type == T_VAR:
+                for declaration in self.var_declaration_part():
+                    self._lower(declaration)
+            elif self.current_token.type == T_CONST:
+                for declaration in self.const_declaration_part():
+                    self._lower(declaration)
+            elif self.current_token.type == T_PROCEDURE:
+                self.procedure_declaration_part()
+        return []
+
+    def procedure_declaration_part(self):
+        self.eat(T_PROCEDURE)
+        proc_name = self.current_token.value
+        self.eat(T_ID)
+        params = []
+        if self.current_token.type == T_LPAREN:
+            self.eat(T_LPAREN)
+            if self.current_token.type == T_ID:
+                params = self.formal_parameter_list()
+            self.eat(T_RPAREN)
+        self.eat(T_SEMI)
+        # Заголовок без тела: анализатор определяет процедуру и открывает её область видимости.
+        # Вложенные процедуры выводятся до неё, как в IRGenerator.visit_ProcedureDecl;
+        # после объявлений число ячеек кадра уже известно.
+        decl = ProcedureDecl(proc_name, params, None)
+        self.analyzer.enter_procedure(decl)
+        self.declarations()
+        self.generator.begin_procedure(proc_name, proc_name, [p.var_node.value for p in params],
+                                       decl.symbol.scope_level, self.analyzer.symtab.slot_count,
+                                       [p.type_node.value for p in params])
+        self.lowered_compound_statement()
+        self.generator.end_procedure(proc_name)
+        self.analyzer.leave_procedure(decl)
+        self.eat(T_SEMI)
+        return None
+
+    def lowered_compound_statement(self):
+        # Тот же разбор, что в compound_statement/statement_list, но операторы не собираются в список.
+        self.eat(T_BEGIN)
+        if self.current_token.type not in (T_END, T_ELSE):
+            self._lowered_statement()
+        while self.current_token.type == T_SEMI:
+            self.eat(T_SEMI)
+            if self.current_token.type in (T_END, T_ELSE):
+                break
+            if self.current_token.type == T_EOF:
+                self.error("Unexpected EOF after SEMI in statement list")
+            self._lowered_statement()
+        self.eat(T_END)
+
+    def _lowered_statement(self):
+        if self.current_token.type == T_BEGIN:
+            # Вложенный BEGIN ... END не даёт своих инструкций: его операторы тоже идут по одному.
+            self.lowered_compound_statement()
+            return
+        self._lower(self.statement())
+        self.lowered_statements += 1
+
+    def parse(self):
+        code = self.program()
+        if self.current_token.type != T_EOF:
+            self.error("Expected EOF token at the end of parsing.")
+        return code
+
+class IterativeSinglePassFrontEnd(SinglePassFrontEnd, IterativeParser):
+    pass
+
+SINGLE_PASS_MODES = {
+    'recursive': SinglePassFrontEnd,
+    'iterative': IterativeSinglePassFrontEnd,
+}
+
+def create_single_pass_front_end(lexer, mode=DEFAULT_PARSER_MODE):
+    front_end_class = SINGLE_PASS_MODES.get(mode)
+    if front_end_class is None:
+        raise ValueError(f"Unknown parser mode '{mode}'. Available: {', '.join(SINGLE_PASS_MODES)}")
+    return front_end_class(lexer)
@@ -0,0 +1,157 @@
+# stream_lexer.py
+import codecs
+import mmap
+import re
+
+from lexer import (Lexer, LexerError, Token, LineIndex, MASTER_PATTERN, TRAILING_TRIVIA_PATTERN,
+                   RESERVED_KEYWORDS, OPERATOR_TOKENS, decode_string_literal,
+                   T_EOF, T_ID, T_INTEGER_CONST, T_REAL_CONST, T_STRING_LITERAL)
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Мастер-шаблон заглядывает не дальше двух символов за конец токена ("1." + цифра),
+# поэтому токен, кончающийся ближе к краю буфера, ждёт следующего блока.
+_LOOKAHEAD_RESERVE = 2
+
+# Пробелы и закрытые комментарии, затем комментарий {, не закрытый до конца буфера (группа 1 - его начало).
+_OPEN_COMMENT_PATTERN = re.compile(r"(?:[ \t\n\r\x0b\x0c\x1c-\x1f]|//[^\n]*\n|\{[^}]*\})*(\{)[^}]*\Z")
+
+class StreamingLexer:
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self.source = source
+        self.chunk_size = chunk_size
+        # Строгое декодирование, как у open(..., encoding='utf-8') в обычном режиме: неверный UTF-8 - ошибка.
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ''
+        self._buffer_offset = 0
+        self._source_done = False
+        self._pos = 0
+        # Индекс строк растёт по мере чтения: по 8 байт на строку, а не на токен.
+        self.lines = LineIndex()
+        self._tokens = None
+        self._eof_token = None
+
+    def _read_more(self, size):
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._buffer_offset += self._pos
+            self._pos = 0
+        data = self.source.read(size)
+        if isinstance(data, (bytes, bytearray)):
+            chunk = self._decoder.decode(data, final=not data)
+        else:
+            chunk = data
+        if not data:
+            self._source_done = True
+        if chunk:
+            self.lines.add_text(chunk, self._buffer_offset + len(self._buffer))
+            self._buffer += chunk
+
+    def _fallback_token(self):
+        # Посимвольный движок разбирает остаток буфера с той же позиции.
+        lexer = Lexer(self._buffer, self.lines, self._buffer_offset)
+        lexer.pos = self._pos
+        lexer.current_char = self._buffer[self._pos]
+        try:
+            token = lexer._get_token_logic()
+        except (LexerError, ValueError):
+            # ValueError - int() от цифр Unicode ('1²'), посимвольный движок пропускает её как есть.
+            # Ошибка у края буфера (незакрытая строка) может исчезнуть после дочитывания,
+            # ошибка внутри буфера (недопустимый символ) - нет: о ней сообщается сразу.
+            if self._source_done or lexer.pos + _LOOKAHEAD_RESERVE < len(self._buffer):
+                raise
+            return None, lexer.pos
+        return token, lexer.pos
+
+    def _skip_open_comment(self, start):
+        # Длинный или незакрытый комментарий { пропускается по блокам: его текст не копится в буфере.
+        offset = self._buffer_offset + start
+        while True:
+            self._pos = len(self._buffer)
+            if self._source_done:
+                raise LexerError(f'Unterminated comment starting at L{self.lines.line(offset)}:C{self.lines.column(offset)}.')
+            self._read_more(self.chunk_size)
+            end = self._buffer.find('}')
+            if end >= 0:
+                self._pos = end + 1
+                return
+
+    def tokens(self):
+        lines = self.lines
+        keywords = RESERVED_KEYWORDS
+        operators = OPERATOR_TOKENS
+        read_size = self.chunk_size
+        while True:
+            buffer = self._buffer
+            m = MASTER_PATTERN.match(buffer, self._pos)
+            if m is not None and (self._source_done or m.end() + _LOOKAHEAD_RESERVE <= len(buffer)):
+                kind = m.lastindex
+                offset = self._buffer_offset + m.start(kind)
+                self._pos = m.end()
+                read_size = self.chunk_size
+                if kind == 1:
+                    lexeme = m.group(1)
+                    keyword_type = keywords.get(lexeme.upper())
+                    if keyword_type:
+                        yield Token(keyword_type, keyword_type, offset, lines)
+                    else:
+                        yield Token(T_ID, lexeme, offset, lines)
+                elif kind == 5:
+                    lexeme = m.group(5)
+                    yield Token(operators[lexeme], lexeme, offset, lines)
+                elif kind == 3:
+                    yield Token(T_INTEGER_CONST, int(m.group(3)), offset, lines)
+                elif kind == 2:
+                    yield Token(T_REAL_CONST, float(m.group(2)), offset, lines)
+                else:
+                    yield Token(T_STRING_LITERAL, decode_string_literal(m.group(4)[1:-1]), offset, lines)
+                continue
+            if not self._source_done:
+                if m is None and self._pos < len(buffer) and not TRAILING_TRIVIA_PATTERN.match(buffer, self._pos):
+                    open_comment = _OPEN_COMMENT_PATTERN.match(buffer, self._pos)
+                    if open_comment is not None:
+                        self._skip_open_comment(open_comment.start(1))
+                        read_size = self.chunk_size
+                        continue
+                    token, end = self._fallback_token()
+                    if token is not None and token.type != T_EOF and end + _LOOKAHEAD_RESERVE <= len(buffer):
+                        self._pos = end
+                        yield token
+                        continue
+                self._read_more(read_size)
+                read_size *= 2
+                continue
+            if m is None and TRAILING_TRIVIA_PATTERN.match(buffer, self._pos):
+                self._pos = len(buffer)
+                yield Token(T_EOF, None, self._buffer_offset + len(buffer), lines)
+                return
+            token, end = self._fallback_token()
+            self._pos = end
+            yield token
+            if token.type == T_EOF:
+                return
+
+    def get_next_token(self):
+        # Как Lexer: после конца файла каждый вызов снова возвращает токен EOF.
+        if self._eof_token is not None:
+            return self._eof_token
+        if self._tokens is None:
+            self._tokens = self.tokens()
+        token = next(self._tokens)
+        if token.type == T_EOF:
+            self._eof_token = token
+        return token
+
+    def __iter__(self):
+        return self.tokens()
+
+def open_source_stream(path, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=True):
+    source_file = open(path, 'rb')
+    if use_mmap:
+        try:
+            mapped = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return source_file
+        source_file.close()
+        return mapped
+    return source_file
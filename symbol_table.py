@@ -24,6 +24,17 @@ class BuiltinTypeSymbol(Symbol):
 class VarSymbol(Symbol):
     def __init__(self, name, type):
         super().__init__(name, type)
+        # Адрес переменной: уровень вложенности области видимости и номер ячейки в её кадре.
+        self.scope_level = None
+        self.slot = None
+
+    @property
+    def address(self):
+        return (self.scope_level, self.slot)
+
+    def __str__(self):
+        type_name = getattr(self.type, 'name', None)
+        return f"<{self.__class__.__name__}(name='{self.name}', type='{type_name}', address={self.address})>"
 
 class ConstSymbol(Symbol):
     def __init__(self, name, type, value):
@@ -38,28 +49,60 @@ class ProcedureSymbol(Symbol):
     def __init__(self, name, params=None):
         super().__init__(name)
         self.params = params if params is not None else []
+        # Уровень области видимости тела и число ячеек кадра (параметры, затем локальные переменные).
+        self.scope_level = None
+        self.frame_size = 0
 
     def __str__(self):
         param_info = ', '.join(repr(p) for p in self.params)
         return f"<{self.__class__.__name__}(name='{self.name}', params=[{param_info}])>"
 
 class SymbolTable:
-    def __init__(self):
+    # Одна область видимости: своя таблица имён и ссылка на охватывающую область.
+    # Поиск идёт по цепочке областей, в каждой - один поиск в словаре. Переменные получают
+    # ячейки кадра по порядку объявления, поэтому параметры процедуры занимают ячейки 0..n-1.
+    def __init__(self, scope_name='global', scope_level=0, enclosing_scope=None):
         self._symbols = {}
+        self.scope_name = scope_name
+        self.scope_level = scope_level
+        self.enclosing_scope = enclosing_scope
+        self.slot_count = 0
 
     def __str__(self):
-        lines = [f"Symbols:"]
+        lines = [f"Symbols ({self.scope_name}, level {self.scope_level}):"]
         for k,v in self._symbols.items():
             lines.append(f"  {k}: {v}")
         return '\n'.join(lines)
 
     __repr__ = __str__
 
+    def __len__(self):
+        return len(self._symbols)
+
     def define(self, symbol):
         if not isinstance(symbol, Symbol):
             raise TypeError("Can only define objects of type Symbol or its subclasses")
+        if isinstance(symbol, VarSymbol):
+            symbol.scope_level = self.scope_level
+            symbol.slot = self.slot_count
+            self.slot_count += 1
+        self._symbols[symbol.name] = symbol
+
+    def insert(self, symbol):
+        # Символ, уже получивший адрес в другой таблице (восстановление глобальной области
+        # в процессе-исполнителе parallel_compiler): ячейка не выделяется заново.
         self._symbols[symbol.name] = symbol
+        if isinstance(symbol, VarSymbol):
+            self.slot_count = max(self.slot_count, symbol.slot + 1)
+
+    def symbols(self):
+        return list(self._symbols.values())
 
     def lookup(self, name, current_scope_only=False):
-        symbol = self._symbols.get(name)
-        return symbol
\ No newline at end of file
+        scope = self
+        while scope is not None:
+            symbol = scope._symbols.get(name)
+            if symbol is not None or current_scope_only:
+                return symbol
+            scope = scope.enclosing_scope
+        return None
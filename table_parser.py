@@ -0,0 +1,431 @@
+# table_parser.py
+from lexer import *
+from ast_nodes import *
+from parser import Parser
+from token_stream import TokenStream
+from parser_generator import (GrammarError, generate_parse_table, is_terminal, DEFAULT_GRAMMAR_PATH,
+                              HELPER_STAR, HELPER_OPTIONAL)
+
+# Табличный LL(1) разбор по таблице, которую parser_generator строит из gramma.txt.
+# Рекурсии нет: нетерминал на вершине стека заменяется правой частью продукции,
+# выбранной по текущему токену, терминал сверяется с токеном. Узлы AST собираются
+# на стеке значений маркерами свёртки, которые компилятор таблицы вставляет в продукции.
+
+# Маркеры стека разбора (кортежи, первый элемент - вид).
+_START = 0        # запомнить токен начала правила (для span)
+_REDUCE = 1       # (вид, builder, n): n значений -> builder(*значения)
+_SPAN_REDUCE = 2  # то же и span = (начальный токен, текущий токен); builder None - значение как есть
+_FOLD = 3         # левый операнд, операция, правый операнд -> BinOp
+_LIST = 4         # пустой список для повторения (...)*
+_APPEND = 5       # (вид, n): n значений -> элемент списка под ними
+_PACK = 6         # (вид, n): n значений необязательной части или группы -> кортеж
+_NONE = 7         # пустая необязательная часть
+_DONE = 8         # дно стека: разбор программы закончен
+
+_START_MARKER = (_START,)
+_FOLD_MARKER = (_FOLD,)
+_LIST_MARKER = (_LIST,)
+_NONE_MARKER = (_NONE,)
+_DONE_MARKER = (_DONE,)
+
+# Правила вида "операнд (операция операнд)*": повторение сразу сворачивается в BinOp
+# слева направо, как в Parser.infix_expression, без промежуточного списка.
+BINARY_RULES = frozenset(('expression', 'and_expression', 'comparison', 'additive', 'term'))
+
+# Правила, узлам которых Parser ставит span.
+SPANNED_RULES = frozenset(('statement', 'compound_statement', 'procedure_declaration_part'))
+
+def _items(values, index):
+    return [item[index] for item in values]
+
+def _build_program(header, block, dot):
+    return Program(header[1].value if header is not None else "DefaultProgram", block)
+
+def _build_declarations(parts):
+    declarations = []
+    for part in parts:
+        if part.__class__ is list:
+            declarations.extend(part)
+        else:
+            declarations.append(part)
+    return declarations
+
+def _build_declaration_part(keyword, declarations):
+    return declarations if declarations is not None else []
+
+def _build_declaration_list(declarations, rest):
+    if rest is not None and rest[1] is not None:
+        return declarations + rest[1]
+    return declarations
+
+def _build_var_declaration(id_token, more, colon, type_node):
+    return [VarDecl(Variable(token), type_node) for token in [id_token] + _items(more, 1)]
+
+def _build_const_list(declaration, rest):
+    if rest is not None and rest[1] is not None:
+        return [declaration] + rest[1]
+    return [declaration]
+
+def _build_const_declaration(id_token, equal, value_node):
+    return ConstDecl(Variable(id_token), value_node)
+
+def _build_procedure(proc_token, id_token, parameters, semi, block_node, last_semi):
+    params = parameters[1] if parameters is not None and parameters[1] is not None else []
+    return ProcedureDecl(id_token.value, params, block_node)
+
+def _build_formal_parameter_list(params, more):
+    for _, group in more:
+        params.extend(group)
+    return params
+
+def _build_formal_parameters(id_token, more, colon, type_node):
+    return [Param(Variable(token), type_node) for token in [id_token] + _items(more, 1)]
+
+def _build_compound_statement(begin, statements, end):
+    node = CompoundStatement()
+    node.children.extend(statements)
+    return node
+
+def _build_statement_list(first, more):
+    statements = [first]
+    statements.extend(_items(more, 1))
+    # Грамматика разрешает пустой оператор перед END, Parser.statement_list его не создаёт.
+    if statements[-1].__class__ is NoOp:
+        statements.pop()
+    return statements
+
+def _build_id_statement(id_token, tail):
+    if tail is None:
+        return ProcedureCall(id_token.value, [], id_token)
+    if len(tail) == 2:
+        return Assign(Variable(id_token), tail[0], tail[1])
+    return ProcedureCall(id_token.value, tail[1] if tail[1] is not None else [], id_token)
+
+def _build_if_statement(if_token, condition, then, then_statement, else_part):
+    return If(condition, then_statement, else_part[1] if else_part is not None else None)
+
+def _build_while_statement(while_token, condition, do, body):
+    return While(condition, body)
+
+def _build_read_statement(read_token, lparen, first, more, rparen):
+    return Read([first] + _items(more, 1))
+
+def _build_write_statement(write_token, lparen, expressions, rparen):
+    return Write(expressions if expressions is not None else [])
+
+def _build_actual_parameters(first, more):
+    return [first] + _items(more, 1)
+
+def _build_not_expression(not_token, operand):
+    return UnaryOp(op=not_token, expr=operand)
+
+def _build_factor(*values):
+    if len(values) == 2:
+        return UnaryOp(op=values[0], expr=values[1])
+    if len(values) == 3:
+        return values[1]
+    token = values[0]
+    if token.type == T_STRING_LITERAL:
+        return StringLiteral(token)
+    return Num(token)
+
+def _build_empty():
+    return NoOp()
+
+RULE_BUILDERS = {
+    'program': _build_program,
+    'block': Block,
+    'declarations': _build_declarations,
+    'var_declaration_part': _build_declaration_part,
+    'var_declaration_list': _build_declaration_list,
+    'var_declaration': _build_var_declaration,
+    'const_declaration_part': _build_declaration_part,
+    'const_declaration_list': _build_const_list,
+    'const_declaration': _build_const_declaration,
+    'procedure_declaration_part': _build_procedure,
+    'formal_parameter_list': _build_formal_parameter_list,
+    'formal_parameters': _build_formal_parameters,
+    'type_spec': Type,
+    'compound_statement': _build_compound_statement,
+    'statement_list': _build_statement_list,
+    'id_statement': _build_id_statement,
+    'if_statement': _build_if_statement,
+    'while_statement': _build_while_statement,
+    'read_statement': _build_read_statement,
+    'write_statement': _build_write_statement,
+    'actual_parameters': _build_actual_parameters,
+    'not_expression': _build_not_expression,
+    'factor': _build_factor,
+    'variable': Variable,
+    'empty': _build_empty,
+}
+
+class _Shift(tuple):
+    # Раскрытие, первый элемент которого - текущий токен: движок сразу переносит его на стек значений.
+    pass
+
+class _ShiftReduce(tuple):
+    # То же, и из одного токена сразу строится узел (Variable, Num, Type): builder лежит на вершине.
+    pass
+
+class CompiledTable:
+    # Таблица, переведённая в форму для движка: нетерминалы пронумерованы, для каждой пары
+    # (нетерминал, токен) готов перевёрнутый кортеж элементов стека. Продукция раскрыта
+    # вглубь до первого терминала: первые нетерминалы правой части выбираются по тому же
+    # токену, поэтому их раскрытие подставляется сразу, без лишних оборотов цикла.
+    # Подряд идущие нетерминалы (обычно хвосты term#1 additive#1 ... после операнда, которые
+    # почти всегда пусты) объединяются в цепочку с собственной строкой таблицы: один поиск
+    # по токену вместо поиска на каждый хвост.
+    def __init__(self, parse_table):
+        self.parse_table = parse_table
+        self.names = list(parse_table.grammar.nonterminals)
+        self.ids = {name: index for index, name in enumerate(self.names)}
+        self.start = self.ids[parse_table.start]
+        self.items = [self._production_items(production) for production in parse_table.productions]
+        self.expand = [None] * len(self.names)
+        self.chains = {}
+        for index, name in enumerate(parse_table.grammar.nonterminals):
+            row = {}
+            for terminal, production in parse_table.table[name].items():
+                row[terminal] = self._stack_items(self._expand_prefix(self.items[production], terminal)[0])
+            self.expand[index] = row
+
+    def _stack_items(self, items):
+        compressed = []
+        start = 0
+        while start < len(items):
+            item = items[start]
+            if item.__class__ is not int:
+                compressed.append(item)
+                start += 1
+                continue
+            # Отрезок от нетерминала до последнего нетерминала, между ними допустима только свёртка
+            # BinOp: хвосты выражения после операнда (term#1 FOLD additive#1 ...) становятся одной цепочкой.
+            end = start
+            last = start
+            while end < len(items) and (items[end].__class__ is int or items[end] is _FOLD_MARKER):
+                if items[end].__class__ is int:
+                    last = end
+                end += 1
+            run = items[start:last + 1]
+            if sum(1 for entry in run if entry.__class__ is int) > 1:
+                compressed.append(self._chain(tuple(run)))
+            else:
+                compressed.extend(run)
+            start = last + 1
+        if not compressed or compressed[0].__class__ is not str:
+            return tuple(reversed(compressed))
+        # Раскрытие начинается с терминала, по которому оно выбрано: сверять его не нужно.
+        rest = compressed[1:]
+        if rest and rest[0].__class__ is tuple and rest[0][0] == _REDUCE and rest[0][2] == 1:
+            return _ShiftReduce(tuple(reversed(rest[1:])) + (rest[0][1],))
+        return _Shift(reversed(rest))
+
+    def _chain(self, run):
+        chain_id = self.chains.get(run)
+        if chain_id is not None:
+            return chain_id
+        chain_id = len(self.names)
+        self.chains[run] = chain_id
+        # В сообщениях об ошибке цепочка называется по первому нетерминалу.
+        self.names.append(self.names[run[0]])
+        row = {}
+        self.expand.append(row)
+        for terminal in self.parse_table.table[self.names[run[0]]]:
+            row[terminal] = self._stack_items(self._expand_prefix(list(run), terminal)[0])
+        return chain_id
+
+    def _owner(self, name):
+        return name.partition('#')[0]
+
+    def _production_items(self, production):
+        # Элементы продукции в порядке выполнения.
+        helpers = self.parse_table.helpers
+        lhs = production.lhs
+        kind = helpers.get(lhs)
+        binary = self._owner(lhs) in BINARY_RULES and kind in (HELPER_STAR, HELPER_OPTIONAL)
+        items = []
+        if kind is None and lhs in SPANNED_RULES:
+            items.append(_START_MARKER)
+        for symbol in production.rhs:
+            if is_terminal(symbol):
+                items.append(symbol)
+                continue
+            # Повторение получает новый список, кроме свёртки бинарных операций и шага самого повторения.
+            if helpers.get(symbol) == HELPER_STAR and symbol != lhs and not (kind is None and lhs in BINARY_RULES):
+                items.append(_LIST_MARKER)
+            items.append(self.ids[symbol])
+        rhs = production.rhs
+        count = len(rhs)
+        if kind is None:
+            if lhs in BINARY_RULES:
+                # Значение правила - левый операнд после всех свёрток FOLD, свёртка правила не нужна.
+                pass
+            elif count == 1 and not is_terminal(rhs[0]) and rhs[0] not in helpers:
+                # Единичная продукция (statement ::= if_statement): значение проходит как есть.
+                if lhs in SPANNED_RULES:
+                    items.append((_SPAN_REDUCE, None, 1))
+            elif lhs not in RULE_BUILDERS:
+                raise GrammarError(f"No AST builder for grammar rule '{lhs}'")
+            elif lhs in SPANNED_RULES:
+                items.append((_SPAN_REDUCE, RULE_BUILDERS[lhs], count))
+            else:
+                items.append((_REDUCE, RULE_BUILDERS[lhs], count))
+        elif binary:
+            if count:
+                # Тело повторения: операция и правый операнд (сам хелпер в конце для *).
+                body = count - 1 if kind == HELPER_STAR else count
+                if body != 2:
+                    raise GrammarError(f"Binary rule helper '{lhs}' must be 'operator operand'")
+                if kind == HELPER_STAR:
+                    items.insert(len(items) - 1, _FOLD_MARKER)
+                else:
+                    items.append(_FOLD_MARKER)
+        elif kind == HELPER_STAR:
+            if count:
+                items.insert(len(items) - 1, (_APPEND, count - 1))
+        elif count == 0:
+            items.append(_NONE_MARKER)
+        elif count > 1:
+            items.append((_PACK, count))
+        return items
+
+    def _expand_prefix(self, items, terminal):
+        # Раскрытие элементов, пока в начале стоят нетерминалы, выбираемые по тому же токену.
+        # Второе значение - дошли ли до элемента, который читает токен (или сообщит об ошибке).
+        table = self.parse_table.table
+        result = []
+        for position, item in enumerate(items):
+            if item.__class__ is int:
+                inner = table[self.names[item]].get(terminal)
+                if inner is not None:
+                    expanded, stopped = self._expand_prefix(self.items[inner], terminal)
+                    result.extend(expanded)
+                    if not stopped:
+                        continue
+                    position += 1
+                result.extend(items[position:])
+                return result, True
+            if item.__class__ is str:
+                result.extend(items[position:])
+                return result, True
+            result.append(item)
+        return result, False
+
+_compiled_tables = {}
+
+def compile_parse_table(path=DEFAULT_GRAMMAR_PATH):
+    compiled = _compiled_tables.get(path)
+    if compiled is None:
+        compiled = CompiledTable(generate_parse_table(path))
+        _compiled_tables[path] = compiled
+    return compiled
+
+class TableParser(Parser):
+    # Тот же AST (включая span), что у Parser, но разбор ведёт таблица из gramma.txt.
+    # Таблица знает только, какой токен ожидался, поэтому при ошибке тот же поток токенов
+    # с начала разбирает Parser: сообщение и позиция ошибки совпадают с его.
+    def __init__(self, lexer, grammar_path=DEFAULT_GRAMMAR_PATH):
+        tokens = lexer if hasattr(lexer, 'next_token') else TokenStream(lexer)
+        self._start_mark = tokens.mark() if hasattr(tokens, 'mark') else None
+        super().__init__(tokens)
+        self.lexer = lexer
+        self.compiled = compile_parse_table(grammar_path)
+
+    def _syntax_error(self, token, message):
+        self.current_token = token
+        if self._start_mark is not None:
+            self.tokens.reset(self._start_mark)
+            self._start_mark = None
+            Parser(self.tokens).parse()
+        # Parser разобрал программу (или поток не перематывается): остаётся сообщение таблицы.
+        self.error(message)
+
+    def parse(self):
+        compiled = self.compiled
+        expand = compiled.expand
+        next_token = self.tokens.next_token
+        stack = [_DONE_MARKER, compiled.start]
+        values = []
+        pop = stack.pop
+        extend = stack.extend
+        push_value = values.append
+        token = self.current_token
+        token_type = token.type
+        while True:
+            item = pop()
+            item_class = item.__class__
+            if item_class is int:
+                production = expand[item].get(token_type)
+                if production is None:
+                    # Вспомогательные нетерминалы (term#1) называются по правилу грамматики.
+                    self._syntax_error(token, f"Unexpected token {token_type} in {compiled.names[item].partition('#')[0]}")
+                production_class = production.__class__
+                if production_class is _Shift:
+                    push_value(token)
+                    token = next_token()
+                    token_type = token.type
+                elif production_class is _ShiftReduce:
+                    extend(production)
+                    push_value(pop()(token))
+                    token = next_token()
+                    token_type = token.type
+                    continue
+                extend(production)
+            elif item_class is str:
+                if item != token_type:
+                    self._syntax_error(token, f"Expected token {item}, but got {token_type}")
+                push_value(token)
+                token = next_token()
+                token_type = token.type
+            else:
+                kind = item[0]
+                if kind == _REDUCE:
+                    count = item[2]
+                    if count:
+                        node = item[1](*values[-count:])
+                        del values[-count:]
+                    else:
+                        node = item[1]()
+                    push_value(node)
+                elif kind == _FOLD:
+                    right = values.pop()
+                    op = values.pop()
+                    values[-1] = BinOp(values[-1], op, right)
+                elif kind == _APPEND:
+                    count = item[1]
+                    if count == 1:
+                        element = values.pop()
+                    else:
+                        element = tuple(values[-count:])
+                        del values[-count:]
+                    values[-1].append(element)
+                elif kind == _START:
+                    push_value(token)
+                elif kind == _SPAN_REDUCE:
+                    count = item[2]
+                    if item[1] is None:
+                        node = values.pop()
+                    else:
+                        node = item[1](*values[-count:])
+                        del values[-count:]
+                    node.span = (values.pop(), token)
+                    push_value(node)
+                elif kind == _PACK:
+                    count = item[1]
+                    packed = tuple(values[-count:])
+                    del values[-count:]
+                    push_value(packed)
+                elif kind == _LIST:
+                    push_value([])
+                elif kind == _NONE:
+                    push_value(None)
+                else:
+                    break
+        self.current_token = token
+        if token_type != T_EOF:
+            self._syntax_error(token, "Expected EOF after program DOT")
+        if self._start_mark is not None:
+            self.tokens.release(self._start_mark)
+            self._start_mark = None
+        return values[-1]
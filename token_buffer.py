@@ -0,0 +1,177 @@
+# token_buffer.py
+from array import array
+
+from lexer import (Lexer, Token, LineIndex, MASTER_PATTERN, TRAILING_TRIVIA_PATTERN,
+                   RESERVED_KEYWORDS, OPERATOR_TOKENS, TOKEN_TYPES, TOKEN_KINDS, decode_string_literal,
+                   T_EOF, T_ID, T_INTEGER_CONST, T_REAL_CONST, T_STRING_LITERAL)
+from token_stream import TokenStreamError
+
+K_EOF = TOKEN_KINDS[T_EOF]
+K_ID = TOKEN_KINDS[T_ID]
+K_INTEGER_CONST = TOKEN_KINDS[T_INTEGER_CONST]
+K_REAL_CONST = TOKEN_KINDS[T_REAL_CONST]
+K_STRING_LITERAL = TOKEN_KINDS[T_STRING_LITERAL]
+
+KEYWORD_KINDS = {name: TOKEN_KINDS[token_type] for name, token_type in RESERVED_KEYWORDS.items()}
+OPERATOR_KINDS = {lexeme: TOKEN_KINDS[token_type] for lexeme, token_type in OPERATOR_TOKENS.items()}
+
+# Значения токенов, которые однозначно определяются их типом.
+FIXED_VALUES = {K_EOF: None}
+FIXED_VALUES.update({kind: TOKEN_TYPES[kind] for kind in KEYWORD_KINDS.values()})
+FIXED_VALUES.update({kind: lexeme for lexeme, kind in OPERATOR_KINDS.items()})
+
+class TokenBuffer:
+    def __init__(self, text):
+        self.text = text
+        self.kinds = array('B')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.line_index = LineIndex(text)
+        self.error = None
+        self._fallback_values = {}
+        self._tokenize()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __str__(self):
+        return f"TokenBuffer(tokens={len(self.kinds)}, lines={len(self.line_index.line_starts)})"
+
+    __repr__ = __str__
+
+    def _append(self, kind, start, end):
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def _tokenize(self):
+        text = self.text
+        kinds_append = self.kinds.append
+        starts_append = self.starts.append
+        ends_append = self.ends.append
+        keyword_kinds = KEYWORD_KINDS
+        operator_kinds = OPERATOR_KINDS
+        pos = 0
+        while True:
+            # scanner.match продолжает с конца предыдущего токена и на первой неудаче возвращает None;
+            # finditer искал бы следующее совпадение дальше по тексту - квадратично на длинном ряду пробелов.
+            for m in iter(MASTER_PATTERN.scanner(text, pos).match, None):
+                group = m.lastindex
+                start, end = m.span(group)
+                if group == 1:
+                    kinds_append(keyword_kinds.get(text[start:end].upper(), K_ID))
+                elif group == 5:
+                    kinds_append(operator_kinds[text[start:end]])
+                elif group == 3:
+                    kinds_append(K_INTEGER_CONST)
+                elif group == 2:
+                    kinds_append(K_REAL_CONST)
+                else:
+                    kinds_append(K_STRING_LITERAL)
+                starts_append(start)
+                ends_append(end)
+                pos = end
+            if TRAILING_TRIVIA_PATTERN.match(text, pos):
+                self._append(K_EOF, len(text), len(text))
+                return
+            token, end = self._fallback_token(pos)
+            if token is None:
+                return
+            if token.type == T_EOF:
+                self._append(K_EOF, len(text), len(text))
+                return
+            self._fallback_values[len(self.kinds)] = token.value
+            self._append(TOKEN_KINDS[token.type], token.offset, end)
+            pos = end
+
+    def _fallback_token(self, pos):
+        # Посимвольный движок разбирает то, что не покрывает мастер-шаблон, с той же позиции.
+        lexer = Lexer(self.text, self.line_index)
+        lexer.pos = pos
+        lexer.current_char = self.text[pos]
+        try:
+            token = lexer._get_token_logic()
+        except Exception as e:
+            self.error = e
+            return None, pos
+        return token, lexer.pos
+
+    def token_type(self, index):
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def value(self, index):
+        kind = self.kinds[index]
+        if kind in FIXED_VALUES:
+            return FIXED_VALUES[kind]
+        if index in self._fallback_values:
+            return self._fallback_values[index]
+        lexeme = self.text[self.starts[index]:self.ends[index]]
+        if kind == K_ID:
+            return lexeme
+        if kind == K_INTEGER_CONST:
+            return int(lexeme)
+        if kind == K_REAL_CONST:
+            return float(lexeme)
+        return decode_string_literal(lexeme[1:-1])
+
+    def line(self, index):
+        return self.line_index.line(self.starts[index])
+
+    def column(self, index):
+        if self.kinds[index] == K_EOF:
+            return self.line_index.eof_column(self.starts[index])
+        return self.line_index.column(self.starts[index])
+
+    def token(self, index):
+        return Token(TOKEN_TYPES[self.kinds[index]], self.value(index), self.starts[index], self.line_index)
+
+    def stream(self):
+        return TokenBufferStream(self)
+
+class TokenBufferStream:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self._pos = 0
+        self._marks = []
+
+    def __str__(self):
+        return f"TokenBufferStream(pos={self._pos}, tokens={len(self.buffer)})"
+
+    __repr__ = __str__
+
+    @property
+    def position(self):
+        return self._pos
+
+    def _token_at(self, index):
+        buffer = self.buffer
+        last = len(buffer.kinds) - 1
+        if index > last:
+            if buffer.error is not None:
+                raise buffer.error
+            index = last
+        return buffer.token(index)
+
+    def peek(self, k=1):
+        if k < 1:
+            raise TokenStreamError(f"Lookahead distance must be positive, got {k}")
+        return self._token_at(self._pos + k - 1)
+
+    def next_token(self):
+        token = self._token_at(self._pos)
+        self._pos += 1
+        return token
+
+    def mark(self):
+        self._marks.append(self._pos)
+        return self._pos
+
+    def release(self, marker):
+        try:
+            self._marks.remove(marker)
+        except ValueError:
+            raise TokenStreamError(f"Unknown token stream mark {marker}")
+
+    def reset(self, marker):
+        self.release(marker)
+        self._pos = marker
@@ -0,0 +1,90 @@
+# token_stream.py
+from lexer import T_EOF
+
+class TokenStreamError(Exception):
+    pass
+
+class TokenStream:
+    def __init__(self, source, capacity=16):
+        if hasattr(source, 'get_next_token'):
+            self._fetch = source.get_next_token
+        else:
+            self._fetch = iter(source).__next__
+        self.source = source
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._buffer = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._pos = 0
+        self._end = 0
+        self._marks = []
+        self._eof_token = None
+
+    def __str__(self):
+        return f"TokenStream(pos={self._pos}, buffered={self._end - self._pos}, marks={len(self._marks)})"
+
+    __repr__ = __str__
+
+    @property
+    def position(self):
+        return self._pos
+
+    def _grow(self):
+        old_buffer, old_mask = self._buffer, self._mask
+        new_size = len(old_buffer) * 2
+        new_buffer = [None] * new_size
+        for index in range(self._head, self._end):
+            new_buffer[index & (new_size - 1)] = old_buffer[index & old_mask]
+        self._buffer = new_buffer
+        self._mask = new_size - 1
+
+    def _fill(self):
+        if self._end - self._head > self._mask:
+            self._grow()
+        token = self._eof_token
+        if token is None:
+            try:
+                token = self._fetch()
+            except StopIteration:
+                raise TokenStreamError("Token source ended without an EOF token")
+            if token.type == T_EOF:
+                self._eof_token = token
+        self._buffer[self._end & self._mask] = token
+        self._end += 1
+
+    def peek(self, k=1):
+        if k < 1:
+            raise TokenStreamError(f"Lookahead distance must be positive, got {k}")
+        index = self._pos + k - 1
+        while index >= self._end:
+            self._fill()
+        return self._buffer[index & self._mask]
+
+    def next_token(self):
+        if self._pos >= self._end:
+            self._fill()
+        token = self._buffer[self._pos & self._mask]
+        self._pos += 1
+        if not self._marks:
+            self._head = self._pos
+        return token
+
+    def mark(self):
+        self._marks.append(self._pos)
+        return self._pos
+
+    def release(self, marker):
+        try:
+            self._marks.remove(marker)
+        except ValueError:
+            raise TokenStreamError(f"Unknown token stream mark {marker}")
+        if not self._marks:
+            self._head = self._pos
+
+    def reset(self, marker):
+        if marker not in self._marks:
+            raise TokenStreamError(f"Unknown token stream mark {marker}")
+        self._pos = marker
+        self.release(marker)